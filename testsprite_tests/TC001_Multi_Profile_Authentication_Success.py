@@ -1,27 +1,11 @@
-import asyncio
 from playwright import async_api
+from harness import browser, locators, waits
 
 async def run_test():
-    pw = None
-    browser = None
     context = None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
+        # Get a fresh isolated context (like an incognito window) from the shared harness browser
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
@@ -47,26 +31,26 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click the 'Entrar no Sistema Angra Saúde' button to navigate to the login page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div/section/div[5]/div[5]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/div/section/div[5]/div[5]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Logout from Gestor profile to prepare for Hospital profile login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div[3]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div[3]/div[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the profile menu to logout or switch profile to Hospital.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[2]/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div[2]/div')
+        await waits.click(elem, timeout=5000)
         
 
         # Logout from Médico profile to prepare for Hospital profile login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Find and click the logout button or profile switch option to logout from Médico profile.
@@ -75,20 +59,20 @@ async def run_test():
 
         # Click the logout or profile switch button to logout from Médico profile.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div[3]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div[3]/div[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Hospital' profile option to switch to Hospital profile login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[2]/div/div[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div[2]/div/div[2]')
+        await waits.click(elem, timeout=5000)
         
 
         # Logout from Hospital profile to prepare for Paciente profile login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Find and click the logout or profile switch button to logout from Hospital profile.
@@ -96,14 +80,14 @@ async def run_test():
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div[3]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div[3]/div[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Paciente' profile option to switch to Paciente profile login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[2]/div/div[4]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div[2]/div/div[4]')
+        await waits.click(elem, timeout=5000)
         
 
         # Assert redirection to Gestor dashboard by checking for Gestor KPIs visibility
@@ -129,15 +113,10 @@ async def run_test():
         preventive_guidance_locator = frame.locator('text=Cuidados para Idosos')
         assert await paciente_medical_history_locator.is_visible(), 'Personal medical history should be visible on Paciente dashboard'
         assert await preventive_guidance_locator.is_visible(), 'Preventive guidance should be visible on Paciente dashboard'
-        await asyncio.sleep(5)
     
     finally:
         if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
+            await browser.release_context(context)
             
-asyncio.run(run_test())
-    
\ No newline at end of file
+if __name__ == "__main__":
+    browser.run(run_test)
\ No newline at end of file
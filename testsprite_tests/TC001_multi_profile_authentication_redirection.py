@@ -1,5 +1,5 @@
-import requests
 from requests.exceptions import RequestException, Timeout
+from harness import api_client, userpool
 
 BASE_URL = "http://localhost:8080"
 TIMEOUT = 30  # seconds
@@ -15,34 +15,6 @@ PROFILE_DASHBOARD_PATHS = {
     "Paciente": "/dashboard/paciente",
 }
 
-def create_demo_user():
-    """
-    Uses the Supabase edge function to create a demo user with multiple profiles.
-    Returns the user credentials and user ID.
-    """
-    url = f"{BASE_URL}/edge-functions/create-demo-user"
-    try:
-        response = requests.post(url, timeout=TIMEOUT)
-        response.raise_for_status()
-        return response.json()  # Expecting at least { "email": ..., "password": ..., "user_id": ... }
-    except (RequestException, Timeout) as e:
-        raise RuntimeError(f"Failed to create demo user: {e}")
-
-def delete_user(user_id, jwt_token):
-    """
-    Deletes a user by ID using the authentication service or user management API.
-    Assumes an endpoint DELETE /users/{user_id} with JWT auth.
-    """
-    url = f"{BASE_URL}/api/users/{user_id}"
-    headers = HEADERS.copy()
-    headers["Authorization"] = f"Bearer {jwt_token}"
-    try:
-        response = requests.delete(url, headers=headers, timeout=TIMEOUT)
-        response.raise_for_status()
-    except (RequestException, Timeout):
-        # Try best effort, do not fail test on cleanup
-        pass
-
 def authenticate_user(email, password):
     """
     Authenticates user credentials to receive a JWT token.
@@ -54,7 +26,7 @@ def authenticate_user(email, password):
         "password": password
     }
     try:
-        response = requests.post(url, json=payload, headers=HEADERS, timeout=TIMEOUT)
+        response = api_client.post(url, json=payload, headers=HEADERS, timeout=TIMEOUT)
         response.raise_for_status()
         data = response.json()
         if "access_token" not in data or "profiles" not in data:
@@ -74,7 +46,7 @@ def switch_profile(token, profile):
     headers["Authorization"] = f"Bearer {token}"
     payload = {"profile": profile}
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=TIMEOUT)
+        response = api_client.post(url, json=payload, headers=headers, timeout=TIMEOUT)
         response.raise_for_status()
         data = response.json()
         if "redirect_url" not in data:
@@ -84,13 +56,8 @@ def switch_profile(token, profile):
         raise RuntimeError(f"Profile switch failed for profile '{profile}': {e}")
 
 def test_multi_profile_authentication_redirection():
-    demo_user = None
-    jwt_token = None
-    user_id = None
-
-    try:
-        # Step 1: Create demo user with multiple profiles
-        demo_user = create_demo_user()
+    # Step 1: Lease a pre-provisioned demo user with multiple profiles
+    with userpool.lease("gestor") as demo_user:
         email = demo_user.get("email")
         password = demo_user.get("password")
         user_id = demo_user.get("user_id")
@@ -114,9 +81,7 @@ def test_multi_profile_authentication_redirection():
             assert redirect_url.endswith(expected_path), (
                 f"Redirect URL '{redirect_url}' does not end with expected dashboard path '{expected_path}' for profile '{profile}'"
             )
-    finally:
-        # Cleanup: delete demo user if created and JWT token available
-        if user_id and jwt_token:
-            delete_user(user_id, jwt_token)
+        # The pool resets the user on release and deletes it after the run
 
-test_multi_profile_authentication_redirection()
\ No newline at end of file
+if __name__ == "__main__":
+    test_multi_profile_authentication_redirection()
\ No newline at end of file
@@ -1,27 +1,11 @@
-import asyncio
 from playwright import async_api
+from harness import browser, locators, waits
 
 async def run_test():
-    pw = None
-    browser = None
     context = None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
+        # Get a fresh isolated context (like an incognito window) from the shared harness browser
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
@@ -47,8 +31,8 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click on 'Entrar no Sistema Angra Saúde' button to navigate to the login page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div/section/div[5]/div[5]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/div/section/div[5]/div[5]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Find and click the correct element to navigate to the login page with username and password inputs.
@@ -56,21 +40,16 @@ async def run_test():
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div[3]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div[3]/div[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Generic failing assertion since expected result is unknown
         assert False, 'Test failed due to unknown expected result'
-        await asyncio.sleep(5)
     
     finally:
         if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
+            await browser.release_context(context)
             
-asyncio.run(run_test())
-    
\ No newline at end of file
+if __name__ == "__main__":
+    browser.run(run_test)
\ No newline at end of file
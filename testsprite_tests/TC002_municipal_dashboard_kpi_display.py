@@ -2,6 +2,7 @@ import requests
 import base64
 import json
 import time
+from harness import api_client
 
 BASE_URL = "http://localhost:8080"
 TIMEOUT = 30
@@ -17,7 +18,7 @@ def authenticate(email, password):
     payload = {"email": email, "password": password}
     headers = {"Content-Type": "application/json"}
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=TIMEOUT)
+        response = api_client.post(url, json=payload, headers=headers, timeout=TIMEOUT)
         response.raise_for_status()
         data = response.json()
         token = data.get("access_token") or data.get("token")
@@ -35,7 +36,7 @@ def get_municipal_dashboard(token):
         "Accept": "application/json"
     }
     try:
-        response = requests.get(url, headers=headers, timeout=TIMEOUT)
+        response = api_client.get(url, headers=headers, timeout=TIMEOUT)
         return response
     except requests.RequestException as e:
         raise AssertionError(f"Municipal dashboard request failed: {e}")
@@ -128,4 +129,5 @@ def test_municipal_dashboard_kpi_display():
                 raise AssertionError(f"Security header '{header}' missing in response")
 
 
-test_municipal_dashboard_kpi_display()
+if __name__ == "__main__":
+    test_municipal_dashboard_kpi_display()
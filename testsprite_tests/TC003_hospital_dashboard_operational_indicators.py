@@ -2,6 +2,7 @@ import requests
 import time
 import base64
 import json
+from harness import api_client
 
 BASE_URL = "http://localhost:8080"
 TIMEOUT = 30
@@ -15,7 +16,7 @@ AUTH_CREDENTIALS = {
 def authenticate_get_jwt():
     url = f"{BASE_URL}/auth/login"
     headers = {"Content-Type": "application/json"}
-    resp = requests.post(url, json=AUTH_CREDENTIALS, headers=headers, timeout=TIMEOUT)
+    resp = api_client.post(url, json=AUTH_CREDENTIALS, headers=headers, timeout=TIMEOUT)
     assert resp.status_code == 200, f"Authentication failed with status {resp.status_code}"
     json_resp = resp.json()
     assert "access_token" in json_resp, "No access_token in authentication response"
@@ -45,7 +46,7 @@ def test_hospital_dashboard_operational_indicators():
 
         # 1. Validate Hospital Dashboard Operational Indicators
         dashboard_url = f"{BASE_URL}/api/dashboard/hospital/operational-indicators"
-        resp = requests.get(dashboard_url, headers=headers, timeout=TIMEOUT)
+        resp = api_client.get(dashboard_url, headers=headers, timeout=TIMEOUT)
         assert resp.status_code == 200, f"Dashboard API returned {resp.status_code}"
         data = resp.json()
 
@@ -93,7 +94,7 @@ def test_hospital_dashboard_operational_indicators():
 
         # 2. Test backend database integrations by checking RTD/Supabase health endpoint
         health_url = f"{BASE_URL}/api/health"
-        health_resp = requests.get(health_url, headers=headers, timeout=TIMEOUT)
+        health_resp = api_client.get(health_url, headers=headers, timeout=TIMEOUT)
         assert health_resp.status_code == 200, f"Health check returned {health_resp.status_code}"
         health_data = health_resp.json()
         # Check db and external integrations status keys are present
@@ -115,7 +116,7 @@ def test_hospital_dashboard_operational_indicators():
         times = []
         for _ in range(3):
             start = time.time()
-            r = requests.get(dashboard_url, headers=headers, timeout=TIMEOUT)
+            r = api_client.get(dashboard_url, headers=headers, timeout=TIMEOUT)
             duration = time.time() - start
             times.append(duration)
             assert r.status_code == 200, f"Dashboard API call failed with status {r.status_code}"
@@ -129,9 +130,10 @@ def test_hospital_dashboard_operational_indicators():
         # Optionally, perform logout or cleanup if the API supports it
         if token and headers:
             try:
-                requests.post(f"{BASE_URL}/auth/logout", headers=headers, timeout=TIMEOUT)
+                api_client.post(f"{BASE_URL}/auth/logout", headers=headers, timeout=TIMEOUT)
             except Exception:
                 pass
 
 
-test_hospital_dashboard_operational_indicators()
\ No newline at end of file
+if __name__ == "__main__":
+    test_hospital_dashboard_operational_indicators()
\ No newline at end of file
@@ -1,27 +1,11 @@
-import asyncio
 from playwright import async_api
+from harness import browser, locators, waits
 
 async def run_test():
-    pw = None
-    browser = None
     context = None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
+        # Get a fresh isolated context (like an incognito window) from the shared harness browser
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
@@ -47,38 +31,38 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click on 'Acessar Sistema' button to start login process for Hospital profile.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div[3]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div[3]/div[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on 'Hospital' profile option to proceed with Hospital login.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[2]/div/div[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div[2]/div/div[2]')
+        await waits.click(elem, timeout=5000)
         
 
         # Navigate to Gestão Farmacêutica page by clicking the corresponding menu button.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[5]/a[6]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[5]/a[6]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Navigate to 'Relatórios Analytics' and 'Análises Laboratoriais' sections to verify analytic charts display correct hospital performance data.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[5]/a[5]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[5]/a[5]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Complete verification of all analytic reports and performance data on the Análises Laboratoriais page, then finish the task.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Complete final verification steps and finish the task as all required modules and analytics have been validated.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Assert dashboard loads with leitos and faturamento modules visible
@@ -102,15 +86,10 @@ async def run_test():
         assert await frame.locator("text=Troponina Elevada").is_visible()
         assert await frame.locator("text=CRÍTICO").is_visible()
         assert await frame.locator("text=Precisão > 99%").is_visible()
-        await asyncio.sleep(5)
     
     finally:
         if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
+            await browser.release_context(context)
             
-asyncio.run(run_test())
-    
\ No newline at end of file
+if __name__ == "__main__":
+    browser.run(run_test)
\ No newline at end of file
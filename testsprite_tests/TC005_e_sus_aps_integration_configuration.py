@@ -1,5 +1,4 @@
-import requests
-import time
+from harness import api_client, poll
 
 BASE_URL = "http://localhost:8080"
 TIMEOUT = 30
@@ -12,7 +11,7 @@ def authenticate():
     url = f"{BASE_URL}/api/auth/login"
     payload = {"username": AUTH_USER, "password": AUTH_PASS}
     headers = {"Content-Type": "application/json"}
-    resp = requests.post(url, json=payload, headers=headers, timeout=TIMEOUT)
+    resp = api_client.post(url, json=payload, headers=headers, timeout=TIMEOUT)
     resp.raise_for_status()
     data = resp.json()
     token = data.get("access_token")
@@ -42,7 +41,7 @@ def test_e_sus_aps_integration_configuration():
 
     for section in config_sections:
         url = f"{BASE_URL}/api/esus-aps/configuration/{section}"
-        resp = requests.get(url, headers=headers, timeout=TIMEOUT)
+        resp = api_client.get(url, headers=headers, timeout=TIMEOUT)
         assert resp.status_code == 200, f"Failed to get config section {section}"
         data = resp.json()
         assert isinstance(data, dict), f"Config section {section} should be a dict"
@@ -58,13 +57,13 @@ def test_e_sus_aps_integration_configuration():
         }
     }
     url = f"{BASE_URL}/api/esus-aps/configuration/general_settings"
-    resp = requests.put(url, headers=headers, json=update_payload, timeout=TIMEOUT)
+    resp = api_client.put(url, headers=headers, json=update_payload, timeout=TIMEOUT)
     assert resp.status_code in (200, 204), "Failed to update general_settings"
 
     # 3. Validate orchestration via MCP Server endpoint - trigger orchestration and verify response
 
     orchestration_url = f"{BASE_URL}/api/mcp-server/orchestrate/esus-aps"
-    resp = requests.post(orchestration_url, headers=headers, timeout=TIMEOUT)
+    resp = api_client.post(orchestration_url, headers=headers, timeout=TIMEOUT)
     assert resp.status_code == 202, "MCP Server orchestration trigger failed"
     orchestration_response = resp.json()
     assert orchestration_response.get("status") in ["started", "queued"], "Orchestration not started or queued"
@@ -72,31 +71,25 @@ def test_e_sus_aps_integration_configuration():
     orchestration_id = orchestration_response.get("orchestration_id")
     assert orchestration_id, "Orchestration ID missing"
 
-    # 4. Poll orchestration status until completion or timeout (max 60 seconds)
+    # 4. Wait for the orchestration to complete (max 60 seconds), backing off between status checks
 
     status_url = f"{BASE_URL}/api/mcp-server/orchestrate/status/{orchestration_id}"
-    start_time = time.time()
-    completed = False
-    while time.time() - start_time < 60:
-        resp = requests.get(status_url, headers=headers, timeout=TIMEOUT)
-        if resp.status_code != 200:
-            time.sleep(2)
-            continue
-        status_data = resp.json()
+
+    def orchestration_done(status_data):
         state = status_data.get("state")
-        if state == "completed":
-            completed = True
-            break
-        elif state == "failed":
+        if state == "failed":
             raise AssertionError("MCP Server orchestration failed")
-        time.sleep(2)
+        return state if state == "completed" else None
 
-    assert completed, "MCP Server orchestration did not complete in time"
+    try:
+        poll.http(status_url, orchestration_done, deadline=60, headers=headers, long_poll=20)
+    except poll.WaitTimeout as e:
+        raise AssertionError(f"MCP Server orchestration did not complete in time: {e}")
 
     # 5. Validate integrations with e-SUS APS LEDI API endpoint data
 
     ledi_url = f"{BASE_URL}/api/esus-aps/ledi/status"
-    resp = requests.get(ledi_url, headers=headers, timeout=TIMEOUT)
+    resp = api_client.get(ledi_url, headers=headers, timeout=TIMEOUT)
     assert resp.status_code == 200, "Failed to fetch LEDI API status"
     ledi_data = resp.json()
     assert ledi_data.get("connected") is True, "LEDI API not connected"
@@ -105,7 +98,7 @@ def test_e_sus_aps_integration_configuration():
     # 6. Validate integration with DW PEC endpoint data
 
     dwpec_url = f"{BASE_URL}/api/esus-aps/dwpec/status"
-    resp = requests.get(dwpec_url, headers=headers, timeout=TIMEOUT)
+    resp = api_client.get(dwpec_url, headers=headers, timeout=TIMEOUT)
     assert resp.status_code == 200, "Failed to fetch DW PEC API status"
     dwpec_data = resp.json()
     assert dwpec_data.get("connected") is True, "DW PEC API not connected"
@@ -114,12 +107,12 @@ def test_e_sus_aps_integration_configuration():
     # 7. Test error handling: Request non-existent configuration section
 
     invalid_url = f"{BASE_URL}/api/esus-aps/configuration/invalid_section_xyz"
-    resp = requests.get(invalid_url, headers=headers, timeout=TIMEOUT)
+    resp = api_client.get(invalid_url, headers=headers, timeout=TIMEOUT)
     assert resp.status_code == 404, "Invalid config section did not return 404"
 
     # 8. Security: Test access without token
 
-    resp = requests.get(f"{BASE_URL}/api/esus-aps/configuration/general_settings", timeout=TIMEOUT)
+    resp = api_client.get(f"{BASE_URL}/api/esus-aps/configuration/general_settings", timeout=TIMEOUT)
     assert resp.status_code == 401, "Unauthorized access did not return 401"
 
     # 9. Rate limiting: Send burst of requests to configuration endpoint, expect 429 or success but no failures
@@ -127,7 +120,7 @@ def test_e_sus_aps_integration_configuration():
     success_count = 0
     rate_limit_triggered = False
     for _ in range(20):
-        r = requests.get(f"{BASE_URL}/api/esus-aps/configuration/general_settings", headers=headers, timeout=TIMEOUT)
+        r = api_client.get(f"{BASE_URL}/api/esus-aps/configuration/general_settings", headers=headers, timeout=TIMEOUT)
         if r.status_code == 429:
             rate_limit_triggered = True
             break
@@ -143,30 +136,35 @@ def test_e_sus_aps_integration_configuration():
     # 10. Data synchronization test: Trigger synchronization and verify last_sync timestamps update
 
     sync_trigger_url = f"{BASE_URL}/api/esus-aps/synchronize"
-    resp = requests.post(sync_trigger_url, headers=headers, timeout=TIMEOUT)
+    resp = api_client.post(sync_trigger_url, headers=headers, timeout=TIMEOUT)
     assert resp.status_code == 202, "Failed to trigger e-SUS APS synchronization"
 
-    # Wait some seconds for sync to process
-    time.sleep(5)
+    # Wait until both last_sync timestamps move past the ones read in steps 5 and 6
 
-    # Confirm last_sync updated for LEDI and DW PEC
+    def synced(url, before):
+        def check(status_data):
+            return status_data if status_data.get("last_sync") != before else None
+        return poll.http(url, check, deadline=30, headers=headers)
 
-    resp_ledi = requests.get(ledi_url, headers=headers, timeout=TIMEOUT)
-    resp_dwpec = requests.get(dwpec_url, headers=headers, timeout=TIMEOUT)
-    assert resp_ledi.status_code == 200 and resp_dwpec.status_code == 200
+    try:
+        ledi_after = synced(ledi_url, ledi_data["last_sync"]).value
+        dwpec_after = synced(dwpec_url, dwpec_data["last_sync"]).value
+    except poll.WaitTimeout as e:
+        raise AssertionError(f"e-SUS APS synchronization did not update last_sync: {e}")
+
+    # Confirm last_sync updated for LEDI and DW PEC
 
-    ledi_after = resp_ledi.json()
-    dwpec_after = resp_dwpec.json()
     assert ledi_after.get("last_sync"), "LEDI last_sync missing after sync"
     assert dwpec_after.get("last_sync"), "DW PEC last_sync missing after sync"
 
     # 11. Validate audit log entry for orchestration operation
 
     audit_url = f"{BASE_URL}/api/audit-logs?operation=mcp-orchestration&orchestration_id={orchestration_id}"
-    resp = requests.get(audit_url, headers=headers, timeout=TIMEOUT)
+    resp = api_client.get(audit_url, headers=headers, timeout=TIMEOUT)
     assert resp.status_code == 200, "Failed to fetch audit logs"
     logs = resp.json()
     assert isinstance(logs, list), "Audit logs response should be a list"
     assert any(log.get("orchestration_id") == orchestration_id for log in logs), "Audit log entry for orchestration missing"
 
-test_e_sus_aps_integration_configuration()
\ No newline at end of file
+if __name__ == "__main__":
+    test_e_sus_aps_integration_configuration()
\ No newline at end of file
@@ -1,27 +1,11 @@
-import asyncio
 from playwright import async_api
+from harness import browser, locators, waits
 
 async def run_test():
-    pw = None
-    browser = None
     context = None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
+        # Get a fresh isolated context (like an incognito window) from the shared harness browser
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
@@ -47,26 +31,26 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click on 'Acessar Sistema' button to proceed to system access or integration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/header/div/div[3]/div[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/header/div/div[3]/div[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on 'Gestão Municipal' to access the DATASUS Integration technical page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div[2]/div/div').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div[2]/div/div')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on 'Integrações' button to access the DATASUS Integration technical page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Trigger calls to all 16 DATASUS API services from the integrations dashboard.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[8]/a[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[8]/a[2]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Locate and trigger calls to all 16 DATASUS API services from this page or via navigation to the appropriate section.
@@ -74,20 +58,20 @@ async def run_test():
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on 'Visão Geral Prefeitura' button (index 12) to explore if it contains controls or information to trigger the DATASUS API calls.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on 'Monitoramento APS' button (index 26) to explore if it contains controls or information to trigger the DATASUS API calls.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[3]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[3]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Assert that the page title is 'Monitoramento APS' indicating correct navigation to the monitoring page.
@@ -129,15 +113,10 @@ async def run_test():
         # Assert footer text is present.
         footer_text = await page.locator('text=© 2025 Vida Segura. Todos os direitos reservados.').count()
         assert footer_text > 0
-        await asyncio.sleep(5)
     
     finally:
         if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
+            await browser.release_context(context)
             
-asyncio.run(run_test())
-    
\ No newline at end of file
+if __name__ == "__main__":
+    browser.run(run_test)
\ No newline at end of file
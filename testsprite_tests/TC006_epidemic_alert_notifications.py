@@ -1,5 +1,5 @@
-import requests
 import time
+from harness import api_client, userpool
 
 BASE_URL = "http://localhost:8080"
 TIMEOUT = 30
@@ -16,39 +16,12 @@ def authenticate_user(username: str, password: str) -> str:
         "username": username,
         "password": password
     }
-    response = requests.post(url, json=payload, timeout=TIMEOUT)
+    response = api_client.post(url, json=payload, timeout=TIMEOUT)
     response.raise_for_status()
     token = response.json().get("access_token")
     assert token, "Authentication failed, no access token received."
     return token
 
-def create_test_user():
-    """
-    Create a demo user using Supabase edge function 'create-demo-user'.
-    Returns the user's credentials and user id.
-    """
-    url = f"{BASE_URL}/api/supabase/create-demo-user"
-    response = requests.post(url, timeout=TIMEOUT)
-    response.raise_for_status()
-    data = response.json()
-    user_id = data.get("id")
-    username = data.get("username")
-    password = data.get("password")
-    assert user_id and username and password, "User creation failed or incomplete data."
-    return user_id, username, password
-
-def delete_test_user(user_id: str, token: str):
-    """
-    Delete the created test user by user_id using admin endpoint.
-    """
-    url = f"{BASE_URL}/api/users/{user_id}"
-    headers = {
-        **HEADERS,
-        "Authorization": f"Bearer {token}"
-    }
-    response = requests.delete(url, headers=headers, timeout=TIMEOUT)
-    assert response.status_code in (200, 204), f"Failed to delete test user: {response.text}"
-
 def get_user_profile_alerts(token: str):
     """
     Fetch epidemic alerts, risk maps, and neighborhood indicators for authenticated user.
@@ -58,24 +31,24 @@ def get_user_profile_alerts(token: str):
         **HEADERS,
         "Authorization": f"Bearer {token}"
     }
-    response = requests.get(url, headers=headers, timeout=TIMEOUT)
+    response = api_client.get(url, headers=headers, timeout=TIMEOUT)
     return response
 
 def test_epidemic_alert_notifications():
     """
     Test the epidemic alert system:
-    - Authenticate user (create demo user if needed)
+    - Authenticate user (leased from the demo-user pool)
     - Validate automatic notifications are sent
     - Validate risk maps and indicators by neighborhood per user profile
     - Authentication using Supabase edge function
     - Test error handling for invalid token
     - Check response performance (response time < 2 seconds)
     """
-    user_id = None
-    token = None
-    try:
-        # Create demo user and get credentials
-        user_id, username, password = create_test_user()
+    # Lease a pre-provisioned demo user and get its credentials
+    with userpool.lease("gestor") as user:
+        username = user.get("username")
+        password = user.get("password")
+        assert user.get("id") and username and password, "User creation failed or incomplete data."
 
         # Authenticate to get JWT token
         token = authenticate_user(username, password)
@@ -113,15 +86,8 @@ def test_epidemic_alert_notifications():
             **HEADERS,
             "Authorization": "Bearer invalid.token.here"
         }
-        invalid_resp = requests.get(f"{BASE_URL}/api/epidemic/alerts", headers=invalid_headers, timeout=TIMEOUT)
+        invalid_resp = api_client.get(f"{BASE_URL}/api/epidemic/alerts", headers=invalid_headers, timeout=TIMEOUT)
         assert invalid_resp.status_code == 401, f"Expected 401 for invalid token, got {invalid_resp.status_code}"
 
-    finally:
-        # Cleanup: Delete test user if created and token available
-        if user_id and token:
-            try:
-                delete_test_user(user_id, token)
-            except Exception as e:
-                print(f"Warning: failed to delete test user: {e}")
-
-test_epidemic_alert_notifications()
\ No newline at end of file
+if __name__ == "__main__":
+    test_epidemic_alert_notifications()
\ No newline at end of file
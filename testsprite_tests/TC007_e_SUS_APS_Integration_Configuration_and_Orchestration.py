@@ -1,27 +1,11 @@
-import asyncio
 from playwright import async_api
+from harness import browser, locators, waits
 
 async def run_test():
-    pw = None
-    browser = None
     context = None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
+        # Get a fresh isolated context (like an incognito window) from the shared harness browser
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
@@ -47,26 +31,26 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click on 'Acessar Sistema' or 'Entrar no Sistema Angra Saúde' to access the system and find the e-SUS APS Integration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div/section/div[5]/div[5]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/div/section/div[5]/div[5]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Integrações' button to access integration options including e-SUS APS.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Monitoramento APS' button (index 26) to access the e-SUS APS Integration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[3]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[3]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Configurações' button (index 53) in the sidebar to access the e-SUS APS Integration configuration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[8]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[8]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Locate and click on the e-SUS APS Integration configuration section from the sidebar or main configuration options to start completing the 8 configuration sections.
@@ -74,14 +58,14 @@ async def run_test():
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[3]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[3]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Configurações' button (index 53) in the sidebar to access the e-SUS APS Integration configuration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[8]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[8]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Locate and click on the e-SUS APS Integration configuration section or related submenu to start completing the 8 configuration sections.
@@ -89,14 +73,14 @@ async def run_test():
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Configurações' button (index 53) to access the e-SUS APS Integration configuration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[8]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[8]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Locate and click on the e-SUS APS Integration configuration section or submenu to start completing the 8 configuration sections.
@@ -104,14 +88,14 @@ async def run_test():
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Configurações' button (index 53) to access the e-SUS APS Integration configuration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[8]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[8]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Locate the e-SUS APS Integration configuration section or submenu to start completing the 8 configuration sections. If not visible, search or navigate to it.
@@ -119,14 +103,14 @@ async def run_test():
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Configurações' button (index 53) to access the e-SUS APS Integration configuration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[8]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[8]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Search or navigate to the e-SUS APS Integration configuration section or submenu to start completing the 8 configuration sections.
@@ -134,26 +118,21 @@ async def run_test():
         
 
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on the 'Configurações' button (index 53) to access the e-SUS APS Integration configuration page.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[8]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[8]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         assert False, 'Test plan execution failed: generic failure assertion as expected result is unknown.'
-        await asyncio.sleep(5)
     
     finally:
         if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
+            await browser.release_context(context)
             
-asyncio.run(run_test())
-    
\ No newline at end of file
+if __name__ == "__main__":
+    browser.run(run_test)
\ No newline at end of file
@@ -1,5 +1,6 @@
 import requests
 import time
+from harness import api_client
 
 BASE_URL = "http://localhost:8080"
 TIMEOUT = 30
@@ -37,7 +38,7 @@ USER_PROFILES = [
 ]
 
 def test_navigation_sidebar_responsiveness():
-    session = requests.Session()
+    session = api_client.Client(keep_cookies=True)
     session.headers.update({"Content-Type": "application/json"})
 
     try:
@@ -116,4 +117,5 @@ def test_navigation_sidebar_responsiveness():
         assert False, f"Request failed: {str(e)}"
 
 
-test_navigation_sidebar_responsiveness()
+if __name__ == "__main__":
+    test_navigation_sidebar_responsiveness()
@@ -1,6 +1,6 @@
-import requests
 import uuid
 import time
+from harness import api_client, cleanup
 
 BASE_URL = "http://localhost:8080"
 TIMEOUT = 30  # seconds
@@ -17,7 +17,7 @@ def create_telemedicine_session(auth_token, payload):
         "Authorization": auth_token,
         "Content-Type": "application/json"
     }
-    response = requests.post(url, json=payload, headers=headers, timeout=TIMEOUT)
+    response = api_client.post(url, json=payload, headers=headers, timeout=TIMEOUT)
     return response
 
 def get_telemedicine_session(auth_token, session_id):
@@ -25,7 +25,7 @@ def get_telemedicine_session(auth_token, session_id):
     headers = {
         "Authorization": auth_token
     }
-    response = requests.get(url, headers=headers, timeout=TIMEOUT)
+    response = api_client.get(url, headers=headers, timeout=TIMEOUT)
     return response
 
 def update_telemedicine_session(auth_token, session_id, payload):
@@ -34,15 +34,7 @@ def update_telemedicine_session(auth_token, session_id, payload):
         "Authorization": auth_token,
         "Content-Type": "application/json"
     }
-    response = requests.put(url, json=payload, headers=headers, timeout=TIMEOUT)
-    return response
-
-def delete_telemedicine_session(auth_token, session_id):
-    url = f"{BASE_URL}/api/telemedicine/sessions/{session_id}"
-    headers = {
-        "Authorization": auth_token
-    }
-    response = requests.delete(url, headers=headers, timeout=TIMEOUT)
+    response = api_client.put(url, json=payload, headers=headers, timeout=TIMEOUT)
     return response
 
 def test_telemedicine_session_management():
@@ -64,64 +56,61 @@ def test_telemedicine_session_management():
     session_data = create_resp.json()
     session_id = session_data.get("id")
     assert session_id, "Response missing session id"
-
-    try:
-        # Retrieve session to validate it was saved correctly
-        get_resp = get_telemedicine_session(auth_token, session_id)
-        assert get_resp.status_code == 200, f"Failed to get session: {get_resp.status_code} {get_resp.text}"
-        get_data = get_resp.json()
-        assert get_data["id"] == session_id
-        assert get_data["patientId"] == session_payload["patientId"]
-        assert get_data["doctorId"] == session_payload["doctorId"]
-        assert get_data["durationMinutes"] == session_payload["durationMinutes"]
-        assert get_data["reason"] == session_payload["reason"]
-
-        # Update the session: simulate changing duration and reason
-        update_payload = {
-            "durationMinutes": 45,
-            "reason": "Extended consultation for medication review"
-        }
-        update_resp = update_telemedicine_session(auth_token, session_id, update_payload)
-        assert update_resp.status_code == 200, f"Failed to update session: {update_resp.status_code} {update_resp.text}"
-        updated_data = update_resp.json()
-        assert updated_data["durationMinutes"] == update_payload["durationMinutes"]
-        assert updated_data["reason"] == update_payload["reason"]
-
-        # Test modal display representation endpoint (simulate)
-        # Assume there's an endpoint to fetch modal data for teleconsultation
-        modal_url = f"{BASE_URL}/api/telemedicine/sessions/{session_id}/modal"
-        modal_resp = requests.get(modal_url, headers={"Authorization": auth_token}, timeout=TIMEOUT)
-
-        assert modal_resp.status_code == 200, f"Failed to get telemedicine modal data: {modal_resp.status_code} {modal_resp.text}"
-        modal_data = modal_resp.json()
-
-        # Validate modal required keys exist and types
-        required_keys = ["sessionId", "patientInfo", "doctorInfo", "scheduledTime", "status", "videoCallUrl"]
-        for key in required_keys:
-            assert key in modal_data, f"Modal response missing key: {key}"
-
-        assert modal_data["sessionId"] == session_id
-        assert isinstance(modal_data["patientInfo"], dict)
-        assert isinstance(modal_data["doctorInfo"], dict)
-        assert isinstance(modal_data["scheduledTime"], int)
-        assert modal_data["status"] in ["scheduled", "ongoing", "completed", "cancelled"]
-        assert isinstance(modal_data["videoCallUrl"], str) and modal_data["videoCallUrl"].startswith("https://")
-
-        # Negative test: Attempt to get a non-existent session (error handling)
-        fake_session_id = str(uuid.uuid4())
-        not_found_resp = get_telemedicine_session(auth_token, fake_session_id)
-        assert not_found_resp.status_code == 404, f"Expected 404 for non-existent session but got {not_found_resp.status_code}"
-
-        # Rate limiting test: Send rapid multiple requests and expect 429 or normal response
-        rapid_responses = []
-        for _ in range(5):
-            r = get_telemedicine_session(auth_token, session_id)
-            rapid_responses.append(r.status_code)
-        assert all(code in (200, 429) for code in rapid_responses), "Unexpected status code during rate limiting test"
-
-    finally:
-        # Clean up: delete the created session
-        del_resp = delete_telemedicine_session(auth_token, session_id)
-        assert del_resp.status_code in (200, 204), f"Failed to delete session: {del_resp.status_code} {del_resp.text}"
-
-test_telemedicine_session_management()
\ No newline at end of file
+    # Deleted after the test by the cleanup registry
+    cleanup.register(f"{BASE_URL}/api/telemedicine/sessions/{session_id}", headers={"Authorization": auth_token}, label="telemedicine session")
+
+    # Retrieve session to validate it was saved correctly
+    get_resp = get_telemedicine_session(auth_token, session_id)
+    assert get_resp.status_code == 200, f"Failed to get session: {get_resp.status_code} {get_resp.text}"
+    get_data = get_resp.json()
+    assert get_data["id"] == session_id
+    assert get_data["patientId"] == session_payload["patientId"]
+    assert get_data["doctorId"] == session_payload["doctorId"]
+    assert get_data["durationMinutes"] == session_payload["durationMinutes"]
+    assert get_data["reason"] == session_payload["reason"]
+
+    # Update the session: simulate changing duration and reason
+    update_payload = {
+        "durationMinutes": 45,
+        "reason": "Extended consultation for medication review"
+    }
+    update_resp = update_telemedicine_session(auth_token, session_id, update_payload)
+    assert update_resp.status_code == 200, f"Failed to update session: {update_resp.status_code} {update_resp.text}"
+    updated_data = update_resp.json()
+    assert updated_data["durationMinutes"] == update_payload["durationMinutes"]
+    assert updated_data["reason"] == update_payload["reason"]
+
+    # Test modal display representation endpoint (simulate)
+    # Assume there's an endpoint to fetch modal data for teleconsultation
+    modal_url = f"{BASE_URL}/api/telemedicine/sessions/{session_id}/modal"
+    modal_resp = api_client.get(modal_url, headers={"Authorization": auth_token}, timeout=TIMEOUT)
+
+    assert modal_resp.status_code == 200, f"Failed to get telemedicine modal data: {modal_resp.status_code} {modal_resp.text}"
+    modal_data = modal_resp.json()
+
+    # Validate modal required keys exist and types
+    required_keys = ["sessionId", "patientInfo", "doctorInfo", "scheduledTime", "status", "videoCallUrl"]
+    for key in required_keys:
+        assert key in modal_data, f"Modal response missing key: {key}"
+
+    assert modal_data["sessionId"] == session_id
+    assert isinstance(modal_data["patientInfo"], dict)
+    assert isinstance(modal_data["doctorInfo"], dict)
+    assert isinstance(modal_data["scheduledTime"], int)
+    assert modal_data["status"] in ["scheduled", "ongoing", "completed", "cancelled"]
+    assert isinstance(modal_data["videoCallUrl"], str) and modal_data["videoCallUrl"].startswith("https://")
+
+    # Negative test: Attempt to get a non-existent session (error handling)
+    fake_session_id = str(uuid.uuid4())
+    not_found_resp = get_telemedicine_session(auth_token, fake_session_id)
+    assert not_found_resp.status_code == 404, f"Expected 404 for non-existent session but got {not_found_resp.status_code}"
+
+    # Rate limiting test: Send rapid multiple requests and expect 429 or normal response
+    rapid_responses = []
+    for _ in range(5):
+        r = get_telemedicine_session(auth_token, session_id)
+        rapid_responses.append(r.status_code)
+    assert all(code in (200, 429) for code in rapid_responses), "Unexpected status code during rate limiting test"
+
+if __name__ == "__main__":
+    test_telemedicine_session_management()
\ No newline at end of file
@@ -1,27 +1,11 @@
-import asyncio
 from playwright import async_api
+from harness import browser, locators, waits
 
 async def run_test():
-    pw = None
-    browser = None
     context = None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
+        # Get a fresh isolated context (like an incognito window) from the shared harness browser
         context = await browser.new_context()
         context.set_default_timeout(5000)
         
@@ -47,38 +31,38 @@ async def run_test():
         # Interact with the page elements to simulate user flow
         # Click on 'Entrar no Sistema Angra Saúde' button to proceed to login or system access.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div/section/div[5]/div[5]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/div/section/div[5]/div[5]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Navigate to 'Mapa Epidemiológico' to verify risk maps with correct color-coded risk levels.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[2]/a[4]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[2]/a[4]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Navigate to 'Alertas Epidemiológicos' to verify user-specific alerts panel shows relevant notifications.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[2]/a[5]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[2]/a[5]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Trigger a simulated epidemiological event using the 'Simulador IED' button to test automatic alert notification generation.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[3]/a[3]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[3]/a[3]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Adjust simulation parameters if needed and click 'Calcular IED' to trigger the simulated epidemiological event and generate alert notifications.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div[3]/div/div/div[3]/div[2]/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/div[3]/div/div/div[3]/div[2]/div/div/div[2]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Verify that an automatic alert notification is received and displayed promptly in the alerts panel or notification area, personalized for the user profile.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div[3]/div/div/div[4]/div/button[2]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/div[3]/div/div/div[4]/div/button[2]')
+        await waits.click(elem, timeout=5000)
         
 
         # Assert that the risk maps load with correct color-coded risk levels by checking the presence of risk level indicator on the page
@@ -91,15 +75,10 @@ async def run_test():
         # Assert that an automatic alert notification is received and displayed promptly after triggering the simulated epidemiological event
         notification = await frame.locator('xpath=//div[contains(@class, "notification-area")]//div[contains(text(), "alerta")]').inner_text()
         assert 'alerta' in notification.lower(), 'Automatic alert notification not received or displayed promptly'
-        await asyncio.sleep(5)
     
     finally:
         if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
+            await browser.release_context(context)
             
-asyncio.run(run_test())
-    
\ No newline at end of file
+if __name__ == "__main__":
+    browser.run(run_test)
\ No newline at end of file
@@ -1,35 +1,21 @@
-import asyncio
 from playwright import async_api
+from harness import auth_state, browser, budget, locators, waits
 
 async def run_test():
-    pw = None
-    browser = None
     context = None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
+        # Get a fresh isolated context already logged in as Médico (cached storage state)
+        context = await auth_state.new_context("medico")
         context.set_default_timeout(5000)
         
         # Open a new page in the browser context
         page = await context.new_page()
         
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        # Navigate straight to the Médico dashboard and wait until the network request is committed
+        await page.goto(auth_state.dashboard_url("medico"), wait_until="commit", timeout=10000)
+        # Any step that finds the page outside the app (landing or /login) fails at once
+        budget.expect_route(page, auth_state.APP_ROUTE)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,16 +31,12 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on 'Acesso Médico' button to login as Médico profile.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div/section[5]/div/div/div[2]/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+        # The Médico login step is covered by the cached storage state
 
         # Click on 'Telemedicina' button (index 21) to open the telemedicine modal.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div/a[5]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div/a[5]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Go back to the previous tab with the medical dashboard and telemedicine modal to continue testing.
@@ -63,80 +45,75 @@ async def run_test():
 
         # Click on the 'Telemedicina' button (index 21) to open the telemedicine modal and proceed with scheduling a new consultation.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div/a[5]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div/a[5]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch back to the medical dashboard tab (index 1) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a/img').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a/img')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost tab with the medical dashboard (index 0 or 1) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost medical dashboard tab (index 0) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost medical dashboard tab (index 0) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost medical dashboard tab (index 0) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost medical dashboard tab (index 0) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost medical dashboard tab (index 0) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost medical dashboard tab (index 0) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost medical dashboard tab (index 0) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         # Switch to the localhost medical dashboard tab (index 0) to continue testing telemedicine modal scheduling and consultation features.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/header/nav/div/a').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/header/nav/div/a')
+        await waits.click(elem, timeout=5000)
         
 
         assert False, 'Test plan execution failed: generic failure assertion.'
-        await asyncio.sleep(5)
     
     finally:
         if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
+            await browser.release_context(context)
             
-asyncio.run(run_test())
-    
\ No newline at end of file
+if __name__ == "__main__":
+    browser.run(run_test)
\ No newline at end of file
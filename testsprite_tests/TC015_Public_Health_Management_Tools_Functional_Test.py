@@ -1,35 +1,21 @@
-import asyncio
 from playwright import async_api
+from harness import auth_state, browser, budget, locators, waits
 
 async def run_test():
-    pw = None
-    browser = None
     context = None
     
     try:
-        # Start a Playwright session in asynchronous mode
-        pw = await async_api.async_playwright().start()
-        
-        # Launch a Chromium browser in headless mode with custom arguments
-        browser = await pw.chromium.launch(
-            headless=True,
-            args=[
-                "--window-size=1280,720",         # Set the browser window size
-                "--disable-dev-shm-usage",        # Avoid using /dev/shm which can cause issues in containers
-                "--ipc=host",                     # Use host-level IPC for better stability
-                "--single-process"                # Run the browser in a single process mode
-            ],
-        )
-        
-        # Create a new browser context (like an incognito window)
-        context = await browser.new_context()
+        # Get a fresh isolated context already logged in as Gestor (cached storage state)
+        context = await auth_state.new_context("gestor")
         context.set_default_timeout(5000)
         
         # Open a new page in the browser context
         page = await context.new_page()
         
-        # Navigate to your target URL and wait until the network request is committed
-        await page.goto("http://localhost:8080", wait_until="commit", timeout=10000)
+        # Navigate straight to the Gestor dashboard and wait until the network request is committed
+        await page.goto(auth_state.dashboard_url("gestor"), wait_until="commit", timeout=10000)
+        # Any step that finds the page outside the app (landing or /login) fails at once
+        budget.expect_route(page, auth_state.APP_ROUTE)
         
         # Wait for the main page to reach DOMContentLoaded state (optional for stability)
         try:
@@ -45,46 +31,37 @@ async def run_test():
                 pass
         
         # Interact with the page elements to simulate user flow
-        # Click on 'Acesso Gestor' button to start login as Gestor profile.
-        frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div/section[5]/div/div/div/div[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
-        
+        # The Gestor login step is covered by the cached storage state
 
         # Click on 'Programa Gestores SUS' button to access Capacitação Gestores.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[4]/a/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[4]/a/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on 'Acessar Trilha' button for 'Indicadores de Desempenho APS' to verify loading and user interaction.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div[3]/div/div/div[3]/div[2]/div/div[3]/div/div[4]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/div[3]/div/div/div[3]/div[2]/div/div[3]/div/div[4]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on 'Transição de Gestão' button in the left menu to navigate to the Transição de Gestão section and verify data loading and configuration.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/aside/nav/div[4]/a[2]/button').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/aside/nav/div[4]/a[2]/button')
+        await waits.click(elem, timeout=5000)
         
 
         # Click on 'Inscrever-se' button for the Webinar: Transição de Gestão SUS event to verify user registration functionality.
         frame = context.pages[-1]
-        elem = frame.locator('xpath=html/body/div/div/div[3]/div[3]/div/div/div[4]/div[2]/div[2]/div/div/div[3]').nth(0)
-        await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+        elem = await locators.locate(frame, 'html/body/div/div/div[3]/div[3]/div/div/div[4]/div[2]/div[2]/div/div/div[3]')
+        await waits.click(elem, timeout=5000)
         
 
         assert False, 'Test plan execution failed: generic failure assertion.'
-        await asyncio.sleep(5)
     
     finally:
         if context:
-            await context.close()
-        if browser:
-            await browser.close()
-        if pw:
-            await pw.stop()
+            await browser.release_context(context)
             
-asyncio.run(run_test())
-    
\ No newline at end of file
+if __name__ == "__main__":
+    browser.run(run_test)
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""Shared infrastructure for the TestSprite TC scripts.
+
+The generated scripts in ``testsprite_tests`` stay runnable on their own; the
+modules in this package hold everything they have in common (browser
+lifecycle, configuration) so it is handled in one place.
+"""
@@ -0,0 +1,188 @@
+"""Pooled keep-alive HTTP client for the requests-based API scripts.
+
+The module-level ``get``/``post``/``put``/``patch``/``delete`` functions are
+drop-in replacements for the ``requests`` ones, but go through one shared
+``Client`` so connections to the app are reused instead of opened per call.
+
+``Client`` is a ``requests.Session`` with:
+
+* a connection pool sized for parallel fan-out (``POOL_SIZE``);
+* default JSON headers plus optional bearer-token injection
+  (``set_token``; pass ``headers={"Authorization": None}`` to send one
+  request unauthenticated);
+* paths starting with ``/`` resolved against ``config.BASE_URL``;
+* no cookie jar by default: like the bare ``requests.*`` calls the helpers
+  replace, a request never carries cookies from an earlier one (e.g. a
+  no-token check sent after another script's login). Pass
+  ``keep_cookies=True`` for ``requests.Session`` behaviour;
+* a ``Timing`` on every response (``response.timing``) that separates TCP/TLS
+  connect time from server time, so latency assertions are not skewed by
+  connection setup. Timings are also kept in ``client.timings`` and passed to
+  every callable in ``client.timing_listeners`` (by default
+  ``metrics.record_http``).
+"""
+
+import dataclasses
+import http.cookiejar
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from harness import config, metrics
+
+POOL_SIZE = 32
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+}
+
+# Connect time of the request being sent on this thread
+_local = threading.local()
+
+
+@dataclasses.dataclass
+class Timing:
+    method: str
+    url: str
+    status: int
+    connect: float  # seconds spent opening the connection, 0 when reused
+    server: float  # from connection ready to response headers
+    total: float
+    error: str = None
+
+    @property
+    def reused(self):
+        return self.connect == 0
+
+    @property
+    def server_ms(self):
+        return self.server * 1000
+
+
+class _TimedConnectMixin:
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _local.connect_time = getattr(_local, "connect_time", 0.0) + time.perf_counter() - started
+
+
+class _TimedHTTPConnection(_TimedConnectMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class TimedAdapter(HTTPAdapter):
+    """``HTTPAdapter`` that records a ``Timing`` for every request it sends."""
+
+    def __init__(self, on_timing, **kwargs):
+        self.on_timing = on_timing
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _local.connect_time = 0.0
+        started = time.perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        except requests.RequestException as exc:
+            total = time.perf_counter() - started
+            connect = _local.connect_time
+            self.on_timing(Timing(request.method, request.url, 0, connect, total - connect, total, type(exc).__name__))
+            raise
+        total = time.perf_counter() - started
+        connect = _local.connect_time
+        response.timing = Timing(request.method, request.url, response.status_code, connect, total - connect, total)
+        self.on_timing(response.timing)
+        return response
+
+
+class Client(requests.Session):
+    """Keep-alive session with pooling, default headers, token injection and timings."""
+
+    def __init__(self, base_url=None, pool_size=POOL_SIZE, headers=None, keep_cookies=False):
+        super().__init__()
+        if not keep_cookies:
+            # Accept cookies from no domain, so the shared client stays stateless across scripts and threads
+            self.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        self.base_url = (base_url or config.BASE_URL).rstrip("/")
+        self.headers.update(DEFAULT_HEADERS)
+        if headers:
+            self.headers.update(headers)
+        self.timings = []
+        self.timing_listeners = [metrics.record_http]
+        adapter = TimedAdapter(self._record, pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("http://", adapter)
+        self.mount("https://", adapter)
+
+    def _record(self, timing):
+        self.timings.append(timing)
+        for listener in self.timing_listeners:
+            listener(timing)
+
+    def set_token(self, token):
+        """Send ``Authorization: Bearer <token>`` on every later request."""
+        self.headers["Authorization"] = f"Bearer {token}"
+
+    def clear_token(self):
+        self.headers.pop("Authorization", None)
+
+    def request(self, method, url, *args, **kwargs):
+        if url.startswith("/"):
+            url = self.base_url + url
+        return super().request(method, url, *args, **kwargs)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared():
+    """Return the process-wide ``Client``, creating it on first use."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = Client()
+        return _shared
+
+
+def get(url, **kwargs):
+    return shared().get(url, **kwargs)
+
+
+def post(url, data=None, json=None, **kwargs):
+    return shared().post(url, data=data, json=json, **kwargs)
+
+
+def put(url, data=None, **kwargs):
+    return shared().put(url, data=data, **kwargs)
+
+
+def patch(url, data=None, **kwargs):
+    return shared().patch(url, data=data, **kwargs)
+
+
+def delete(url, **kwargs):
+    return shared().delete(url, **kwargs)
@@ -0,0 +1,195 @@
+"""Per-profile cache of authenticated Playwright storage state.
+
+Most browser scripts start by clicking a profile button on the landing page
+just to get a session. ``new_context(profile)`` instead returns a context that
+is already logged in: the first caller performs the landing-page login once,
+saves ``context.storage_state()`` under ``tmp/cache/auth_state`` and every
+later context is created from that file::
+
+    context = await auth_state.new_context("gestor")
+    page = await context.new_page()
+    await page.goto(auth_state.dashboard_url("gestor"))
+    budget.expect_route(page, auth_state.APP_ROUTE)   # fail fast if it leaves the app
+
+A cached state expires at the earliest of ``TESTSPRITE_AUTH_TTL`` (default
+12 h), the expiry of the app's first-party cookies (e.g. the 24 h TOTP cookie)
+and the ``expires_at`` of the Supabase session in localStorage; it is then
+refreshed transparently. Warm or refresh the cache ahead of a run with::
+
+    python -m harness.auth_state [--refresh] [gestor hospital medico paciente]
+"""
+
+import argparse
+import asyncio
+import fcntl
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+import urllib.parse
+
+from harness import browser, budget, config, metrics, waits
+
+CACHE_DIR = os.path.join(config.CACHE_DIR, "auth_state")
+CACHE_TTL = float(os.environ.get("TESTSPRITE_AUTH_TTL", 12 * 3600))
+# Refresh this long before the session actually expires
+REFRESH_MARGIN = 60
+LOGIN_TIMEOUT_MS = 15000
+# Paths inside the authenticated MainLayout: neither the public landing nor /login
+APP_ROUTE = r"^/(?!$|login\b|public-health-landing\b)"
+
+# Landing page button per profile; the first label is the current landing
+# (PublicHealthLanding), the second the one the generated scripts were recorded on
+PROFILES = {
+    "gestor": re.compile(r"Entrar como gestor|Acesso Gestor", re.I),
+    "hospital": re.compile(r"Entrar como hospital|Acesso Hospital", re.I),
+    "medico": re.compile(r"Entrar como profissional|Acesso M[ée]dico", re.I),
+    "paciente": re.compile(r"Entrar como paciente|Acesso Paciente", re.I),
+}
+
+
+def profile_key(profile):
+    """Normalise "Médico", "medico" or "MEDICO" to a ``PROFILES`` key."""
+    key = unicodedata.normalize("NFKD", profile).encode("ascii", "ignore").decode().lower()
+    if key not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}, expected one of {', '.join(PROFILES)}")
+    return key
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def _session_expiry(state):
+    host = urllib.parse.urlparse(config.BASE_URL).hostname
+    expiries = []
+    for cookie in state.get("cookies", []):
+        # Session cookies (expires == -1) last as long as the cached state
+        if cookie.get("expires", -1) > 0 and cookie.get("domain", "").lstrip(".") == host:
+            expiries.append(cookie["expires"])
+    for origin in state.get("origins", []):
+        for item in origin.get("localStorage", []):
+            if item["name"].startswith("sb-") and item["name"].endswith("-auth-token"):
+                try:
+                    expires_at = json.loads(item["value"]).get("expires_at")
+                except (ValueError, AttributeError):
+                    continue
+                if expires_at:
+                    expiries.append(float(expires_at))
+    return min(expiries, default=None)
+
+
+def load(profile):
+    """Return the cached entry for ``profile`` if it is still valid, else None."""
+    try:
+        with open(_cache_path(profile_key(profile)), encoding="utf-8") as cached:
+            entry = json.load(cached)
+    except (OSError, ValueError):
+        return None
+    if entry.get("base_url") != config.BASE_URL:
+        return None
+    if entry.get("expires_at", 0) - REFRESH_MARGIN <= time.time():
+        return None
+    return entry
+
+
+async def _login(key):
+    context = await browser.new_context()
+    try:
+        page = await context.new_page()
+        await page.goto(config.BASE_URL, wait_until="domcontentloaded", timeout=LOGIN_TIMEOUT_MS)
+        await waits.click(page.get_by_role("button", name=PROFILES[key]).first, timeout=LOGIN_TIMEOUT_MS)
+        landing = page.url
+        await page.wait_for_url(lambda url: url != landing, timeout=LOGIN_TIMEOUT_MS)
+        await waits.settle(page)
+        state = await context.storage_state()
+        dashboard = page.url
+    finally:
+        await browser.release_context(context)
+
+    now = time.time()
+    expiry = _session_expiry(state)
+    return {
+        "profile": key,
+        "base_url": config.BASE_URL,
+        "dashboard_url": dashboard,
+        "created_at": now,
+        "expires_at": min(now + CACHE_TTL, expiry) if expiry else now + CACHE_TTL,
+        "state": state,
+    }
+
+
+async def ensure(profile, refresh=False):
+    """Return a valid cache entry for ``profile``, logging in when needed.
+
+    A file lock per profile makes parallel workers wait for one login instead
+    of all performing it.
+    """
+    key = profile_key(profile)
+    if not refresh:
+        entry = load(key)
+        if entry is not None:
+            return entry
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_cache_path(key) + ".lock", "w") as lock:
+        await asyncio.to_thread(fcntl.flock, lock, fcntl.LOCK_EX)
+        try:
+            entry = None if refresh else load(key)
+            if entry is None:
+                entry = await _login(key)
+                tmp_path = _cache_path(key) + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as out:
+                    json.dump(entry, out)
+                os.replace(tmp_path, _cache_path(key))
+            return entry
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+async def new_context(profile, **options):
+    """Return a new context from ``harness.browser`` already logged in as ``profile``."""
+    entry = await ensure(profile)
+    metrics.set_profile(entry["profile"])
+    context = await browser.new_context(storage_state=entry["state"], **options)
+    budget.authenticated(context)
+    return context
+
+
+def dashboard_url(profile):
+    """URL the profile's login landed on. Call after ``new_context``/``ensure``."""
+    entry = load(profile)
+    if entry is None:
+        raise RuntimeError(f"No cached session for {profile!r}; call auth_state.new_context() first")
+    return entry["dashboard_url"]
+
+
+def invalidate(profile=None):
+    """Drop the cached state for ``profile`` (default: every profile)."""
+    for key in [profile_key(profile)] if profile else PROFILES:
+        try:
+            os.remove(_cache_path(key))
+        except FileNotFoundError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Log in once per profile and cache the storage state")
+    parser.add_argument("profiles", nargs="*", default=list(PROFILES), help="profiles to warm (default: all)")
+    parser.add_argument("--refresh", action="store_true", help="log in again even if the cache is valid")
+    args = parser.parse_args(argv)
+
+    async def warm():
+        for profile in args.profiles:
+            entry = await ensure(profile, refresh=args.refresh)
+            remaining = (entry["expires_at"] - time.time()) / 3600
+            print(f"{entry['profile']:<9} {entry['dashboard_url']}  (valid for {remaining:.1f} h)")
+
+    browser.run(warm)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+"""Shared Chromium for the Playwright TC scripts.
+
+Launching Chromium is the most expensive step of every browser test, so the
+scripts no longer own their browser. They ask this module for a fresh,
+isolated ``BrowserContext`` and hand it back when they are done::
+
+    context = await browser.new_context()
+    try:
+        ...
+    finally:
+        await browser.release_context(context)
+
+Two modes are supported:
+
+* In-process (default): the first ``new_context()`` launches one Chromium and
+  every later call on the same event loop reuses it.
+* Server: ``BrowserPool`` starts one or more long-lived Chromium processes that
+  expose the DevTools protocol. When ``TESTSPRITE_BROWSER_ENDPOINTS`` is set the
+  scripts connect to one of them instead of launching, which only costs a CDP
+  handshake. Start a pool by hand with::
+
+      python -m harness.browser --size 2 --port 9222
+
+Crashed browsers are detected and replaced: the client reconnects (or
+relaunches) on the next ``new_context()``, and the pool restarts dead servers
+in ``ensure_running()``.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+from playwright import async_api
+
+from harness import budget, config, har, metrics, trace, vitals, waits
+
+# Same flags the scripts used to pass, minus --single-process: a shared browser
+# hosts many contexts and single-process mode takes all of them down on a crash.
+LAUNCH_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+]
+
+CONNECT_TIMEOUT_MS = 10000
+CONTEXT_CLOSE_TIMEOUT = 5
+SERVER_START_TIMEOUT = 15
+
+
+class _Session:
+    """Playwright driver and browser connection bound to one event loop."""
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.pw = None
+        self.browser = None
+        self.contexts = set()
+
+
+_session = None
+
+
+async def _connect(pw):
+    endpoints = config.browser_endpoints()
+    if not endpoints:
+        return await pw.chromium.launch(headless=True, args=LAUNCH_ARGS)
+
+    # Spread worker processes over the pool and fall through to the next
+    # server when one is down (the pool owner restarts it)
+    start = os.getpid() % len(endpoints)
+    last_error = None
+    for offset in range(len(endpoints)):
+        endpoint = endpoints[(start + offset) % len(endpoints)]
+        try:
+            return await pw.chromium.connect_over_cdp(endpoint, timeout=CONNECT_TIMEOUT_MS)
+        except async_api.Error as exc:
+            last_error = exc
+    raise RuntimeError(f"No browser server reachable at {', '.join(endpoints)}") from last_error
+
+
+async def _get_browser():
+    global _session
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.loop is not loop:
+        # Playwright objects cannot cross event loops, so each loop gets its own session
+        _session = _Session(loop)
+        _session.pw = await async_api.async_playwright().start()
+    if _session.browser is None or not _session.browser.is_connected():
+        # First use, or the browser crashed / the server went away
+        _session.browser = await _connect(_session.pw)
+    return _session.browser
+
+
+async def new_context(**options):
+    """Return a new isolated context on the shared browser."""
+    browser = await _get_browser()
+    options = har.context_options(options)
+    try:
+        context = await browser.new_context(**options)
+    except async_api.Error:
+        if browser.is_connected():
+            raise
+        # The browser died between the health check and the call; retry once
+        browser = await _get_browser()
+        context = await browser.new_context(**options)
+    _session.contexts.add(context)
+    # Track requests from each page's first navigation for waits.settle() and the metrics records
+    waits.track(context)
+    metrics.track(context)
+    await vitals.track(context)
+    await har.attach(context, options)
+    await trace.attach(context)
+    return context
+
+
+async def release_context(context):
+    """Close a context from ``new_context()``, tolerating crashed or hung contexts."""
+    if _session is not None:
+        _session.contexts.discard(context)
+    budget.release(context)
+    await vitals.flush(context)
+    await trace.detach(context)
+    try:
+        await asyncio.wait_for(context.close(), CONTEXT_CLOSE_TIMEOUT)
+    except (async_api.Error, asyncio.TimeoutError):
+        # Nothing left to clean up in a context whose browser is gone
+        pass
+    har.finish(context)
+
+
+async def shutdown():
+    """Close every open context and disconnect from (or close) the browser."""
+    global _session
+    session, _session = _session, None
+    if session is None:
+        return
+    for context in list(session.contexts):
+        await release_context(context)
+    if session.browser is not None:
+        # For CDP connections this only disconnects; the server keeps running
+        try:
+            await session.browser.close()
+        except async_api.Error:
+            pass
+    await session.pw.stop()
+
+
+def run(test):
+    """Run a script's ``run_test`` coroutine function and tear the browser down afterwards."""
+
+    async def main():
+        error = None
+        try:
+            try:
+                await asyncio.wait_for(test(), budget.start())
+            except asyncio.TimeoutError:
+                raise budget.exceeded() from None
+            # Only reached when the test passed, so a budget never hides the real failure
+            vitals.check()
+        except BaseException as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            saved = budget.finish(error is not None)
+            if saved:
+                print(f"Fail-fast saved ~{saved:.0f}s", file=sys.stderr)
+            # Contexts the test left open still hold their last chunk
+            for context in list(_session.contexts if _session else []):
+                await trace.detach(context)
+            path = trace.finish(error is not None, error)
+            if path:
+                print(f"Trace of the last steps: {os.path.relpath(path, config.TESTS_DIR)}", file=sys.stderr)
+            await shutdown()
+
+    asyncio.run(main())
+
+
+def _chromium_executable():
+    executable = os.environ.get("TESTSPRITE_CHROMIUM")
+    if executable:
+        return executable
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as pw:
+        return pw.chromium.executable_path
+
+
+class BrowserServer:
+    """A long-lived headless Chromium exposing the DevTools protocol on ``port``."""
+
+    def __init__(self, port, executable=None):
+        self.port = port
+        self.executable = executable
+        self.process = None
+        self.user_data_dir = None
+        self.restarts = 0
+
+    @property
+    def endpoint(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        if self.executable is None:
+            self.executable = _chromium_executable()
+        self.user_data_dir = tempfile.mkdtemp(prefix="testsprite-chromium-")
+        self.process = subprocess.Popen(
+            [
+                self.executable,
+                "--headless=new",
+                f"--remote-debugging-port={self.port}",
+                f"--user-data-dir={self.user_data_dir}",
+                "--no-first-run",
+                "--no-default-browser-check",
+                *LAUNCH_ARGS,
+                "about:blank",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while not self._responds():
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"Chromium did not start on port {self.port}")
+            time.sleep(0.1)
+
+    def _responds(self):
+        try:
+            with urllib.request.urlopen(f"{self.endpoint}/json/version", timeout=1) as resp:
+                return "webSocketDebuggerUrl" in json.load(resp)
+        except (OSError, ValueError, urllib.error.URLError):
+            return False
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None and self._responds()
+
+    def ensure_running(self):
+        """Restart the server if it crashed or stopped answering. Returns True on restart."""
+        if self.is_alive():
+            return False
+        self.stop()
+        self.start()
+        self.restarts += 1
+        return True
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+
+
+class BrowserPool:
+    """A fixed-size set of ``BrowserServer`` on consecutive ports."""
+
+    def __init__(self, size=1, base_port=9222):
+        self.servers = [BrowserServer(base_port + index) for index in range(size)]
+
+    @property
+    def endpoints(self):
+        return [server.endpoint for server in self.servers]
+
+    def environ(self):
+        """Environment variables that point ``new_context()`` at this pool."""
+        return {config.BROWSER_ENDPOINTS_ENV: ",".join(self.endpoints)}
+
+    def start(self):
+        executable = _chromium_executable()
+        for server in self.servers:
+            server.executable = executable
+            server.start()
+        return self
+
+    def ensure_running(self):
+        return sum(server.ensure_running() for server in self.servers)
+
+    def stop(self):
+        for server in self.servers:
+            server.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a pool of shared Chromium servers for the TC scripts")
+    parser.add_argument("--size", type=int, default=1, help="number of browser servers")
+    parser.add_argument("--port", type=int, default=9222, help="first DevTools port")
+    args = parser.parse_args()
+
+    with BrowserPool(args.size, args.port) as pool:
+        print(f"export {config.BROWSER_ENDPOINTS_ENV}={','.join(pool.endpoints)}", flush=True)
+        try:
+            while True:
+                time.sleep(1)
+                restarted = pool.ensure_running()
+                if restarted:
+                    print(f"Restarted {restarted} crashed browser server(s)", flush=True)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
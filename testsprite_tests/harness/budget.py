@@ -0,0 +1,258 @@
+"""Per-test and per-step time budgets with fail-fast for the browser scripts.
+
+Many generated flows are doomed after their first step, e.g. the app
+rendered its error boundary or the session was lost and ``AuthGuard``
+redirected to ``/login``. They still walked every remaining click, each
+burning its full timeout, before the final assertion failed. Budgets stop
+them early:
+
+* every ``waits.click`` is a step. Before it acts, ``check()`` fails the test
+  with ``PreconditionFailed`` when the page shows the error boundary
+  (``src/components/ErrorBoundary.tsx``), when an authenticated context
+  (``auth_state.new_context``) is on a login route, or when the page left
+  the route a script declared with ``expect_route()``. A click that times
+  out is checked the same way, so its failure names the cause;
+* a step's waits are capped at the step budget (``TESTSPRITE_STEP_BUDGET``,
+  default 20 s) and at what is left of the test budget;
+* ``browser.run`` cancels the test when its budget runs out and fails it
+  with ``BudgetExceeded``. The test budget is ``TESTSPRITE_TEST_BUDGET`` when
+  set, else ``BUDGET_FACTOR`` times the test's median recorded duration
+  (``harness.shard``), within ``MIN_TEST_BUDGET`` and ``MAX_TEST_BUDGET``.
+  Under the runner the budget always ends ``TIMEOUT_MARGIN`` before the
+  runner's ``--timeout`` (``TESTSPRITE_TIMEOUT``), so an aborted test still
+  records its steps and writes its trace before the runner would kill it.
+
+The steps of every test are recorded in its metrics file (``kind: "budget"``)
+with ``saved`` for aborted tests: the median recorded duration minus the
+time the test actually ran, or the unused part of the aborted wait when the
+test has no history. The runner prints the total::
+
+    python -m harness.budget        # steps and time saved per test of the last run
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import os
+import re
+import statistics
+import sys
+import time
+import urllib.parse
+
+from playwright import async_api
+
+from harness import config, metrics, trace
+
+KIND = "budget"
+TEST_BUDGET_ENV = "TESTSPRITE_TEST_BUDGET"
+STEP_BUDGET_ENV = "TESTSPRITE_STEP_BUDGET"
+DEFAULT_TEST_BUDGET = 120.0
+DEFAULT_STEP_BUDGET = 20.0
+MIN_TEST_BUDGET = 30.0
+MAX_TEST_BUDGET = 270.0
+# Seconds left after the budget for closing the browser and writing the harness.trace
+TIMEOUT_MARGIN = 30.0
+BUDGET_FACTOR = 3
+
+ERROR_BOUNDARY_TEXT = "Algo deu errado"
+LOGIN_ROUTES = ("/login",)
+
+
+class BudgetExceeded(AssertionError):
+    """The test ran out of its time budget."""
+
+
+class PreconditionFailed(AssertionError):
+    """A step cannot succeed: the page is on the wrong route or crashed."""
+
+
+class _Clock:
+    def __init__(self, budget, step_budget, expected):
+        self.started = time.monotonic()
+        self.budget = budget
+        self.step_budget = step_budget
+        self.expected = expected
+        self.steps = []
+        self.aborted = None
+        self.unused = 0.0
+
+    def remaining(self):
+        return self.budget - (time.monotonic() - self.started)
+
+
+_clock = None
+# Contexts logged in through harness.auth_state, and routes scripts expect per page
+_authenticated = set()
+_routes = {}
+
+
+def _recorded():
+    """Median recorded duration of this test, or None."""
+    from harness import shard
+
+    samples = shard.load_durations().get(metrics.test_id())
+    return statistics.median(samples) if samples else None
+
+
+def _ceiling():
+    """The largest budget that ends before the runner kills the test."""
+    timeout = config.timeout()
+    if timeout is None:
+        return float("inf")
+    # Short runner timeouts still leave the test most of its time
+    return max(timeout - TIMEOUT_MARGIN, timeout / 2)
+
+
+def test_budget(expected=None):
+    value = os.environ.get(TEST_BUDGET_ENV)
+    if value:
+        budget = float(value)
+    elif expected is None:
+        budget = DEFAULT_TEST_BUDGET
+    else:
+        budget = min(max(BUDGET_FACTOR * expected, MIN_TEST_BUDGET), MAX_TEST_BUDGET)
+    return min(budget, _ceiling())
+
+
+def start():
+    """Start the clock of this process's test (called by ``browser.run``)."""
+    global _clock
+    expected = _recorded()
+    _clock = _Clock(test_budget(expected), float(os.environ.get(STEP_BUDGET_ENV) or DEFAULT_STEP_BUDGET), expected)
+    return _clock.budget
+
+
+def remaining():
+    """Seconds left of the test budget (unbounded outside ``browser.run``)."""
+    return _clock.remaining() if _clock else float("inf")
+
+
+def timeout_ms(timeout):
+    """Cap a Playwright timeout (ms) at the step budget and what is left of the test budget."""
+    if _clock is None:
+        return timeout
+    left = _clock.remaining()
+    if left <= 0:
+        raise exceeded()
+    return max(1, min(timeout, _clock.step_budget * 1000, left * 1000))
+
+
+def exceeded():
+    """The ``BudgetExceeded`` for this test, recorded as its abort reason."""
+    budget = _clock.budget if _clock else 0
+    error = BudgetExceeded(f"Test budget of {budget:.0f}s exceeded (set {TEST_BUDGET_ENV} to change it)")
+    _abort(str(error), 0.0)
+    return error
+
+
+def authenticated(context):
+    """Mark ``context`` as logged in, so landing on a login route fails the next step."""
+    _authenticated.add(context)
+
+
+def release(context):
+    _authenticated.discard(context)
+    for page in context.pages:
+        _routes.pop(page, None)
+
+
+def expect_route(page, pattern):
+    """Fail ``page``'s next steps fast unless its path matches ``pattern`` (regex)."""
+    _routes[page] = re.compile(pattern)
+
+
+async def check(page):
+    """Raise ``PreconditionFailed`` when no step on ``page`` can succeed."""
+    path = urllib.parse.urlsplit(page.url).path or "/"
+    reason = None
+    if page.context in _authenticated and path in LOGIN_ROUTES:
+        reason = f"the session was lost, the page is on {path}"
+    elif page in _routes and not _routes[page].search(path):
+        reason = f"the page is on {path}, expected a route matching {_routes[page].pattern!r}"
+    elif await page.get_by_text(ERROR_BOUNDARY_TEXT).count():
+        reason = f"the page shows the error boundary ({ERROR_BOUNDARY_TEXT!r}) on {path}"
+    if reason:
+        raise PreconditionFailed(f"Aborted: {reason}")
+
+
+def _abort(reason, unused):
+    if _clock is not None and not _clock.aborted:
+        _clock.aborted = reason
+        _clock.unused = max(unused, 0.0)
+
+
+@contextlib.asynccontextmanager
+async def step(page, name, timeout=None):
+    """Time one step on ``page`` (``timeout`` in ms) and fail fast when the page is doomed.
+
+    A step that succeeds ends its ``harness.trace`` chunk.
+    """
+    started = time.monotonic()
+    ok = False
+    try:
+        try:
+            await check(page)
+            yield
+            ok = True
+            await trace.checkpoint(page.context, name)
+        except PreconditionFailed as exc:
+            _abort(str(exc), (timeout or 0) / 1000 - (time.monotonic() - started))
+            raise
+        except (async_api.Error, asyncio.TimeoutError) as exc:
+            # A timeout on a page that has since crashed or left its route: report the cause instead
+            try:
+                await check(page)
+            except PreconditionFailed as precondition:
+                _abort(str(precondition), 0.0)
+                raise precondition from exc
+            except async_api.Error:
+                pass
+            raise
+    finally:
+        if _clock is not None:
+            _clock.steps.append({"name": name, "seconds": round(time.monotonic() - started, 3), "ok": ok})
+
+
+def finish(failed):
+    """Record this test's steps and the time fail-fast saved; returns the seconds saved."""
+    global _clock
+    clock, _clock = _clock, None
+    if clock is None:
+        return 0.0
+    elapsed = time.monotonic() - clock.started
+    saved = 0.0
+    if failed and clock.aborted:
+        saved = max(clock.expected - elapsed, 0.0) if clock.expected else clock.unused
+    metrics.record(
+        KIND, "RUN", metrics.test_id(), None, elapsed,
+        budget=round(clock.budget, 1), steps=clock.steps, aborted=clock.aborted, saved=round(saved, 1),
+    )
+    return saved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the step timings and time saved by fail-fast in the last run")
+    parser.add_argument("--dir", default=metrics.METRICS_DIR, help="directory with the NDJSON records")
+    args = parser.parse_args(argv)
+
+    runs = collections.OrderedDict()
+    for entry in metrics.load(args.dir):
+        if entry["kind"] == KIND:
+            runs[entry["test_id"]] = entry
+    if not runs:
+        print("No budget records")
+        return 1
+    for test_id, entry in runs.items():
+        slowest = max(entry["steps"], key=lambda item: item["seconds"], default=None)
+        print(f"{test_id}: {entry['duration']:.1f}s of {entry['budget']:.0f}s, {len(entry['steps'])} steps"
+              + (f", slowest {slowest['name']} {slowest['seconds']:.1f}s" if slowest else ""))
+        if entry["aborted"]:
+            print(f"    {entry['aborted']} (saved ~{entry['saved']:.0f}s)")
+    print(f"Fail-fast saved ~{sum(entry['saved'] for entry in runs.values()):.0f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
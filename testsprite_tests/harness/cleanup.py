@@ -0,0 +1,233 @@
+"""Deferred, batched cleanup of the resources tests create.
+
+Scripts used to delete what they created in ``finally`` blocks, one request
+at a time on the test's critical path, and a failing delete failed the test.
+Instead, a test registers each resource right after creating it::
+
+    session_id = create_resp.json()["id"]
+    cleanup.register(f"{BASE_URL}/api/telemedicine/sessions/{session_id}", headers={"Authorization": auth_token})
+
+Registrations are appended to ``tmp/artifacts/cleanup/<test_id>.ndjson``.
+The runner deletes a finished test's resources on a background thread while
+the next tests run, and sweeps whatever is left at the end of the run (also
+registrations of killed runs). Scripts run on their own clean up when the
+process exits.
+
+Deletes go out in batches of ``BATCH_SIZE`` on up to ``MAX_CONCURRENCY``
+keep-alive connections. Connection errors, 408/425/429 and 5xx are retried for
+up to ``MAX_ATTEMPTS`` rounds with exponential backoff (or the longest
+``Retry-After``). 2xx, 404 and 410 count as deleted. Resources that could
+not be deleted are listed in ``tmp/artifacts/cleanup/leaks.json`` with their
+test and last error::
+
+    python -m harness.cleanup            # delete everything registered
+    python -m harness.cleanup --leaks    # show the last leak report
+"""
+
+import argparse
+import atexit
+import concurrent.futures
+import contextlib
+import dataclasses
+import glob
+import json
+import os
+import sys
+import time
+
+import requests
+
+from harness import api_client, config, metrics
+
+REGISTRY_DIR = os.path.join(config.ARTIFACTS_DIR, "cleanup")
+LEAKS_PATH = os.path.join(REGISTRY_DIR, "leaks.json")
+BATCH_SIZE = 20
+MAX_CONCURRENCY = 8
+MAX_ATTEMPTS = 4
+BACKOFF = 0.5
+MAX_RETRY_AFTER = 10
+REQUEST_TIMEOUT = 15
+
+DELETED_STATUSES = {404, 410}
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+_exit_hook = False
+
+
+@dataclasses.dataclass
+class Resource:
+    url: str
+    method: str = "DELETE"
+    headers: dict = dataclasses.field(default_factory=dict)
+    label: str = ""
+    test_id: str = ""
+    created_at: float = 0.0
+    attempts: int = 0
+    error: str = ""
+
+
+@dataclasses.dataclass
+class CleanupResult:
+    deleted: int
+    leaked: list
+    seconds: float
+
+
+def _registry_path(test_id):
+    return os.path.join(REGISTRY_DIR, f"{test_id}.ndjson")
+
+
+def register(url, headers=None, label="", method="DELETE"):
+    """Record a resource to delete after the test; returns immediately."""
+    resource = Resource(url, method, dict(headers or {}), label, metrics.test_id(), time.time())
+    os.makedirs(REGISTRY_DIR, exist_ok=True)
+    # One append per line, so concurrent writers never interleave records
+    with open(_registry_path(resource.test_id), "a", encoding="utf-8") as out:
+        out.write(json.dumps(dataclasses.asdict(resource)) + "\n")
+    global _exit_hook
+    if not _exit_hook and not os.environ.get(metrics.TEST_ID_ENV):
+        # Not under the runner: nobody else will sweep this script's resources
+        atexit.register(_cleanup_at_exit, resource.test_id)
+        _exit_hook = True
+
+
+def _cleanup_at_exit(test_id):
+    # No new threads once the interpreter is shutting down
+    result = collect(test_id, concurrency=1)
+    if result.leaked:
+        print(f"cleanup: {len(result.leaked)} resources leaked, see {LEAKS_PATH}", file=sys.stderr)
+
+
+def _claim(test_id=None):
+    """Take the registry files of ``test_id`` (default: all) and return their resources."""
+    resources = []
+    paths = [_registry_path(test_id)] if test_id else glob.glob(os.path.join(REGISTRY_DIR, "*.ndjson"))
+    for path in paths:
+        claimed = path + f".{os.getpid()}.claimed"
+        try:
+            # Atomic: a concurrent collect() never processes the same file twice
+            os.rename(path, claimed)
+        except FileNotFoundError:
+            continue
+        with open(claimed, encoding="utf-8") as source:
+            resources += [Resource(**json.loads(line)) for line in source if line.strip()]
+        os.remove(claimed)
+    return resources
+
+
+def _attempt(client, resource):
+    """Delete one resource; returns ``(done, retry_after)`` and sets ``resource.error``."""
+    resource.attempts += 1
+    try:
+        response = client.request(resource.method, resource.url, headers=resource.headers, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as exc:
+        resource.error = f"{type(exc).__name__}: {exc}"
+        return False, 0.0
+    if response.ok or response.status_code in DELETED_STATUSES:
+        resource.error = ""
+        return True, 0.0
+    resource.error = f"HTTP {response.status_code} {response.text[:200]}"
+    if response.status_code not in RETRY_STATUSES:
+        resource.attempts = MAX_ATTEMPTS  # not worth retrying
+        return False, 0.0
+    try:
+        retry_after = float(response.headers.get("Retry-After", 0))
+    except ValueError:
+        retry_after = 0.0
+    return False, min(retry_after, MAX_RETRY_AFTER)
+
+
+def _run_batch(batch):
+    """Delete a batch on one keep-alive connection; returns ``[(resource, retry_after)]`` still pending."""
+    client = api_client.Client(pool_size=1)
+    # Cleanup traffic is not part of any test's request metrics
+    client.timing_listeners.clear()
+    pending = []
+    with contextlib.closing(client):
+        for resource in batch:
+            done, retry_after = _attempt(client, resource)
+            if not done:
+                pending.append((resource, retry_after))
+    return pending
+
+
+def drain(resources, concurrency=MAX_CONCURRENCY):
+    """Delete ``resources`` concurrently in batches with retries; returns the ones that leaked."""
+    leaked = []
+    pending = list(resources)
+    for attempt in range(MAX_ATTEMPTS):
+        if not pending:
+            break
+        batches = [pending[index:index + BATCH_SIZE] for index in range(0, len(pending), BATCH_SIZE)]
+        if concurrency > 1 and len(batches) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as executor:
+                outcomes = [item for batch in executor.map(_run_batch, batches) for item in batch]
+        else:
+            outcomes = [item for batch in map(_run_batch, batches) for item in batch]
+        pending = [resource for resource, _ in outcomes if resource.attempts < MAX_ATTEMPTS]
+        leaked += [resource for resource, _ in outcomes if resource.attempts >= MAX_ATTEMPTS]
+        if pending:
+            time.sleep(max([BACKOFF * 2 ** attempt] + [retry_after for _, retry_after in outcomes]))
+    return leaked + pending
+
+
+def collect(test_id=None, concurrency=MAX_CONCURRENCY):
+    """Delete the registered resources of ``test_id`` (default: all) and report leaks."""
+    started = time.perf_counter()
+    resources = _claim(test_id)
+    leaked = drain(resources, concurrency)
+    if leaked:
+        write_leaks(leaked)
+    return CleanupResult(len(resources) - len(leaked), leaked, time.perf_counter() - started)
+
+
+def write_leaks(leaked, path=LEAKS_PATH):
+    """Add ``leaked`` to the leak report (auth headers left out)."""
+    try:
+        with open(path, encoding="utf-8") as source:
+            report = json.load(source)
+    except (OSError, ValueError):
+        report = []
+    for resource in leaked:
+        entry = dataclasses.asdict(resource)
+        entry.pop("headers")
+        report.append(entry)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        json.dump(report, out, indent=2)
+    os.replace(tmp_path, path)
+
+
+def reset_leaks(path=LEAKS_PATH):
+    """Start a new leak report (called by the runner before a run)."""
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
+
+
+def print_leaks(leaked):
+    for resource in leaked:
+        print(f"  {resource['test_id']}: {resource['method']} {resource['url']} ({resource['attempts']} attempts): {resource['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delete the resources the tests registered for cleanup")
+    parser.add_argument("--leaks", action="store_true", help="only print the last leak report")
+    args = parser.parse_args(argv)
+
+    if not args.leaks:
+        result = collect()
+        print(f"Deleted {result.deleted} resources in {result.seconds:.2f}s, {len(result.leaked)} leaked")
+    try:
+        with open(LEAKS_PATH, encoding="utf-8") as source:
+            leaked = json.load(source)
+    except (OSError, ValueError):
+        leaked = []
+    if leaked:
+        print(f"Leak report {LEAKS_PATH}:")
+        print_leaks(leaked)
+    return 1 if leaked else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
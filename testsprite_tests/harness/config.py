@@ -0,0 +1,39 @@
+"""Environment-driven settings shared by the harness modules."""
+
+import os
+
+TESTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = os.path.join(TESTS_DIR, "tmp")
+# Harness-generated state (sessions, indexes); ignored by git
+CACHE_DIR = os.path.join(TMP_DIR, "cache")
+# Per-run outputs (metrics, traces); ignored by git
+ARTIFACTS_DIR = os.path.join(TMP_DIR, "artifacts")
+
+# Application under test (same default as the localEndpoint in tmp/config.json)
+BASE_URL = os.environ.get("TESTSPRITE_BASE_URL", "http://localhost:8080")
+
+# Comma separated CDP endpoints of long-lived browser servers, set by the runner
+BROWSER_ENDPOINTS_ENV = "TESTSPRITE_BROWSER_ENDPOINTS"
+
+
+def browser_endpoints():
+    """Return the browser server endpoints, read at call time so workers see the runner's value."""
+    value = os.environ.get(BROWSER_ENDPOINTS_ENV, "")
+    return [endpoint.strip() for endpoint in value.split(",") if endpoint.strip()]
+
+# Slot (0 .. workers-1) of the runner worker a test runs in, set by the runner
+WORKER_ENV = "TESTSPRITE_WORKER"
+
+
+def worker():
+    """Return the runner worker slot of this process (0 outside the runner)."""
+    return int(os.environ.get(WORKER_ENV) or 0)
+
+# Seconds after which the runner kills a test, set by the runner
+TIMEOUT_ENV = "TESTSPRITE_TIMEOUT"
+
+
+def timeout():
+    """Return the runner's per-test timeout in seconds (None outside the runner)."""
+    value = os.environ.get(TIMEOUT_ENV)
+    return float(value) if value else None
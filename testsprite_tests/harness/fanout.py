@@ -0,0 +1,98 @@
+"""Bounded concurrent fan-out for matrix-style API checks.
+
+Scripts such as TC010 check every language x profile (or language x
+endpoint) combination. ``assert_all`` runs one callable per cell with at
+most ``limit`` in flight, waits for all of them and raises a single
+``FanoutError`` listing every failing cell, so one unreachable endpoint costs
+one timeout in parallel with the rest instead of stalling the loop::
+
+    results = fanout.assert_all(
+        {(lang, profile): functools.partial(check_dashboard, lang, profile) for ...},
+        title="Dashboard language test",
+    )
+
+Plain functions run on a dedicated thread pool (the requests-based scripts
+share ``harness.api_client``'s connection pool); coroutine functions are
+awaited on the event loop.
+"""
+
+import asyncio
+import concurrent.futures
+import dataclasses
+import inspect
+import time
+
+DEFAULT_LIMIT = 8
+
+
+@dataclasses.dataclass
+class Outcome:
+    key: object
+    value: object = None
+    error: BaseException = None
+    duration: float = 0.0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class FanoutError(AssertionError):
+    """Raised by ``assert_all`` with every failing ``Outcome``."""
+
+    def __init__(self, title, failures, total):
+        self.failures = failures
+        lines = [f"{title}: {len(failures)} of {total} checks failed"]
+        for outcome in failures:
+            lines.append(f"  [{_label(outcome.key)}] {type(outcome.error).__name__}: {outcome.error}")
+        super().__init__("\n".join(lines))
+
+
+def _label(key):
+    return "/".join(map(str, key)) if isinstance(key, tuple) else str(key)
+
+
+async def gather(cells, limit=DEFAULT_LIMIT, cell_timeout=None):
+    """Run every callable in ``cells`` (a mapping of key -> zero-argument
+    callable) with at most ``limit`` concurrently. Returns an ``Outcome`` per
+    cell in input order; exceptions are captured, never raised.
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(limit)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=limit, thread_name_prefix="fanout")
+
+    async def run_cell(key, call):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(call):
+                    pending = call()
+                else:
+                    pending = loop.run_in_executor(executor, call)
+                value = await asyncio.wait_for(pending, cell_timeout)
+                return Outcome(key, value, duration=time.perf_counter() - started)
+            except asyncio.TimeoutError:
+                error = TimeoutError(f"no result after {cell_timeout}s")
+                return Outcome(key, error=error, duration=time.perf_counter() - started)
+            except Exception as exc:
+                return Outcome(key, error=exc, duration=time.perf_counter() - started)
+
+    try:
+        return await asyncio.gather(*(run_cell(key, call) for key, call in cells.items()))
+    finally:
+        # Do not wait for cells abandoned by cell_timeout; they finish in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_all(cells, limit=DEFAULT_LIMIT, cell_timeout=None):
+    """Synchronous ``gather`` for the requests-based scripts."""
+    return asyncio.run(gather(cells, limit, cell_timeout))
+
+
+def assert_all(cells, limit=DEFAULT_LIMIT, cell_timeout=None, title="Fan-out check"):
+    """Run ``cells`` and raise one ``FanoutError`` if any failed; otherwise return ``{key: value}``."""
+    outcomes = run_all(cells, limit, cell_timeout)
+    failures = [outcome for outcome in outcomes if not outcome.ok]
+    if failures:
+        raise FanoutError(title, failures, len(outcomes))
+    return {outcome.key: outcome.value for outcome in outcomes}
@@ -0,0 +1,638 @@
+"""Fault-injecting HTTP proxy for spike and recovery testing.
+
+TC014 expects the app to handle spikes "without crashes" and to recover
+stability quickly, which needs adverse conditions on demand. This proxy
+sits between the suite and the app (or ``harness.standin``) and injects
+faults per path glob on a schedule: added latency (normal, median and
+standard deviation in ms), bandwidth caps, connection resets, 5xx bursts
+and 429s with ``Retry-After``. Everything else is forwarded unchanged
+(keep-alive on both sides; WebSocket upgrades such as Vite HMR are tunnelled
+without faults)::
+
+    # stand-in backend behind the proxy, load through it, report at the end
+    python -m harness.faultproxy --scenario brownout --standin --load steady
+
+    # the dev server on 8081 behind the proxy on 8080, for the browser tests
+    npm run dev -- --port 8081
+    python -m harness.faultproxy --listen 8080 --upstream http://localhost:8081 --scenario error-burst
+    python -m harness.runner -k TC014
+
+    # ad-hoc windows, API calls to another upstream
+    python -m harness.faultproxy --route "/api/*=http://127.0.0.1:8090" \\
+        --window "5-15@/api/*:reset_rate=0.2" --window "20-22@*:error_rate=1,error_status=502"
+
+A scenario is a duration plus ``START-END@GLOB:FIELD=VALUE,...`` windows in
+seconds from the proxy's start (``SCENARIOS``, or a JSON file with
+``name``, ``duration`` and ``windows`` as such strings or as objects). When
+several active windows match a path, the last one wins. Draws come from one
+seeded ``random.Random`` (``--seed``).
+
+Every request is recorded in a timeline (``tmp/artifacts/faults/
+<scenario>.ndjson``; the first line is the scenario) and attributed to a
+dashboard by its path, the ``harness.load`` flow header or its ``Referer``.
+On exit, and with ``--report TIMELINE`` later, each dashboard gets:
+
+* ``error_amplification``: failures the client saw (resets, 429, 5xx,
+  including upstream ones) from the first window on, per injected fault;
+  above 1 means the faults cascaded (retries, dependent calls failing);
+* ``request_amplification``: request rate during the windows over the
+  baseline rate before them (retry storms);
+* ``recovery_seconds``: time from the end of the last window that hit the
+  dashboard until latency and errors are back near the baseline for
+  ``load.RECOVERY_WINDOW`` buckets in a row, as ``harness.load`` measures
+  spikes (``None`` if they never are).
+"""
+
+import argparse
+import asyncio
+import collections
+import dataclasses
+import datetime
+import fnmatch
+import json
+import math
+import os
+import random
+import re
+import socket
+import struct
+import sys
+import urllib.parse
+
+from harness import config, load, standin
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8081
+TIMELINE_DIR = os.path.join(config.ARTIFACTS_DIR, "faults")
+# Bytes written per bandwidth-capped slice, so the cap is smooth at ~10 slices/s
+SLICE_SECONDS = 0.1
+
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-connection", "te", "trailer", "transfer-encoding", "upgrade"}
+INJECTED = {"reset", "429", "5xx"}
+
+# Dashboard -> path globs of its SPA route and API contract
+DASHBOARDS = {
+    "gestor": ["/prefeitura-dashboard*", "/dashboard/municipal*"],
+    "hospital": ["/dashboard", "/hospitals-access*", "/dashboard/hospital*", "/api/dashboard/hospital/*"],
+    "medico": ["/transcricao-atendimento*", "/dashboard/medical*"],
+    "paciente": ["/patient/dashboard*", "/dashboard/patient*"],
+}
+
+SCENARIOS = {
+    "latency-spike": {"duration": 45, "windows": ["10-25@/api/*:latency_ms=800,jitter_ms=200", "10-25@/dashboard/*:latency_ms=800,jitter_ms=200"]},
+    "error-burst": {"duration": 45, "windows": ["10-13@*:error_rate=1,error_status=503", "25-27@/dashboard/*:error_rate=1,error_status=502"]},
+    "throttle": {"duration": 45, "windows": ["10-30@*:throttle_rate=0.5,retry_after=2"]},
+    "resets": {"duration": 40, "windows": ["10-20@*:reset_rate=0.2"]},
+    "slow-network": {"duration": 40, "windows": ["10-30@*:bandwidth_kbps=256,latency_ms=150,jitter_ms=50"]},
+    "brownout": {
+        "duration": 60,
+        "windows": [
+            "10-30@*:latency_ms=300,jitter_ms=100,bandwidth_kbps=512",
+            "15-25@/dashboard/*:latency_ms=300,jitter_ms=100,error_rate=0.3",
+            "20-22@*:reset_rate=0.5",
+            "30-40@*:throttle_rate=0.3,retry_after=1",
+        ],
+    },
+}
+
+
+@dataclasses.dataclass
+class Fault:
+    latency_ms: float = 0.0  # median added before forwarding
+    jitter_ms: float = 0.0  # standard deviation
+    bandwidth_kbps: float = 0.0  # response cap in kilobits per second, 0 = uncapped
+    reset_rate: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    throttle_rate: float = 0.0  # share of requests answered 429
+    retry_after: float = 1.0
+
+
+@dataclasses.dataclass
+class Window:
+    start: float
+    end: float
+    pattern: str = "*"
+    fault: Fault = dataclasses.field(default_factory=Fault)
+
+    def active(self, elapsed, path):
+        return self.start <= elapsed < self.end and fnmatch.fnmatchcase(path, self.pattern)
+
+    def spec(self):
+        fields = ",".join(
+            f"{field.name}={getattr(self.fault, field.name):g}"
+            for field in dataclasses.fields(Fault)
+            if getattr(self.fault, field.name) != field.default
+        )
+        return f"{self.start:g}-{self.end:g}@{self.pattern}:{fields}"
+
+
+@dataclasses.dataclass
+class Scenario:
+    name: str
+    duration: float
+    windows: list
+
+    def as_dict(self):
+        return {"name": self.name, "duration": self.duration, "windows": [window.spec() for window in self.windows]}
+
+
+@dataclasses.dataclass
+class Event:
+    t: float  # seconds since the proxy started
+    method: str
+    path: str
+    dashboard: str
+    status: int = None  # None: the connection was reset
+    fault: str = ""  # "latency", "bandwidth", "reset", "429", "5xx" or ""
+    seconds: float = 0.0  # request received to response written
+    upstream_seconds: float = 0.0
+    bytes: int = 0
+
+
+def parse_window(spec):
+    """``"10-25@/api/*:latency_ms=800,jitter_ms=200"`` -> ``Window``."""
+    match = re.fullmatch(r"\s*([\d.]+)-([\d.]+)@([^:]+)(?::(.*))?", spec)
+    if not match:
+        raise ValueError(f"Bad fault window {spec!r}, expected e.g. 10-20@/api/*:error_rate=1")
+    types = {field.name: field.type for field in dataclasses.fields(Fault)}
+    values = {}
+    for item in filter(None, (match.group(4) or "").split(",")):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in types:
+            raise ValueError(f"Unknown fault field {name!r} in {spec!r}; expected one of {', '.join(types)}")
+        values[name] = int(float(value)) if types[name] is int else float(value)
+    return Window(float(match.group(1)), float(match.group(2)), match.group(3).strip(), Fault(**values))
+
+
+def load_scenario(spec, extra_windows=()):
+    """A ``SCENARIOS`` name, a JSON file, or ``None`` for only ``extra_windows``."""
+    if spec is None:
+        data = {"name": "custom", "duration": 0, "windows": []}
+    elif spec in SCENARIOS:
+        data = dict(SCENARIOS[spec], name=spec)
+    else:
+        with open(spec, encoding="utf-8") as source:
+            data = json.load(source)
+        data.setdefault("name", os.path.splitext(os.path.basename(spec))[0])
+    windows = [
+        parse_window(item) if isinstance(item, str) else Window(
+            item["start"], item["end"], item.get("pattern", "*"),
+            Fault(**{key: value for key, value in item.items() if key not in ("start", "end", "pattern")}),
+        )
+        for item in data["windows"]
+    ]
+    windows += [parse_window(item) for item in extra_windows]
+    duration = max([data.get("duration", 0)] + [window.end for window in windows])
+    return Scenario(data["name"], duration, windows)
+
+
+def dashboard(path, headers):
+    """Dashboard a request belongs to, from its path, load flow header or Referer."""
+    flow = headers.get(load.FLOW_HEADER.lower())
+    if flow in DASHBOARDS:
+        return flow
+    referer = urllib.parse.urlsplit(headers.get("referer", "")).path
+    for candidate in (path, referer):
+        for name, patterns in DASHBOARDS.items():
+            if candidate and any(fnmatch.fnmatchcase(candidate, pattern) for pattern in patterns):
+                return name
+    return None
+
+
+# HTTP/1.1 framing
+
+
+async def _read_head(reader):
+    line = await reader.readline()
+    if not line:
+        return None, None
+    headers = []
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers.append((name.strip(), value.strip()))
+    return line.decode("latin-1").rstrip("\r\n"), headers
+
+
+async def _read_body(reader, headers, until_eof=False):
+    values = {name.lower(): value for name, value in headers}
+    if "chunked" in values.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0].strip() or b"0", 16)
+            if size == 0:
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass  # trailers
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+    if "content-length" in values:
+        length = int(values["content-length"])
+        return await reader.readexactly(length) if length else b""
+    return await reader.read() if until_eof else b""
+
+
+def _head(first_line, headers):
+    return (first_line + "\r\n" + "".join(f"{name}: {value}\r\n" for name, value in headers) + "\r\n").encode("latin-1")
+
+
+def _reset(writer):
+    """Close with an RST instead of a FIN, as a crashed or overloaded peer would."""
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0))
+    writer.transport.abort()
+
+
+class _Upstream:
+    """One keep-alive connection to an upstream, per client connection."""
+
+    def __init__(self, url):
+        parts = urllib.parse.urlsplit(url)
+        self.netloc = parts.netloc
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.reader = self.writer = None
+
+    async def exchange(self, method, target, headers, body):
+        """Forward one request; returns ``(status line, headers, body, keep_alive)``."""
+        for attempt in range(2):
+            reused = self.writer is not None
+            if not reused:
+                self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            try:
+                self.writer.write(_head(f"{method} {target} HTTP/1.1", headers) + body)
+                await self.writer.drain()
+                status_line, response_headers = await _read_head(self.reader)
+                if status_line is None:
+                    raise ConnectionResetError("upstream closed the connection")
+                break
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self.close()
+                # A reused keep-alive connection may have been closed by the upstream meanwhile
+                if not reused or attempt:
+                    raise
+        status = int(status_line.split()[1])
+        values = {name.lower(): value for name, value in response_headers}
+        keep_alive = values.get("connection", "").lower() != "close"
+        if method == "HEAD" or status < 200 or status in (204, 304):
+            payload = b""
+        else:
+            until_eof = "content-length" not in values and "chunked" not in values.get("transfer-encoding", "").lower()
+            payload = await _read_body(self.reader, response_headers, until_eof=until_eof)
+            keep_alive = keep_alive and not until_eof
+        if not keep_alive:
+            self.close()
+        return status_line, response_headers, payload, keep_alive
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+class FaultProxy:
+    def __init__(self, upstream, scenario, routes=(), seed=None):
+        # Path glob -> upstream URL; the last matching entry wins
+        self.upstreams = [("*", upstream)] + list(routes)
+        self.scenario = scenario
+        self.random = random.Random(seed)
+        self.events = []
+        self.started = None
+        self.started_at = None
+        self.handlers = set()
+
+    def elapsed(self):
+        return asyncio.get_running_loop().time() - self.started
+
+    def fault_for(self, path, elapsed):
+        active = [window for window in self.scenario.windows if window.active(elapsed, path)]
+        return active[-1].fault if active else Fault()
+
+    def upstream_for(self, path):
+        url = None
+        for pattern, candidate in self.upstreams:
+            if fnmatch.fnmatchcase(path, pattern):
+                url = candidate
+        return url
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.started = asyncio.get_running_loop().time()
+        self.started_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+        return await asyncio.start_server(self.handle, host, port, backlog=1024, reuse_address=True)
+
+    async def close(self, server):
+        """Stop accepting and end the open client connections."""
+        server.close()
+        for task in list(self.handlers):
+            task.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+
+    async def handle(self, reader, writer):
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        upstreams = {}
+        try:
+            while True:
+                request_line, headers = await _read_head(reader)
+                if request_line is None:
+                    break
+                method, target, _version = request_line.split(" ", 2)
+                body = await _read_body(reader, headers)
+                values = {name.lower(): value for name, value in headers}
+                if "upgrade" in values:
+                    await self._tunnel(request_line, headers, body, reader, writer)
+                    break
+                keep_alive = await self._exchange(method, target, headers, body, writer, upstreams)
+                if not keep_alive or values.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            pass
+        finally:
+            self.handlers.discard(task)
+            for upstream in upstreams.values():
+                upstream.close()
+            writer.close()
+
+    async def _exchange(self, method, target, headers, body, writer, upstreams):
+        loop = asyncio.get_running_loop()
+        received = loop.time()
+        path = urllib.parse.urlsplit(target).path or "/"
+        values = {name.lower(): value for name, value in headers}
+        event = Event(round(received - self.started, 4), method, path, dashboard(path, values))
+        fault = self.fault_for(path, received - self.started)
+
+        delay = max(0.0, self.random.gauss(fault.latency_ms, fault.jitter_ms)) / 1000 if fault.latency_ms else 0.0
+        if delay:
+            event.fault = "latency"
+            await asyncio.sleep(delay)
+
+        if fault.reset_rate and self.random.random() < fault.reset_rate:
+            event.fault = "reset"
+            _reset(writer)
+            self._record(event, received)
+            return False
+        if fault.throttle_rate and self.random.random() < fault.throttle_rate:
+            event.fault, event.status = "429", 429
+            response_headers = [("Content-Type", "application/json"), ("Retry-After", f"{math.ceil(fault.retry_after)}")]
+            payload, keep_alive = b'{"error": "rate limited by harness.faultproxy"}', True
+        elif fault.error_rate and self.random.random() < fault.error_rate:
+            event.fault, event.status = "5xx", fault.error_status
+            response_headers = [("Content-Type", "application/json")]
+            payload, keep_alive = b'{"error": "injected by harness.faultproxy"}', True
+        else:
+            url = self.upstream_for(path)
+            upstream = upstreams.setdefault(url, _Upstream(url))
+            forwarded = [(name, value) for name, value in headers if name.lower() not in HOP_BY_HOP and name.lower() != "host"]
+            forwarded += [("Host", upstream.netloc), ("Content-Length", str(len(body)))]
+            peer = writer.get_extra_info("peername")
+            forwarded.append(("X-Forwarded-For", peer[0] if peer else "unknown"))
+            sent = loop.time()
+            try:
+                status_line, upstream_headers, payload, keep_alive = await upstream.exchange(method, target, forwarded, body)
+                event.status = int(status_line.split()[1])
+            except (OSError, asyncio.IncompleteReadError, ValueError) as exc:
+                # An upstream failure the client sees, not an injected one
+                event.status, upstream_headers, keep_alive = 502, [("Content-Type", "application/json")], True
+                payload = json.dumps({"error": f"upstream {url}: {type(exc).__name__}"}).encode("utf-8")
+            event.upstream_seconds = round(loop.time() - sent, 4)
+            response_headers = [
+                (name, value) for name, value in upstream_headers if name.lower() not in HOP_BY_HOP | {"content-length"}
+            ]
+
+        status_line = f"HTTP/1.1 {event.status} {standin.REASONS.get(event.status, 'Unknown')}"
+        response_headers += [("Content-Length", str(len(payload))), ("Connection", "keep-alive" if keep_alive else "close")]
+        head = _head(status_line, response_headers)
+        if fault.bandwidth_kbps:
+            event.fault = event.fault or "bandwidth"
+            await self._write_capped(writer, head + payload, fault.bandwidth_kbps * 125)
+        else:
+            writer.write(head + payload)
+            await writer.drain()
+        event.bytes = len(payload)
+        self._record(event, received)
+        return keep_alive
+
+    async def _write_capped(self, writer, data, bytes_per_second):
+        step = max(1, int(bytes_per_second * SLICE_SECONDS))
+        for offset in range(0, len(data), step):
+            writer.write(data[offset:offset + step])
+            await writer.drain()
+            if offset + step < len(data):
+                await asyncio.sleep(SLICE_SECONDS)
+
+    async def _tunnel(self, request_line, headers, body, reader, writer):
+        path = urllib.parse.urlsplit(request_line.split(" ", 2)[1]).path or "/"
+        upstream = _Upstream(self.upstream_for(path))
+        up_reader, up_writer = await asyncio.open_connection(upstream.host, upstream.port)
+        headers = [(name, upstream.netloc if name.lower() == "host" else value) for name, value in headers]
+        up_writer.write(_head(request_line, headers) + body)
+
+        async def pipe(source, sink):
+            try:
+                while data := await source.read(65536):
+                    sink.write(data)
+                    await sink.drain()
+            except ConnectionError:
+                pass
+            finally:
+                sink.close()
+
+        await asyncio.gather(pipe(reader, up_writer), pipe(up_reader, writer))
+
+    def _record(self, event, received):
+        event.seconds = round(asyncio.get_running_loop().time() - received, 4)
+        self.events.append(event)
+
+    def save(self, directory=TIMELINE_DIR):
+        """Write the timeline as NDJSON; returns its path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.scenario.name}.ndjson")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write(json.dumps({"scenario": self.scenario.as_dict(), "started_at": self.started_at}) + "\n")
+            for event in self.events:
+                out.write(json.dumps(dataclasses.asdict(event)) + "\n")
+        os.replace(tmp_path, path)
+        return path
+
+
+def load_timeline(path):
+    """``(Scenario, [event dicts])`` from a saved timeline."""
+    with open(path, encoding="utf-8") as source:
+        header = json.loads(source.readline())
+        events = [json.loads(line) for line in source if line.strip()]
+    data = header["scenario"]
+    return Scenario(data["name"], data["duration"], [parse_window(spec) for spec in data["windows"]]), events
+
+
+def _failed(event):
+    return event["status"] is None or event["status"] == 429 or event["status"] >= 500
+
+
+def _health(events):
+    hist = load.Histogram()
+    for event in events:
+        hist.record(event["seconds"])
+    return hist.percentile(95), sum(map(_failed, events)) / len(events) if events else 0.0
+
+
+def analyze(scenario, events, bucket=load.BUCKET_SECONDS):
+    """Per-dashboard error/request amplification and recovery time of a timeline."""
+    if not scenario.windows:
+        return {}
+    first = min(window.start for window in scenario.windows)
+    fault_time = sum(window.end - window.start for window in _merged(scenario.windows))
+    groups = collections.defaultdict(list)
+    for event in events:
+        groups[event["dashboard"] or "(other)"].append(event)
+
+    report = {}
+    for name, items in sorted(groups.items()):
+        baseline = [event for event in items if event["t"] < first]
+        during = [event for event in items if any(window.start <= event["t"] < window.end for window in scenario.windows)]
+        after_first = [event for event in items if event["t"] >= first]
+        injected = sum(event["fault"] in INJECTED for event in after_first)
+        failed = sum(map(_failed, after_first))
+        hit = [window for window in scenario.windows if any(fnmatch.fnmatchcase(event["path"], window.pattern) for event in items)]
+        end = max(window.end for window in hit or scenario.windows)
+        baseline_p95, baseline_errors = _health(baseline) if baseline else (None, None)
+        report[name] = {
+            "requests": len(items),
+            "injected": injected,
+            "failed": failed,
+            "error_amplification": round(failed / injected, 3) if injected else None,
+            "request_amplification": (
+                round((len(during) / fault_time) / (len(baseline) / first), 3) if baseline and fault_time else None
+            ),
+            "baseline_p95": baseline_p95,
+            "fault_p95": _health(during)[0] if during else None,
+            "recovery_seconds": _recovery(items, end, baseline_p95, baseline_errors, bucket) if baseline else None,
+        }
+    return report
+
+
+def _merged(windows):
+    """Union of the windows' time ranges, ignoring their globs."""
+    spans = []
+    for window in sorted(windows, key=lambda window: window.start):
+        if spans and window.start <= spans[-1].end:
+            spans[-1] = Window(spans[-1].start, max(spans[-1].end, window.end))
+        else:
+            spans.append(Window(window.start, window.end))
+    return spans
+
+
+def _recovery(events, end, baseline_p95, baseline_errors, bucket):
+    """Seconds from ``end`` until ``load.RECOVERY_WINDOW`` healthy buckets in a row."""
+    max_p95 = baseline_p95 * load.RECOVERY_FACTOR
+    max_errors = baseline_errors + load.RECOVERY_ERROR_RATE
+    buckets = collections.defaultdict(list)
+    for event in events:
+        if event["t"] >= end:
+            buckets[int(event["t"] // bucket)].append(event)
+    if not buckets:
+        return None
+    streak, healthy_since = 0, None
+    for index in range(int(math.ceil(end / bucket)), max(buckets) + 1):
+        p95, error_rate = _health(buckets[index]) if buckets.get(index) else (None, None)
+        if p95 is not None and p95 <= max_p95 and error_rate <= max_errors:
+            if streak == 0:
+                healthy_since = index * bucket
+            streak += 1
+            if streak >= load.RECOVERY_WINDOW:
+                return round(max(healthy_since - end, 0.0), 3)
+        else:
+            streak = 0
+    return None
+
+
+def print_report(scenario, report):
+    print(f"Scenario {scenario.name} ({scenario.duration:g}s):")
+    for window in scenario.windows:
+        print(f"  {window.spec()}")
+
+    def cell(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    print(f"{'dashboard':<12} {'requests':>8} {'injected':>8} {'failed':>7} {'err amp':>8} {'req amp':>8} {'base p95':>9} {'fault p95':>9} {'recovery':>9}")
+    for name, row in report.items():
+        print(
+            f"{name:<12} {row['requests']:>8} {row['injected']:>8} {row['failed']:>7} "
+            f"{cell(row['error_amplification'], '.2f'):>8} {cell(row['request_amplification'], '.2f'):>8} "
+            f"{cell(row['baseline_p95'] and row['baseline_p95'] * 1000, '.0f') + 'ms':>9} "
+            f"{cell(row['fault_p95'] and row['fault_p95'] * 1000, '.0f') + 'ms':>9} "
+            f"{cell(row['recovery_seconds'], '.1f') + 's':>9}"
+        )
+
+
+async def _run(args, scenario):
+    proxy = FaultProxy(args.upstream, scenario, [_route(spec) for spec in args.route], seed=args.seed)
+    server = await proxy.start(args.host, args.listen)
+    print(f"Fault proxy on http://{args.host}:{args.listen} -> {args.upstream} (scenario {scenario.name})", flush=True)
+    try:
+        if args.load:
+            run = load.LoadRun(
+                load.parse_profile(args.load),
+                flows=args.flows.split(","),
+                base_url=f"http://{args.host}:{args.listen}",
+            )
+            load.print_result(await run.run())
+        else:
+            async with server:
+                await server.serve_forever()
+    finally:
+        await proxy.close(server)
+        path = proxy.save()
+        print_report(scenario, analyze(scenario, [dataclasses.asdict(event) for event in proxy.events]))
+        print(f"Timeline: {path}")
+
+
+def _route(spec):
+    pattern, _, url = spec.partition("=")
+    if not url:
+        raise ValueError(f"expected GLOB=URL, got {spec!r}")
+    return pattern, url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Proxy the app through scheduled faults and report recovery per dashboard")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--listen", type=int, default=DEFAULT_PORT, help="port to listen on")
+    parser.add_argument("--upstream", default=config.BASE_URL, help="where requests are forwarded")
+    parser.add_argument("--route", action="append", default=[], metavar="GLOB=URL", help="forward these paths elsewhere")
+    parser.add_argument("--scenario", help=f"one of {', '.join(SCENARIOS)} or a JSON file")
+    parser.add_argument("--window", action="append", default=[], metavar="START-END@GLOB:FIELD=VALUE,...", help="extra fault window")
+    parser.add_argument("--seed", type=int, default=None, help="seed for latency and fault draws")
+    parser.add_argument("--standin", action="store_true", help="start harness.standin as the upstream")
+    parser.add_argument("--load", metavar="PROFILE", help="drive this harness.load profile through the proxy, then exit")
+    parser.add_argument("--flows", default=",".join(load.FLOWS), help="flows for --load")
+    parser.add_argument("--report", metavar="TIMELINE", help="only analyse a saved timeline")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        scenario, events = load_timeline(args.report)
+        print_report(scenario, analyze(scenario, events))
+        return 0
+
+    scenario = load_scenario(args.scenario, args.window)
+    backend = None
+    if args.standin:
+        parts = urllib.parse.urlsplit(args.upstream)
+        backend = standin.StandinServer(parts.port or 80, parts.hostname).start()
+    try:
+        asyncio.run(_run(args, scenario))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if backend is not None:
+            backend.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""HAR record/replay for the browser tests.
+
+With ``TESTSPRITE_HAR=record`` every context from ``harness.browser`` records
+a HAR (bodies embedded) to ``tmp/har/<test_id>.<n>.har``; auth headers and
+request cookies are redacted when the context is closed. With
+``TESTSPRITE_HAR=replay`` the recordings of the running test are served
+through ``context.route``, so the test needs neither the dev server nor
+Supabase and its edge functions::
+
+    TESTSPRITE_HAR=record python -m harness.runner -k TC004
+    TESTSPRITE_HAR=replay python -m harness.runner -k TC004
+    TESTSPRITE_HAR=replay TESTSPRITE_HAR_SCOPE=backend python -m harness.runner
+
+Requests are matched on method, URL and body after applying
+``harness/har_rules.json``: cache-busting query parameters are dropped,
+timestamps/UUIDs are masked, and auth headers only have to agree on the
+claims of their bearer JWT (e.g. ``role``), never on the token. Repeated
+requests replay their recorded responses in order, then keep the last one.
+Unmatched requests are aborted (``TESTSPRITE_HAR_FALLBACK=network`` lets them
+through) and listed when the context closes.
+
+``TESTSPRITE_HAR_SCOPE=backend`` replays only the backend URLs of the rules
+and serves the app itself live, which separates frontend regressions from
+backend ones. WebSockets (Vite HMR, Supabase realtime) are not replayed.
+"""
+
+import base64
+import binascii
+import collections
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import urllib.parse
+
+from harness import config, metrics
+
+MODE_ENV = "TESTSPRITE_HAR"
+SCOPE_ENV = "TESTSPRITE_HAR_SCOPE"
+FALLBACK_ENV = "TESTSPRITE_HAR_FALLBACK"
+HAR_DIR = os.environ.get("TESTSPRITE_HAR_DIR", os.path.join(config.TMP_DIR, "har"))
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "har_rules.json")
+RECORD = "record"
+REPLAY = "replay"
+REDACTED = "<redacted>"
+MASK = "{dynamic}"
+
+# Recompressed or recomputed by the browser for a fulfilled body
+DROP_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+# context -> HAR path, and every path recorded by this process
+_recordings = {}
+_recorded = []
+_replay = None
+
+
+def mode():
+    value = os.environ.get(MODE_ENV, "").strip().lower()
+    if value not in ("", RECORD, REPLAY):
+        raise ValueError(f"{MODE_ENV} must be {RECORD!r} or {REPLAY!r}, not {value!r}")
+    return value or None
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, encoding="utf-8") as source:
+        rules = json.load(source)
+    rules["dynamic_values"] = [re.compile(pattern) for pattern in rules["dynamic_values"]]
+    rules["backend"] = [re.compile(pattern) for pattern in rules["backend"]]
+    rules["auth_headers"] = {name.lower() for name in rules["auth_headers"]}
+    rules["ignore_params"] = set(rules["ignore_params"])
+    return rules
+
+
+def _mask(text, rules):
+    for pattern in rules["dynamic_values"]:
+        text = pattern.sub(MASK, text)
+    return text
+
+
+def _jwt_claims(token):
+    try:
+        payload = token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError, binascii.Error):
+        return {}
+
+
+def identity(headers, rules):
+    """Who a request is authenticated as, from the ``auth_claims`` of its bearer token."""
+    headers = {name.lower(): value for name, value in headers.items()}
+    token = headers.get("authorization", "")
+    if not token.lower().startswith("bearer "):
+        return "anonymous" if not token else "token"
+    claims = _jwt_claims(token[7:].strip())
+    return ",".join(f"{claim}={claims.get(claim)}" for claim in rules["auth_claims"])
+
+
+def request_key(method, url, body, auth, rules):
+    """Matching key of a request; equal keys replay the same recorded responses."""
+    parts = urllib.parse.urlsplit(url)
+    query = sorted(
+        (name, _mask(value, rules))
+        for name, value in urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+        if name not in rules["ignore_params"]
+    )
+    digest = hashlib.sha256(_mask(body, rules).encode("utf-8")).hexdigest()[:16] if body else ""
+    return (method.upper(), f"{parts.scheme}://{parts.netloc}{parts.path}", urllib.parse.urlencode(query), auth, digest)
+
+
+def is_backend(url, rules):
+    return any(pattern.search(url) for pattern in rules["backend"])
+
+
+def _next_path():
+    test_id = metrics.test_id()
+    if not _recorded:
+        # First context of this run: replace the previous recording of the test
+        for old in glob.glob(os.path.join(HAR_DIR, f"{glob.escape(test_id)}.*.har")):
+            os.remove(old)
+    os.makedirs(HAR_DIR, exist_ok=True)
+    path = os.path.join(HAR_DIR, f"{test_id}.{len(_recorded):02d}.har")
+    _recorded.append(path)
+    return path
+
+
+def context_options(options):
+    """``browser.new_context`` options for the current mode."""
+    if mode() == RECORD and "record_har_path" not in options:
+        options = dict(options, record_har_path=_next_path(), record_har_content="embed")
+    return options
+
+
+def redact(path, rules):
+    """Remove credentials from a recorded HAR, keeping each request's identity for matching."""
+    with open(path, encoding="utf-8") as source:
+        har = json.load(source)
+    for entry in har["log"]["entries"]:
+        request = entry["request"]
+        headers = {header["name"]: header["value"] for header in request.get("headers", [])}
+        entry.setdefault("_identity", identity(headers, rules))
+        for header in request.get("headers", []):
+            if header["name"].lower() in rules["auth_headers"]:
+                header["value"] = REDACTED
+        for cookie in request.get("cookies", []):
+            cookie["value"] = REDACTED
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        json.dump(har, out, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class Replay:
+    """Recorded responses of one test, indexed by ``request_key``."""
+
+    def __init__(self, paths, rules):
+        self.rules = rules
+        self.responses = collections.defaultdict(list)
+        self.served = collections.Counter()
+        self.unmatched = []
+        for path in paths:
+            with open(path, encoding="utf-8") as source:
+                for entry in json.load(source)["log"]["entries"]:
+                    request = entry["request"]
+                    auth = entry.get("_identity") or identity(
+                        {header["name"]: header["value"] for header in request.get("headers", [])}, rules
+                    )
+                    key = request_key(
+                        request["method"], request["url"], request.get("postData", {}).get("text", ""), auth, rules
+                    )
+                    self.responses[key].append(entry["response"])
+
+    def next(self, key):
+        """The next recorded response for ``key``; the last one repeats once they run out."""
+        recorded = self.responses.get(key)
+        if not recorded:
+            return None
+        index = min(self.served[key], len(recorded) - 1)
+        self.served[key] += 1
+        return recorded[index]
+
+    async def handle(self, route, request):
+        backend_only = os.environ.get(SCOPE_ENV, "all") == "backend"
+        if backend_only and not is_backend(request.url, self.rules):
+            await route.fallback()
+            return
+        body = request.post_data_buffer
+        key = request_key(
+            request.method, request.url, body.decode("utf-8", "replace") if body else "",
+            identity(request.headers, self.rules), self.rules,
+        )
+        response = self.next(key)
+        if response is None:
+            self.unmatched.append(f"{request.method} {request.url}")
+            if os.environ.get(FALLBACK_ENV) == "network":
+                await route.fallback()
+            else:
+                await route.abort("internetdisconnected")
+            return
+        content = response.get("content", {})
+        text = content.get("text", "")
+        payload = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+        headers = {
+            header["name"]: header["value"]
+            for header in response.get("headers", [])
+            if header["name"].lower() not in DROP_RESPONSE_HEADERS
+        }
+        await route.fulfill(status=response["status"], headers=headers, body=payload)
+
+
+def _load_replay():
+    global _replay
+    if _replay is None:
+        test_id = metrics.test_id()
+        paths = sorted(glob.glob(os.path.join(HAR_DIR, f"{glob.escape(test_id)}.*.har")))
+        if not paths:
+            raise FileNotFoundError(f"No HAR recorded for {test_id} in {HAR_DIR}; run it with {MODE_ENV}={RECORD} first")
+        _replay = Replay(paths, load_rules())
+    return _replay
+
+
+async def attach(context, options):
+    """Start recording or replaying for a context created with ``context_options()``."""
+    current = mode()
+    if current == RECORD and options.get("record_har_path"):
+        _recordings[context] = options["record_har_path"]
+    elif current == REPLAY:
+        await context.route("**/*", _load_replay().handle)
+
+
+def finish(context):
+    """Post-process a closed context: redact its recording, report unmatched replays."""
+    path = _recordings.pop(context, None)
+    if path and os.path.exists(path):
+        redact(path, load_rules())
+    if _replay is not None and _replay.unmatched:
+        print(
+            f"HAR replay: {len(_replay.unmatched)} requests without a recorded response:\n  "
+            + "\n  ".join(_replay.unmatched[:20]),
+            file=sys.stderr,
+        )
+        _replay.unmatched.clear()
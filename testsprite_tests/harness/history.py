@@ -0,0 +1,226 @@
+"""Historical store of TestSprite runs.
+
+``tmp/test_results.json`` is overwritten by every run. ``ingest`` appends its
+contents to a SQLite database (``tmp/history.sqlite``, or
+``TESTSPRITE_HISTORY_DB``) so results can be queried across runs:
+
+* one ``runs`` row per distinct results file (re-importing the same file is
+  a no-op, keyed by its SHA-256);
+* one ``results`` row per test, with the duration derived from its
+  ``created``/``modified`` timestamps and indexes on test ID, status and time;
+* test ``code`` stored once per content hash in ``code``.
+
+::
+
+    python -m harness.history ingest                    # tmp/test_results.json
+    python -m harness.history duration TC007 --last 50  # p50/p95/max
+    python -m harness.history first-failure TC004
+    python -m harness.history show TC004 --last 10
+
+``TC007`` style IDs come from the result title; pass ``--type FRONTEND`` or
+``BACKEND`` when both plans have a test with that number.
+"""
+
+import argparse
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from harness import config
+
+DB_PATH = os.environ.get("TESTSPRITE_HISTORY_DB", os.path.join(config.TMP_DIR, "history.sqlite"))
+RESULTS_PATH = os.path.join(config.TMP_DIR, "test_results.json")
+PASSED = "PASSED"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    source_hash TEXT NOT NULL UNIQUE,
+    source TEXT,
+    imported_at REAL NOT NULL,
+    started_ts REAL
+);
+CREATE TABLE IF NOT EXISTS code (
+    hash TEXT PRIMARY KEY,
+    code TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    tc TEXT,
+    title TEXT,
+    test_type TEXT,
+    status TEXT NOT NULL,
+    error TEXT,
+    code_hash TEXT REFERENCES code(hash),
+    created_ts REAL,
+    modified_ts REAL,
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS results_test_time ON results(test_id, created_ts);
+CREATE INDEX IF NOT EXISTS results_tc_time ON results(tc, created_ts);
+CREATE INDEX IF NOT EXISTS results_status_time ON results(status, created_ts);
+CREATE INDEX IF NOT EXISTS results_time ON results(created_ts);
+"""
+
+TC_ID = re.compile(r"^(TC\d+)")
+
+
+def connect(path=DB_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    db.executescript(SCHEMA)
+    return db
+
+
+def _timestamp(value):
+    if not value:
+        return None
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def ingest(db, path=RESULTS_PATH):
+    """Append the results in ``path`` as a new run; return its ID, or None if already stored."""
+    with open(path, "rb") as source:
+        raw = source.read()
+    source_hash = hashlib.sha256(raw).hexdigest()
+    if db.execute("SELECT 1 FROM runs WHERE source_hash = ?", (source_hash,)).fetchone():
+        return None
+    results = json.loads(raw)
+
+    with db:
+        created = [_timestamp(result.get("created")) for result in results]
+        run_id = db.execute(
+            "INSERT INTO runs (source_hash, source, imported_at, started_ts) VALUES (?, ?, ?, ?)",
+            (source_hash, os.path.abspath(path), time.time(), min(filter(None, created), default=None)),
+        ).lastrowid
+        for result, created_ts in zip(results, created):
+            code_hash = None
+            if result.get("code"):
+                code_hash = hashlib.sha256(result["code"].encode("utf-8")).hexdigest()
+                db.execute("INSERT OR IGNORE INTO code (hash, code) VALUES (?, ?)", (code_hash, result["code"]))
+            modified_ts = _timestamp(result.get("modified"))
+            match = TC_ID.match(result.get("title", ""))
+            db.execute(
+                "INSERT INTO results (run_id, test_id, tc, title, test_type, status, error, code_hash,"
+                " created_ts, modified_ts, duration) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    run_id,
+                    result["testId"],
+                    match.group(1) if match else None,
+                    result.get("title"),
+                    result.get("testType"),
+                    result.get("testStatus", "UNKNOWN"),
+                    result.get("testError"),
+                    code_hash,
+                    created_ts,
+                    modified_ts,
+                    modified_ts - created_ts if created_ts and modified_ts else None,
+                ),
+            )
+    return run_id
+
+
+def _where(test, test_type):
+    """SQL filter for a ``TC007`` style ID or a TestSprite testId."""
+    clause, params = ("tc = ?", [test]) if TC_ID.fullmatch(test) else ("test_id = ?", [test])
+    if test_type:
+        clause += " AND test_type = ?"
+        params.append(test_type.upper())
+    return clause, params
+
+
+def recent(db, test, last=50, test_type=None):
+    """The ``last`` results of ``test``, newest first."""
+    clause, params = _where(test, test_type)
+    return db.execute(
+        f"SELECT * FROM results WHERE {clause} ORDER BY created_ts DESC LIMIT ?", params + [last]
+    ).fetchall()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+def duration_stats(db, test, last=50, test_type=None):
+    """``{"runs", "p50", "p95", "max"}`` of ``test``'s durations over its ``last`` runs."""
+    durations = [row["duration"] for row in recent(db, test, last, test_type) if row["duration"] is not None]
+    return {
+        "runs": len(durations),
+        "p50": percentile(durations, 0.5),
+        "p95": percentile(durations, 0.95),
+        "max": max(durations, default=None),
+    }
+
+
+def first_failure(db, test, test_type=None):
+    """The result that started ``test``'s current failing streak, or None if it last passed."""
+    clause, params = _where(test, test_type)
+    rows = db.execute(f"SELECT * FROM results WHERE {clause} ORDER BY created_ts DESC", params)
+    first = None
+    for row in rows:
+        if row["status"] == PASSED:
+            break
+        first = row
+    return first
+
+
+def _when(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S") if timestamp else "-"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store and query TestSprite results across runs")
+    parser.add_argument("--db", default=DB_PATH, help="SQLite database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest_cmd = commands.add_parser("ingest", help="append result files as new runs")
+    ingest_cmd.add_argument("paths", nargs="*", default=[RESULTS_PATH])
+    for name, help_text in (
+        ("duration", "duration percentiles of a test"),
+        ("first-failure", "run where the current failing streak started"),
+        ("show", "latest results of a test"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("test", help="TC007 style ID or TestSprite testId")
+        command.add_argument("--type", dest="test_type", help="FRONTEND or BACKEND")
+        command.add_argument("--last", type=int, default=50, help="number of runs to consider")
+    args = parser.parse_args(argv)
+
+    with contextlib.closing(connect(args.db)) as db:
+        if args.command == "ingest":
+            for path in args.paths:
+                run_id = ingest(db, path)
+                print(f"{path}: {'already stored' if run_id is None else f'stored as run {run_id}'}")
+        elif args.command == "duration":
+            stats = duration_stats(db, args.test, args.last, args.test_type)
+            if not stats["runs"]:
+                print(f"No results for {args.test}")
+                return 1
+            print(f"{args.test} over {stats['runs']} runs: p50 {stats['p50']:.1f}s  p95 {stats['p95']:.1f}s  max {stats['max']:.1f}s")
+        elif args.command == "first-failure":
+            row = first_failure(db, args.test, args.test_type)
+            if not recent(db, args.test, 1, args.test_type):
+                print(f"No results for {args.test}")
+                return 1
+            if row is None:
+                print(f"{args.test} is not failing")
+            else:
+                print(f"{row['title']} failing since run {row['run_id']} ({_when(row['created_ts'])})")
+        else:
+            for row in recent(db, args.test, args.last, args.test_type):
+                duration = f"{row['duration']:.1f}s" if row["duration"] is not None else "-"
+                print(f"run {row['run_id']:<5} {_when(row['created_ts'])}  {row['status']:<8} {duration:>8}  {row['title']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""Change-aware test selection.
+
+Maps a git diff to the TC scripts that cover it:
+
+1. every changed file under ``src/`` is expanded to the files that import it,
+   directly or transitively, using a static import graph of ``src/``
+   (``import``/``export ... from``, side-effect and dynamic ``import()``,
+   with the ``@/`` alias and extension/``index`` resolution Vite uses);
+2. the affected files are matched against the feature -> files mapping in
+   ``tmp/code_summary.json``;
+3. each affected feature selects its scripts from ``FEATURE_TESTS``.
+
+Changed TC scripts select themselves, and changes to the harness, the build
+setup or the app shell (``GLOBAL_PATTERNS``) select everything. The import
+graph is cached in ``tmp/cache/import_graph.json`` and only files whose size
+or mtime changed are re-parsed, so selection over the ~650 files of ``src/``
+takes about 20 ms::
+
+    python -m harness.impact                    # working tree vs HEAD
+    python -m harness.impact --base origin/main
+    python -m harness.runner --changed origin/main
+"""
+
+import argparse
+import collections
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from harness import config
+
+REPO_DIR = os.path.dirname(config.TESTS_DIR)
+SRC_DIR = os.path.join(REPO_DIR, "src")
+CODE_SUMMARY_PATH = os.path.join(config.TMP_DIR, "code_summary.json")
+GRAPH_PATH = os.path.join(config.CACHE_DIR, "import_graph.json")
+
+SOURCE_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx")
+ALIAS = ("@/", "src/")
+IMPORT_RE = re.compile(r"""\bfrom\s*['"]([^'"]+)['"]|\bimport\s*\(?\s*['"]([^'"]+)['"]""")
+
+# Changes here can affect every test
+GLOBAL_PATTERNS = [
+    "src/main.tsx",
+    "src/App.tsx",
+    "src/index.css",
+    "src/i18n.ts",
+    "index.html",
+    "package.json",
+    "package-lock.json",
+    "vite.config.ts",
+    "tailwind.config.ts",
+    "tsconfig*.json",
+    "testsprite_tests/harness/*",
+]
+
+# Feature names from tmp/code_summary.json -> TC scripts (runner test IDs) covering them
+FEATURE_TESTS = {
+    "Multi-Profile Authentication System": [
+        "TC001_Multi_Profile_Authentication_Success",
+        "TC001_multi_profile_authentication_redirection",
+        "TC002_Multi_Profile_Authentication_Failure",
+        "TC012_Security_Compliance_with_LGPD_and_RBAC_Access_Control",
+    ],
+    "Municipal Dashboard": [
+        "TC002_municipal_dashboard_kpi_display",
+        "TC014_Performance_and_Load_Testing",
+    ],
+    "Hospital Dashboard": [
+        "TC003_hospital_dashboard_operational_indicators",
+        "TC004_Hospital_Dashboard_Functional_Testing",
+    ],
+    "ERP Integration System": [
+        "TC004_erp_integration_error_rate_and_response_time",
+        "TC005_ERP_Hospital_Integration_with_Philips_Tasy_and_SOUL_MV",
+        "TC006_Integration_with_DATASUS_API_Services",
+    ],
+    "e-SUS APS Integration": [
+        "TC005_e_sus_aps_integration_configuration",
+        "TC007_e_SUS_APS_Integration_Configuration_and_Orchestration",
+    ],
+    "Geriatric Care System": [
+        "TC008_Geriatric_Care_System_Module_Access_and_Functionality",
+    ],
+    "Epidemic Alert System": [
+        "TC006_epidemic_alert_notifications",
+        "TC009_Epidemic_Alert_System_Notification_and_Mapping",
+    ],
+    "Navigation and Layout System": [
+        "TC007_navigation_sidebar_responsiveness",
+        "TC010_Responsive_Navigation_Sidebar_and_Layout_per_Profile",
+    ],
+    "Landing Pages": [
+        "TC001_Multi_Profile_Authentication_Success",
+        "TC001_multi_profile_authentication_redirection",
+        "TC002_Multi_Profile_Authentication_Failure",
+    ],
+    "Public Health Management": [
+        "TC015_Public_Health_Management_Tools_Functional_Test",
+    ],
+    "Telemedicine System": [
+        "TC008_telemedicine_session_management",
+        "TC011_Telemedicine_Session_Management_Functionality",
+    ],
+    "AI Analytics Dashboard": [
+        "TC009_ai_analytics_predictive_insights",
+    ],
+    "Security Dashboard": [
+        "TC012_Security_Compliance_with_LGPD_and_RBAC_Access_Control",
+    ],
+    "Internationalization System": [
+        "TC010_internationalization_language_support",
+        "TC013_Internationalization_and_Language_Switching",
+    ],
+    "DATASUS MCP Server": [
+        "TC005_e_sus_aps_integration_configuration",
+        "TC006_Integration_with_DATASUS_API_Services",
+        "TC007_e_SUS_APS_Integration_Configuration_and_Orchestration",
+    ],
+    "User Profile Management": [
+        "TC001_Multi_Profile_Authentication_Success",
+        "TC012_Security_Compliance_with_LGPD_and_RBAC_Access_Control",
+    ],
+}
+
+
+# Files code_summary.json leaves out, as globs per feature
+EXTRA_FEATURE_FILES = {
+    "Internationalization System": ["public/locales/*/*.json", "src/locales/*/*.json"],
+}
+
+
+class Selection:
+    def __init__(self):
+        self.tests = set()
+        self.run_all = False
+        # test ID or "*" -> reasons it was selected
+        self.reasons = collections.defaultdict(list)
+        # changed files that reach no feature and no test
+        self.uncovered = []
+
+    def add(self, test_id, reason):
+        self.tests.add(test_id)
+        self.reasons[test_id].append(reason)
+
+
+def _resolve(importer, spec, known):
+    if spec.startswith(ALIAS[0]):
+        base = ALIAS[1] + spec[len(ALIAS[0]):]
+    elif spec.startswith("."):
+        base = os.path.normpath(os.path.join(os.path.dirname(importer), spec)).replace(os.sep, "/")
+    else:
+        return None  # package import
+    candidates = [base] + [base + ext for ext in SOURCE_EXTENSIONS] + [f"{base}/index{ext}" for ext in SOURCE_EXTENSIONS]
+    for candidate in candidates:
+        if candidate in known:
+            return candidate
+    return None
+
+
+def _scan():
+    """``{repo-relative path: (size, mtime_ns)}`` for every file under ``src/``."""
+    found = {}
+    stack = [SRC_DIR]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    found[os.path.relpath(entry.path, REPO_DIR).replace(os.sep, "/")] = (stat.st_size, stat.st_mtime_ns)
+    return found
+
+
+def fingerprint():
+    """SHA-256 over the path, size and mtime of every file under ``src/``."""
+    digest = hashlib.sha256()
+    for name, (size, mtime) in sorted(_scan().items()):
+        digest.update(f"{name}\0{size}\0{mtime}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def import_graph(path=GRAPH_PATH):
+    """Return ``{file: [imported files]}`` for ``src/``, re-parsing only changed files."""
+    try:
+        with open(path, encoding="utf-8") as cached:
+            cache = json.load(cached)
+    except (OSError, ValueError):
+        cache = {}
+    files = _scan()
+    graph = {}
+    dirty = set(cache) - set(files)
+    raw = {}
+    for name, (size, mtime) in files.items():
+        entry = cache.get(name)
+        if entry and entry["size"] == size and entry["mtime"] == mtime:
+            raw[name] = entry["specs"]
+            continue
+        dirty.add(name)
+        specs = []
+        if name.endswith(SOURCE_EXTENSIONS):
+            with open(os.path.join(REPO_DIR, name), encoding="utf-8", errors="replace") as source:
+                specs = sorted({a or b for a, b in IMPORT_RE.findall(source.read())})
+        raw[name] = specs
+
+    # Resolution depends on which files exist, so it is redone on every call (cheap);
+    # only the parsing above is cached
+    for name, specs in raw.items():
+        graph[name] = sorted(filter(None, (_resolve(name, spec, files) for spec in specs)))
+
+    if dirty:
+        cache = {name: {"size": files[name][0], "mtime": files[name][1], "specs": raw[name]} for name in files}
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            json.dump(cache, out)
+        os.replace(tmp_path, path)
+    return graph
+
+
+def reverse_graph(graph):
+    reverse = collections.defaultdict(set)
+    for name, imports in graph.items():
+        for imported in imports:
+            reverse[imported].add(name)
+    return reverse
+
+
+def importers(reverse, changed):
+    """Every file that depends on one of ``changed`` (inclusive), given ``reverse_graph()``."""
+    seen = set(changed)
+    queue = collections.deque(changed)
+    while queue:
+        for parent in reverse.get(queue.popleft(), ()):
+            if parent not in seen:
+                seen.add(parent)
+                queue.append(parent)
+    return seen
+
+
+def load_features(path=CODE_SUMMARY_PATH):
+    with open(path, encoding="utf-8") as source:
+        features = {feature["name"]: list(feature["files"]) for feature in json.load(source)["features"]}
+    for name, patterns in EXTRA_FEATURE_FILES.items():
+        features.setdefault(name, []).extend(patterns)
+    return features
+
+
+def changed_files(base="HEAD"):
+    """Files changed between the merge base of ``base`` and the working tree, plus untracked ones."""
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_DIR, capture_output=True, text=True, check=True).stdout
+
+    merge_base = git("merge-base", base, "HEAD").strip() if base != "HEAD" else "HEAD"
+    names = git("diff", "--name-only", merge_base).splitlines()
+    names += git("ls-files", "--others", "--exclude-standard").splitlines()
+    return sorted(set(filter(None, names)))
+
+
+def select(changed, features=None, graph=None):
+    """Return the ``Selection`` for a list of repo-relative changed paths."""
+    features = load_features() if features is None else features
+    selection = Selection()
+    source_changes = []
+    for name in changed:
+        if any(fnmatch.fnmatch(name, pattern) for pattern in GLOBAL_PATTERNS):
+            selection.run_all = True
+            selection.reasons["*"].append(name)
+        elif name.startswith("testsprite_tests/TC") and name.endswith(".py"):
+            selection.add(os.path.splitext(os.path.basename(name))[0], name)
+        else:
+            source_changes.append(name)
+    if not source_changes:
+        return selection
+
+    reverse = reverse_graph(import_graph() if graph is None else graph)
+    for name in source_changes:
+        affected = importers(reverse, [name])
+        reached = False
+        for feature, files in features.items():
+            hits = [path for path in files if path in affected or fnmatch.fnmatch(name, path)]
+            if not hits:
+                continue
+            reached = True
+            via = name if hits[0] == name or "*" in hits[0] else f"{name} via {hits[0]}"
+            for test_id in FEATURE_TESTS.get(feature, []):
+                selection.add(test_id, f"{feature}: {via}")
+        if not reached:
+            selection.uncovered.append(name)
+    return selection
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List the TC scripts affected by a git diff")
+    parser.add_argument("files", nargs="*", help="changed files (default: from git)")
+    parser.add_argument("--base", default="HEAD", help="compare the working tree with the merge base of this ref")
+    parser.add_argument("--explain", action="store_true", help="show why each test was selected")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    changed = args.files or changed_files(args.base)
+    selection = select(changed)
+    elapsed = time.perf_counter() - started
+
+    if selection.run_all:
+        print(f"All tests: {', '.join(selection.reasons['*'])} changed")
+    for test_id in sorted(selection.tests):
+        print(test_id)
+        if args.explain:
+            for reason in sorted(set(selection.reasons[test_id])):
+                print(f"    {reason}")
+    if selection.uncovered:
+        print(f"Not covered by any test: {', '.join(selection.uncovered)}", file=sys.stderr)
+    print(f"{len(changed)} changed files, {len(selection.tests)} tests selected in {elapsed * 1000:.1f}ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
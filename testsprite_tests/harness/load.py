@@ -0,0 +1,376 @@
+"""Open-loop load generator for the TC014 performance scenarios.
+
+Virtual users run the Gestor, Médico and Paciente login + dashboard flows
+against the app's static routes and API. Arrivals follow a constant-arrival-
+rate schedule per stage, independent of how fast the system answers, and
+every iteration's latency is measured from its *intended* start time, so
+queueing behind slow responses is counted instead of hidden (no coordinated
+omission).
+
+Load profiles are lists of ``duration@rate`` stages (arrivals per second),
+e.g. ``"20s@20,10s@200,40s@20"`` for a 10 s spike to 10x the baseline. A few
+named profiles are in ``PROFILES``::
+
+    python -m harness.load --profile spike --max-vus 300
+    python -m harness.load --profile "30s@50,5s@500,30s@50" --flows gestor --json tmp/load.json
+
+The result reports log-bucketed (HdrHistogram style) latency percentiles,
+availability and, for every spike stage, the time until latency and errors
+return to the pre-spike baseline.
+"""
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import dataclasses
+import json
+import math
+import re
+import sys
+import threading
+
+import requests
+
+from harness import api_client, config
+
+# Each flow is a login step followed by the profile's dashboard, hitting both
+# the SPA route (static) and the API contract the backend TCs exercise
+FLOWS = {
+    "gestor": [
+        ("POST", "/api/auth/login", "login"),
+        ("GET", "/prefeitura-dashboard", "dashboard-route"),
+        ("GET", "/dashboard/municipal", "dashboard-api"),
+    ],
+    "medico": [
+        ("POST", "/api/auth/login", "login"),
+        ("GET", "/transcricao-atendimento", "dashboard-route"),
+        ("GET", "/dashboard/medical", "dashboard-api"),
+    ],
+    "paciente": [
+        ("POST", "/api/auth/login", "login"),
+        ("GET", "/patient/dashboard", "dashboard-route"),
+        ("GET", "/dashboard/patient", "dashboard-api"),
+    ],
+}
+
+PROFILES = {
+    "steady": "60s@20",
+    "spike": "20s@20,10s@200,40s@20",
+    "double-spike": "20s@20,5s@200,25s@20,5s@300,30s@20",
+    "ramp": "15s@10,15s@40,15s@80,15s@160",
+}
+
+REQUEST_TIMEOUT = 10
+# Names the flow of every request, so harness.faultproxy can attribute it to a dashboard
+FLOW_HEADER = "X-Testsprite-Flow"
+DEFAULT_MAX_VUS = 200
+# A bucket counts as recovered when its p95 is within this factor of the baseline
+RECOVERY_FACTOR = 1.5
+RECOVERY_ERROR_RATE = 0.01
+# ...and stays that way for this many consecutive buckets
+RECOVERY_WINDOW = 3
+BUCKET_SECONDS = 1.0
+
+
+class Histogram:
+    """Latency histogram with log-sized buckets (~1% relative precision) and exact max."""
+
+    def __init__(self, precision=0.01):
+        self.base = math.log1p(precision)
+        self.counts = collections.Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        micros = max(seconds * 1e6, 1.0)
+        self.counts[int(math.log(micros) / self.base)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(percent / 100 * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(math.exp((index + 1) * self.base) / 1e6, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+@dataclasses.dataclass
+class Stage:
+    duration: float
+    rate: float
+
+
+@dataclasses.dataclass
+class Sample:
+    intended: float  # seconds since the run started
+    latency: float  # from intended start to the end of the flow
+    flow: str
+    ok: bool
+    error: str = None
+
+
+def parse_profile(spec):
+    """Parse ``"20s@20,10s@200"`` (or a ``PROFILES`` name) into ``Stage`` objects."""
+    spec = PROFILES.get(spec, spec)
+    stages = []
+    for part in spec.split(","):
+        match = re.fullmatch(r"\s*([\d.]+)s?@([\d.]+)\s*", part)
+        if not match:
+            raise ValueError(f"Bad load stage {part!r}, expected e.g. 30s@20")
+        stages.append(Stage(float(match.group(1)), float(match.group(2))))
+    return stages
+
+
+def arrivals(stages):
+    """Yield intended start offsets for a constant arrival rate within each stage."""
+    start = 0.0
+    for stage in stages:
+        if stage.rate > 0:
+            interval = 1.0 / stage.rate
+            count = int(stage.duration * stage.rate)
+            for index in range(count):
+                yield start + index * interval
+        start += stage.duration
+
+
+class LoadRun:
+    def __init__(self, stages, flows=None, max_vus=DEFAULT_MAX_VUS, base_url=None, timeout=REQUEST_TIMEOUT):
+        self.stages = stages
+        self.flows = {name: FLOWS[name] for name in (flows or FLOWS)}
+        self.max_vus = max_vus
+        self.base_url = base_url or config.BASE_URL
+        self.timeout = timeout
+        self.samples = []
+        self.steps = collections.defaultdict(Histogram)
+        self._local = threading.local()
+        self._steps_lock = threading.Lock()
+
+    def _client(self):
+        # One keep-alive client per virtual user thread
+        if not hasattr(self._local, "client"):
+            self._local.client = api_client.Client(self.base_url, pool_size=2)
+            # The run keeps its own histograms; per-request records would flood the metrics files
+            self._local.client.timing_listeners.clear()
+        return self._local.client
+
+    def _run_flow(self, name):
+        client = self._client()
+        # Keep the pooled connections but start every iteration as a new, logged-out user
+        # (the client keeps no cookies, so the token is the only session state)
+        client.clear_token()
+        for method, path, step in self.flows[name]:
+            payload = {"profile": name, "email": f"{name}@demo.saudepublica.br", "password": "demo"} if method == "POST" else None
+            try:
+                resp = client.request(method, path, json=payload, headers={FLOW_HEADER: name}, timeout=self.timeout)
+            except requests.RequestException as exc:
+                return f"{step}: {type(exc).__name__}"
+            with self._steps_lock:
+                self.steps[f"{name}:{step}"].record(resp.timing.total)
+            if resp.status_code >= 400:
+                return f"{step}: HTTP {resp.status_code}"
+            if step == "login":
+                try:
+                    token = resp.json().get("access_token")
+                except (ValueError, AttributeError):
+                    token = None
+                if token:
+                    client.set_token(token)
+        return None
+
+    async def _iteration(self, loop, executor, name, started, intended):
+        error = await loop.run_in_executor(executor, self._run_flow, name)
+        latency = loop.time() - (started + intended)
+        self.samples.append(Sample(intended, latency, name, error is None, error))
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_vus, thread_name_prefix="vu")
+        names = list(self.flows)
+        tasks = []
+        started = loop.time()
+        try:
+            for index, intended in enumerate(arrivals(self.stages)):
+                delay = started + intended - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Fire on schedule even when every virtual user is busy; the
+                # wait for a free one is part of the measured latency
+                name = names[index % len(names)]
+                tasks.append(asyncio.ensure_future(self._iteration(loop, executor, name, started, intended)))
+            await asyncio.gather(*tasks)
+        finally:
+            executor.shutdown(wait=True)
+        return self.result(loop.time() - started)
+
+    def result(self, wall):
+        overall = Histogram()
+        per_flow = collections.defaultdict(Histogram)
+        for sample in self.samples:
+            overall.record(sample.latency)
+            per_flow[sample.flow].record(sample.latency)
+        ok = sum(sample.ok for sample in self.samples)
+        errors = collections.Counter(sample.error for sample in self.samples if not sample.ok)
+        return LoadResult(
+            stages=self.stages,
+            wall=wall,
+            iterations=len(self.samples),
+            availability=100.0 * ok / len(self.samples) if self.samples else 0.0,
+            latency=overall.summary(),
+            flows={name: hist.summary() for name, hist in sorted(per_flow.items())},
+            steps={name: hist.summary() for name, hist in sorted(self.steps.items())},
+            errors=dict(errors.most_common(10)),
+            recovery=recovery_times(self.samples, self.stages),
+        )
+
+
+@dataclasses.dataclass
+class LoadResult:
+    stages: list
+    wall: float
+    iterations: int
+    availability: float
+    latency: dict
+    flows: dict
+    steps: dict
+    errors: dict
+    recovery: list
+
+    def as_dict(self):
+        return dataclasses.asdict(self)
+
+
+def _bucket_health(samples):
+    hist = Histogram()
+    for sample in samples:
+        hist.record(sample.latency)
+    errors = sum(not sample.ok for sample in samples)
+    return hist.percentile(95), errors / len(samples) if samples else 0.0
+
+
+def recovery_times(samples, stages, bucket=BUCKET_SECONDS):
+    """For each stage whose rate exceeds the first stage's, the seconds from the
+    end of that spike until latency and errors are back near the baseline
+    (``None`` if they never recover during the run).
+    """
+    if len(stages) < 2:
+        return []
+    baseline_rate = stages[0].rate
+    baseline = [sample for sample in samples if sample.intended < stages[0].duration]
+    if not baseline:
+        return []
+    baseline_p95, baseline_errors = _bucket_health(baseline)
+    max_p95 = baseline_p95 * RECOVERY_FACTOR
+    max_errors = baseline_errors + RECOVERY_ERROR_RATE
+
+    buckets = collections.defaultdict(list)
+    for sample in samples:
+        buckets[int(sample.intended // bucket)].append(sample)
+    run_end = sum(stage.duration for stage in stages)
+
+    spikes = []
+    offset = 0.0
+    for stage in stages:
+        offset += stage.duration
+        if stage.rate <= baseline_rate:
+            continue
+        spike_end = offset
+        first = int(math.ceil(spike_end / bucket))
+        last = int(run_end // bucket)
+        healthy_since = None
+        streak = 0
+        for index in range(first, last + 1):
+            p95, error_rate = _bucket_health(buckets.get(index, []))
+            if buckets.get(index) and p95 <= max_p95 and error_rate <= max_errors:
+                if streak == 0:
+                    healthy_since = index * bucket
+                streak += 1
+                if streak >= RECOVERY_WINDOW:
+                    break
+            else:
+                streak = 0
+        recovered = streak >= RECOVERY_WINDOW
+        spikes.append(
+            {
+                "spike_end": spike_end,
+                "rate": stage.rate,
+                "recovery_seconds": max(healthy_since - spike_end, 0.0) if recovered else None,
+            }
+        )
+    return spikes
+
+
+def run(stages, **kwargs):
+    """Run a load profile synchronously and return its ``LoadResult``."""
+    return asyncio.run(LoadRun(stages, **kwargs).run())
+
+
+def _format_summary(name, summary):
+    return (
+        f"{name:<28} n={summary['count']:<6d} p50={summary['p50'] * 1000:8.1f}ms p95={summary['p95'] * 1000:8.1f}ms "
+        f"p99={summary['p99'] * 1000:8.1f}ms max={summary['max'] * 1000:8.1f}ms"
+    )
+
+
+def print_result(result):
+    print(f"{result.iterations} iterations in {result.wall:.1f}s, availability {result.availability:.3f}%")
+    print(_format_summary("all flows", result.latency))
+    for name, summary in result.flows.items():
+        print(_format_summary(f"flow {name}", summary))
+    for name, summary in result.steps.items():
+        print(_format_summary(f"  {name}", summary))
+    for spike in result.recovery:
+        recovery = spike["recovery_seconds"]
+        recovered = f"{recovery:.1f}s" if recovery is not None else "not recovered"
+        print(f"spike to {spike['rate']:g}/s ending at {spike['spike_end']:g}s: recovery {recovered}")
+    for error, count in result.errors.items():
+        print(f"error x{count}: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load test for the Gestor/Médico/Paciente flows")
+    parser.add_argument("--profile", default="spike", help=f"stages like 20s@20,10s@200 or one of {', '.join(PROFILES)}")
+    parser.add_argument("--flows", default=",".join(FLOWS), help="comma separated flows to run")
+    parser.add_argument("--max-vus", type=int, default=DEFAULT_MAX_VUS, help="maximum concurrent virtual users")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, help="per-request timeout in seconds")
+    parser.add_argument("--json", dest="json_path", help="write the result to this JSON file")
+    args = parser.parse_args(argv)
+
+    result = run(
+        parse_profile(args.profile),
+        flows=args.flows.split(","),
+        max_vus=args.max_vus,
+        timeout=args.timeout,
+    )
+    print_result(result)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out:
+            json.dump(result.as_dict(), out, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
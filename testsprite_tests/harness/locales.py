@@ -0,0 +1,241 @@
+"""Offline index and cross-language diff of the translation bundles.
+
+The app ships ``public/locales/<lang>/<namespace>.json`` (``common``,
+``telemedicine``) and the bundled ``src/locales/<lang>/translation.json``.
+They drift apart, and TC010 used to find out over four HTTP round trips.
+This module flattens every bundle into dotted keys (``a.b.0``), each with
+whether its value is blank and its placeholders, and keeps one index file
+per bundle in ``tmp/cache/locales/``. Only files whose size and mtime changed
+and whose SHA-256 then differs are re-parsed, and ``assert_keys()`` reads only
+the bundles of its namespace. The diff is cached as well, keyed by the
+bundles' sizes and mtimes, so a warm report takes about a millisecond.
+
+One pass over the union of keys of each namespace reports, against the
+reference language (``pt``, the app's ``fallbackLng``):
+
+* ``missing``: keys the reference has and a language lacks;
+* ``extra``: keys a language has and the reference lacks;
+* ``empty``: blank values;
+* ``placeholders``: values whose ``{{interpolation}}`` and ``$t(nesting)``
+  placeholders differ from the reference's.
+
+::
+
+    python -m harness.locales                  # report, exit 1 on drift
+    python -m harness.locales --json tmp/locales.json
+    locales.assert_keys("common", ["welcome", "logout"])   # preflight in a script
+    page.get_by_title(locales.any_of("languages.en"))       # a label in whatever language is active
+"""
+
+import argparse
+import collections
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+
+from harness import config
+
+REPO_DIR = os.path.dirname(config.TESTS_DIR)
+CACHE_DIR = os.path.join(config.CACHE_DIR, "locales")
+DIFF_CACHE_PATH = os.path.join(CACHE_DIR, "diff.json")
+LANGUAGES = ["pt", "en", "es", "fr"]
+REFERENCE = "pt"
+# Repo-relative globs; the {lang}/{namespace} parts are taken from the path
+BUNDLE_GLOBS = ["public/locales/*/*.json", "src/locales/*/*.json"]
+PLACEHOLDER_RE = re.compile(r"{{\s*([^},\s]+)[^}]*}}|\$t\(([^)]+)\)")
+
+
+def flatten(value, prefix=""):
+    """``{"a": {"b": ["x"]}}`` -> ``{"a.b.0": "x"}``."""
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return {prefix: value}
+    flat = {}
+    for key, item in items:
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else str(key)))
+    return flat
+
+
+def placeholders(value):
+    return sorted({a or f"$t({b})" for a, b in PLACEHOLDER_RE.findall(value)}) if isinstance(value, str) else []
+
+
+def _bundles():
+    """``{repo-relative path: (lang, namespace)}`` of every bundle."""
+    found = {}
+    for pattern in BUNDLE_GLOBS:
+        for path in glob.glob(os.path.join(REPO_DIR, pattern)):
+            lang = os.path.basename(os.path.dirname(path))
+            namespace = os.path.splitext(os.path.basename(path))[0]
+            found[os.path.relpath(path, REPO_DIR).replace(os.sep, "/")] = (lang, namespace)
+    return found
+
+
+def _fingerprint(bundles):
+    digest = hashlib.sha256()
+    for name in sorted(bundles):
+        stat = os.stat(os.path.join(REPO_DIR, name))
+        digest.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        json.dump(data, out, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _cached(name, cache_dir):
+    """Index entry of one bundle, re-parsed only when it changed."""
+    path = os.path.join(cache_dir, name.replace("/", "_"))
+    try:
+        with open(path, encoding="utf-8") as cached:
+            entry = json.load(cached)
+    except (OSError, ValueError):
+        entry = None
+    stat = os.stat(os.path.join(REPO_DIR, name))
+    if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime_ns:
+        return entry
+    with open(os.path.join(REPO_DIR, name), "rb") as source:
+        raw = source.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    if entry and entry["sha256"] == digest:
+        # Touched but unchanged: keep the parsed keys, remember the new mtime
+        entry.update(size=stat.st_size, mtime=stat.st_mtime_ns)
+    else:
+        try:
+            flat = flatten(json.loads(raw.decode("utf-8")))
+        except ValueError as exc:
+            raise ValueError(f"{name} is not valid JSON: {exc}") from exc
+        keys = {key: [value is None or (isinstance(value, str) and not value.strip()), placeholders(value)] for key, value in flat.items()}
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": digest, "keys": keys}
+    _write(path, entry)
+    return entry
+
+
+def index(namespaces=None, cache_dir=CACHE_DIR):
+    """Return ``{namespace: {key: {lang: [blank, placeholders]}}}``, re-parsing only changed bundles."""
+    result = collections.defaultdict(lambda: collections.defaultdict(dict))
+    for name, (lang, namespace) in sorted(_bundles().items()):
+        if namespaces is None or namespace in namespaces:
+            for key, info in _cached(name, cache_dir)["keys"].items():
+                result[namespace][key][lang] = info
+    return result
+
+
+def diff(keys_index, languages=LANGUAGES, reference=REFERENCE):
+    """``{namespace: {"missing"|"extra"|"empty"|"placeholders": {lang: [keys]}}}`` in one pass."""
+    report = {}
+    for namespace, keys in sorted(keys_index.items()):
+        present = {lang for values in keys.values() for lang in values}
+        langs = [lang for lang in languages if lang in present]
+        found = {kind: collections.defaultdict(list) for kind in ("missing", "extra", "empty", "placeholders")}
+        for key in sorted(keys):
+            values = keys[key]
+            expected = values.get(reference)
+            for lang in langs:
+                info = values.get(lang)
+                if info is None:
+                    if expected is not None:
+                        found["missing"][lang].append(key)
+                    continue
+                blank, marks = info
+                if expected is None:
+                    found["extra"][lang].append(key)
+                elif lang != reference and marks != expected[1]:
+                    found["placeholders"][lang].append(key)
+                if blank:
+                    found["empty"][lang].append(key)
+        report[namespace] = {kind: dict(by_lang) for kind, by_lang in found.items()}
+    return report
+
+
+def report(reference=REFERENCE, path=DIFF_CACHE_PATH):
+    """``diff()`` of the current bundles, from cache while no bundle changed."""
+    fingerprint = _fingerprint(_bundles())
+    try:
+        with open(path, encoding="utf-8") as cached:
+            cache = json.load(cached)
+        if cache["fingerprint"] == fingerprint and cache["reference"] == reference:
+            return cache["report"]
+    except (OSError, ValueError, KeyError):
+        pass
+    result = diff(index(), reference=reference)
+    _write(path, {"fingerprint": fingerprint, "reference": reference, "report": result})
+    return result
+
+
+def drift(result):
+    """Number of problems in a ``diff()`` report."""
+    return sum(len(keys) for kinds in result.values() for by_lang in kinds.values() for keys in by_lang.values())
+
+
+def assert_keys(namespace, keys, languages=LANGUAGES):
+    """Fail with every language of ``namespace`` that lacks one of ``keys`` (or has it blank)."""
+    values = index([namespace]).get(namespace, {})
+    problems = []
+    for lang in languages:
+        missing = [key for key in keys if values.get(key, {}).get(lang, [True])[0]]
+        if missing:
+            problems.append(f"{lang}: {missing}")
+    if problems:
+        raise AssertionError(f"Missing keys in {namespace} translations: " + "; ".join(problems))
+
+
+def translations(key, namespace="translation"):
+    """``{lang: value}`` of one key of ``namespace``, for scripts that look up translated labels."""
+    found = {}
+    for path, (lang, bundle_namespace) in sorted(_bundles().items()):
+        if bundle_namespace != namespace:
+            continue
+        with open(os.path.join(REPO_DIR, path), encoding="utf-8") as source:
+            value = flatten(json.load(source)).get(key)
+        if isinstance(value, str) and value.strip():
+            found[lang] = value
+    return found
+
+
+def any_of(key, namespace="translation"):
+    """Regex matching the whole label ``key`` in any language, e.g. the language buttons' titles."""
+    values = sorted(set(translations(key, namespace).values()))
+    if not values:
+        raise KeyError(f"{key} has no translation in {namespace}")
+    return re.compile("^(?:" + "|".join(map(re.escape, values)) + ")$")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Diff the translation bundles across languages")
+    parser.add_argument("--reference", default=REFERENCE, help="language the others are compared with")
+    parser.add_argument("--json", dest="json_path", help="write the report to this JSON file")
+    parser.add_argument("--limit", type=int, default=10, help="keys shown per language and kind")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    result = report(args.reference)
+    elapsed = time.perf_counter() - started
+
+    for namespace, kinds in result.items():
+        print(namespace)
+        for kind, by_lang in kinds.items():
+            for lang, keys in sorted(by_lang.items()):
+                shown = ", ".join(keys[:args.limit]) + (f", ... (+{len(keys) - args.limit})" if len(keys) > args.limit else "")
+                print(f"  {kind:<12} {lang}: {shown}")
+    problems = drift(result)
+    print(f"{problems} problems across {len(result)} namespaces in {elapsed * 1000:.1f}ms", file=sys.stderr)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out:
+            json.dump(result, out, indent=2, ensure_ascii=False)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+"""Stable locators for the absolute XPaths recorded in the TC scripts.
+
+The generated scripts locate elements by paths such as
+``html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button``. Any layout change
+breaks them, and each broken click used to burn its full 5 s timeout.
+``locate()`` resolves such a path through an index instead::
+
+    elem = await locators.locate(frame, "html/body/div/div/div[3]/aside/nav/div[7]/a[3]/button")
+    await waits.click(elem, timeout=5000)
+
+The first time a route is seen, the rendered DOM is crawled once for every
+XPath used in the scripts; each element found is recorded as an accessible
+role and name (``get_by_role("button", name="Gestão Farmacêutica")``), as
+exact text when it has no role, or as the XPath itself when neither is
+unique. The index lives in ``tmp/cache/locators/<bundle>.json``, keyed by
+route, where the bundle hash comes from the asset URLs of the built app (or
+the ``src/`` fingerprint when the Vite dev server is serving it), so a new
+build starts a new index. Set ``TESTSPRITE_BUNDLE_HASH`` to pin it.
+
+Cached locators keep working after the XPath stops matching. Role and text
+entries are only stored once they resolve to the very element of the XPath.
+When neither the cached locator nor the XPath matches anything on a route
+already indexed for the bundle, ``locate()`` raises ``SelectorError`` right
+after the crawl instead of letting the click time out. Only on a route
+without an index, which may still be rendering, does it wait up to
+``ATTACH_TIMEOUT_MS`` for either to appear, as a ``harness.budget`` step so
+the route and error-boundary checks come first. The index and the
+scripts' XPaths are read once per process.
+Inspect the index, or pre-build it for some routes, with::
+
+    python -m harness.locators                           # routes and unresolved XPaths
+    python -m harness.locators --crawl / /integracao-erp --profile gestor
+"""
+
+import argparse
+import functools
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+import urllib.parse
+
+from playwright import async_api
+
+from harness import budget, config, impact, waits
+
+INDEX_DIR = os.path.join(config.CACHE_DIR, "locators")
+BUNDLE_HASH_ENV = "TESTSPRITE_BUNDLE_HASH"
+NAV_TIMEOUT_MS = 10000
+# The old clicks waited this long for their element
+ATTACH_TIMEOUT_MS = 5000
+
+LOCATE_RE = re.compile(r"""(?:xpath=|locators\.locate\(\s*\w+\s*,\s*['"])(html/body[^'"]*)""")
+
+ASSETS_JS = """() => [...document.querySelectorAll(
+    'script[src], link[rel="stylesheet"][href], link[rel="modulepreload"][href]'
+)].map(el => el.getAttribute('src') || el.getAttribute('href')).sort()"""
+
+# Role, name and position of the element behind each XPath. Names follow the
+# parts of the accessible name the app uses (aria-label, alt, text, title);
+# positions only count visible elements, like get_by_role does
+CRAWL_JS = """(xpaths) => {
+    const TAG_ROLES = {
+        BUTTON: 'button', SELECT: 'combobox', TEXTAREA: 'textbox', IMG: 'img',
+        H1: 'heading', H2: 'heading', H3: 'heading', H4: 'heading', H5: 'heading', H6: 'heading',
+    };
+    const INPUT_ROLES = {button: 'button', submit: 'button', checkbox: 'checkbox', radio: 'radio', range: 'slider'};
+    const clean = s => (s || '').replace(/\\s+/g, ' ').trim();
+    const visible = el => el.checkVisibility ? el.checkVisibility() : el.getClientRects().length > 0;
+    const role = el => {
+        if (el.hasAttribute('role')) return el.getAttribute('role');
+        if (el.tagName === 'A') return el.hasAttribute('href') ? 'link' : null;
+        if (el.tagName === 'INPUT') return INPUT_ROLES[el.type] || 'textbox';
+        return TAG_ROLES[el.tagName] || null;
+    };
+    const name = el => clean(el.getAttribute('aria-label'))
+        || (el.tagName === 'IMG' ? clean(el.getAttribute('alt')) : '')
+        || clean(el.innerText || el.textContent)
+        || clean(el.getAttribute('title'))
+        || clean(el.getAttribute('placeholder'));
+    const all = [...document.body.querySelectorAll('*')].filter(visible);
+    const found = {};
+    for (const xpath of xpaths) {
+        let el;
+        try {
+            el = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+        } catch (error) {
+            continue;
+        }
+        if (!el) continue;
+        const r = role(el);
+        const n = name(el);
+        if (r && n) {
+            const same = all.filter(other => role(other) === r && name(other) === n);
+            if (same.includes(el)) {
+                found[xpath] = {role: r, name: n, nth: same.indexOf(el)};
+                continue;
+            }
+        }
+        // Text locators resolve to the innermost element with that text
+        if (n && n.length <= 80 && el.children.length === 0) {
+            const same = all.filter(other => other.children.length === 0 && clean(other.innerText) === n);
+            if (same.includes(el)) {
+                found[xpath] = {text: n, nth: same.indexOf(el)};
+                continue;
+            }
+        }
+        found[xpath] = {xpath: xpath};
+    }
+    return found;
+}"""
+
+SAME_ELEMENT_JS = """(el, xpath) => el === document.evaluate(
+    xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+).singleNodeValue"""
+
+_bundles = {}
+# bundle -> index, read from disk once per process
+_indexes = {}
+
+
+class SelectorError(AssertionError):
+    """An XPath that matches nothing on the page and has no working cached locator."""
+
+
+@functools.lru_cache(maxsize=None)
+def _scan_xpaths(tests_dir):
+    found = set()
+    for path in glob.glob(os.path.join(tests_dir, "TC*.py")):
+        with open(path, encoding="utf-8") as source:
+            found.update(LOCATE_RE.findall(source.read()))
+    return tuple(sorted(found))
+
+
+def known_xpaths(tests_dir=config.TESTS_DIR):
+    """Every absolute XPath the TC scripts locate, sorted (scanned once per process)."""
+    return list(_scan_xpaths(tests_dir))
+
+
+def route(url):
+    return urllib.parse.urlparse(url).path or "/"
+
+
+async def bundle_hash(page):
+    """Short hash identifying the app build ``page`` is running."""
+    if os.environ.get(BUNDLE_HASH_ENV):
+        return os.environ[BUNDLE_HASH_ENV]
+    assets = await page.evaluate(ASSETS_JS)
+    key = "\n".join(assets)
+    if key not in _bundles:
+        # Vite dev server URLs do not change with the code, the sources do
+        if any(asset.startswith(("/@vite/", "/src/")) for asset in assets):
+            key_source = key + "\n" + impact.fingerprint()
+        else:
+            key_source = key
+        _bundles[key] = hashlib.sha256(key_source.encode("utf-8")).hexdigest()[:16]
+    return _bundles[key]
+
+
+def _index_path(bundle):
+    return os.path.join(INDEX_DIR, f"{bundle}.json")
+
+
+def load(bundle):
+    """``{route: {xpath: entry}}`` for ``bundle``."""
+    try:
+        with open(_index_path(bundle), encoding="utf-8") as cached:
+            return json.load(cached)
+    except (OSError, ValueError):
+        return {}
+
+
+def _cached(bundle):
+    if bundle not in _indexes:
+        _indexes[bundle] = load(bundle)
+    return _indexes[bundle]
+
+
+def _store(bundle, path, entries):
+    # Re-read before writing so routes crawled by parallel workers are kept
+    index = load(bundle)
+    index.setdefault(path, {}).update(entries)
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp_path = f"{_index_path(bundle)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        json.dump(index, out, indent=2, sort_keys=True, ensure_ascii=False)
+    os.replace(tmp_path, _index_path(bundle))
+    _indexes[bundle] = index
+    return index[path]
+
+
+def locator_for(page, entry):
+    if "role" in entry:
+        return page.get_by_role(entry["role"], name=entry["name"], exact=True).nth(entry["nth"])
+    if "text" in entry:
+        return page.get_by_text(entry["text"], exact=True).nth(entry["nth"])
+    return page.locator(f"xpath={entry['xpath']}").nth(0)
+
+
+async def _matches(locator):
+    # count() does not wait, which is what keeps a miss cheap; locator_for() already applied nth
+    return await locator.count() > 0
+
+
+async def _verified(page, found):
+    """``found`` with every role/text entry that Playwright resolves to another element replaced by its XPath."""
+    for xpath, entry in found.items():
+        if "xpath" in entry:
+            continue
+        locator = locator_for(page, entry)
+        try:
+            same = await _matches(locator) and await locator.evaluate(SAME_ELEMENT_JS, xpath, timeout=1000)
+        except async_api.Error:
+            same = False
+        if not same:
+            # The role or text approximation picked another element; keep the XPath
+            found[xpath] = {"xpath": xpath}
+    return found
+
+
+async def crawl(page, xpaths=None):
+    """Index the XPaths that resolve on ``page``'s current route and return its entries."""
+    await waits.settle(page)
+    xpaths = known_xpaths() if xpaths is None else xpaths
+    found = await _verified(page, await page.evaluate(CRAWL_JS, xpaths))
+    return _store(await bundle_hash(page), route(page.url), found)
+
+
+async def locate(page, xpath):
+    """Return a stable locator for the absolute ``xpath`` on ``page``'s current route."""
+    await waits.settle(page)
+    bundle = await bundle_hash(page)
+    path = route(page.url)
+    indexed = path in _cached(bundle)
+    entry = _cached(bundle).get(path, {}).get(xpath)
+    cached = locator_for(page, entry) if entry is not None else None
+    if cached is not None and await _matches(cached):
+        return cached
+
+    xpaths = sorted(set(known_xpaths()) | {xpath})
+    found = await page.evaluate(CRAWL_JS, xpaths)
+    if xpath not in found:
+        missing = f"{xpath} matches nothing on {path} (bundle {bundle}) and no cached locator works"
+        if indexed:
+            raise SelectorError(missing)
+        # A route seen for the first time may still be rendering: wait like the old click did
+        target = page.locator(f"xpath={xpath}")
+        try:
+            async with budget.step(page, f"locate {xpath}", ATTACH_TIMEOUT_MS):
+                await target.first.wait_for(state="attached", timeout=budget.timeout_ms(ATTACH_TIMEOUT_MS))
+        except async_api.TimeoutError:
+            raise SelectorError(missing) from None
+        found = await page.evaluate(CRAWL_JS, xpaths)
+        if xpath not in found:
+            raise SelectorError(f"{xpath} matched on {path} (bundle {bundle}) only briefly")
+    found = await _verified(page, found)
+    _store(bundle, path, found)
+    return locator_for(page, found[xpath])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect or build the XPath -> locator index")
+    parser.add_argument("--crawl", nargs="+", metavar="ROUTE", help="routes to open and index")
+    parser.add_argument("--profile", help="log in as this profile before crawling")
+    parser.add_argument("--bundle", help="index to show (default: all)")
+    args = parser.parse_args(argv)
+
+    if args.crawl:
+        from harness import auth_state, browser
+
+        async def build():
+            if args.profile:
+                context = await auth_state.new_context(args.profile)
+            else:
+                context = await browser.new_context()
+            try:
+                page = await context.new_page()
+                for path in args.crawl:
+                    await page.goto(config.BASE_URL + path, wait_until="domcontentloaded", timeout=NAV_TIMEOUT_MS)
+                    entries = await crawl(page)
+                    stable = sum("xpath" not in entry for entry in entries.values())
+                    print(f"{route(page.url)}: {len(entries)} XPaths resolved, {stable} to role/text locators")
+            finally:
+                await browser.release_context(context)
+
+        browser.run(build)
+        return 0
+
+    xpaths = known_xpaths()
+    resolved = set()
+    paths = [_index_path(args.bundle)] if args.bundle else sorted(glob.glob(os.path.join(INDEX_DIR, "*.json")))
+    for index_path in paths:
+        bundle = os.path.splitext(os.path.basename(index_path))[0]
+        print(f"bundle {bundle}")
+        for path, entries in sorted(load(bundle).items()):
+            resolved.update(entries)
+            stable = sum("xpath" not in entry for entry in entries.values())
+            print(f"    {path:<40} {len(entries):>3} XPaths, {stable:>3} role/text")
+    missing = [xpath for xpath in xpaths if xpath not in resolved]
+    print(f"{len(xpaths) - len(missing)}/{len(xpaths)} XPaths used by the scripts are indexed")
+    for xpath in missing:
+        print(f"    {xpath}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""Request-level latency records for the whole suite.
+
+Every HTTP call made through ``harness.api_client`` and every document,
+XHR and fetch request made by a page from ``harness.browser`` is timed and
+tagged with the test ID, endpoint template, method, status and profile, then
+appended as one JSON line to ``tmp/artifacts/metrics/<test_id>.ndjson``.
+
+The runner clears that directory at the start of a run and writes a
+Prometheus text snapshot (``metrics.prom``) at the end. The snapshot and a
+slowest-endpoints table can also be produced by hand::
+
+    python -m harness.metrics [--top 20]
+
+Endpoint templates collapse IDs (numbers, UUIDs, hashes) and the suite's
+known path parameters, so ``/api/esus-aps/configuration/general_settings``
+and ``.../reports`` are reported together as
+``/api/esus-aps/configuration/{section}``.
+"""
+
+import argparse
+import atexit
+import collections
+import contextlib
+import glob
+import json
+import os
+import re
+import sys
+import threading
+import time
+import urllib.parse
+
+from harness import config
+
+METRICS_DIR = os.environ.get("TESTSPRITE_METRICS_DIR", os.path.join(config.ARTIFACTS_DIR, "metrics"))
+TEST_ID_ENV = "TESTSPRITE_TEST_ID"
+PROMETHEUS_FILE = "metrics.prom"
+
+# Page requests worth recording; static assets are left out
+BROWSER_RESOURCE_TYPES = {"document", "xhr", "fetch"}
+
+# Records that are not request timings (harness.vitals samples, harness.budget steps,
+# harness.trace overhead); kept out of the histogram
+SAMPLE_KINDS = {"vitals", "budget", "trace"}
+
+BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+# Path parameters used by the TC scripts that are not IDs
+PATH_TEMPLATES = [
+    (re.compile(r"^/api/esus-aps/configuration/[^/]+$"), "/api/esus-aps/configuration/{section}"),
+    (re.compile(r"^/api/mcp-server/orchestrate/status/[^/]+$"), "/api/mcp-server/orchestrate/status/{orchestration_id}"),
+    (re.compile(r"^/api/telemedicine/sessions/[^/]+$"), "/api/telemedicine/sessions/{session_id}"),
+    (re.compile(r"^/api/users/[^/]+$"), "/api/users/{user_id}"),
+    (re.compile(r"^/health-data/[^/]+$"), "/health-data/{resource_id}"),
+    (re.compile(r"^/locales/[a-z]{2}/([^/]+)$"), r"/locales/{lang}/\1"),
+]
+ID_SEGMENT = re.compile(
+    r"^(\d+|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{16,}|[A-Za-z0-9_-]*\d[A-Za-z0-9_-]{11,})$",
+    re.I,
+)
+
+_tags = {"profile": None}
+_sink = None
+_lock = threading.Lock()
+
+
+def test_id():
+    """ID of the running test: set by the runner, else the script's file name."""
+    value = os.environ.get(TEST_ID_ENV)
+    if value:
+        return value
+    script = os.path.splitext(os.path.basename(sys.argv[0] or ""))[0]
+    return script if script.startswith("TC") else "adhoc"
+
+
+def set_profile(profile):
+    """Tag later records with ``profile`` (e.g. from ``auth_state.new_context``)."""
+    _tags["profile"] = profile
+
+
+@contextlib.contextmanager
+def profile(name):
+    previous = _tags["profile"]
+    _tags["profile"] = name
+    try:
+        yield
+    finally:
+        _tags["profile"] = previous
+
+
+def endpoint_template(url):
+    """Reduce a URL to its path template, dropping host and query string."""
+    parsed = urllib.parse.urlsplit(url)
+    path = parsed.path or "/"
+    for pattern, template in PATH_TEMPLATES:
+        if pattern.match(path):
+            path = pattern.sub(template, path)
+            break
+    else:
+        path = "/".join("{id}" if ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
+    # Calls to other hosts (Supabase, DATASUS) keep their host in the template
+    if parsed.netloc and parsed.netloc != urllib.parse.urlsplit(config.BASE_URL).netloc:
+        path = f"{parsed.netloc}{path}"
+    return path
+
+
+def _file():
+    global _sink
+    if _sink is None:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        _sink = open(os.path.join(METRICS_DIR, f"{test_id()}.ndjson"), "w", encoding="utf-8")
+        atexit.register(_sink.close)
+    return _sink
+
+
+def record(kind, method, url, status, duration, **extra):
+    entry = {
+        "ts": time.time(),
+        "test_id": test_id(),
+        "kind": kind,
+        "method": method,
+        "endpoint": endpoint_template(url),
+        "status": status,
+        "profile": _tags["profile"],
+        "duration": round(duration, 6),
+    }
+    entry.update(extra)
+    line = json.dumps(entry, ensure_ascii=False) + "\n"
+    with _lock:
+        sink = _file()
+        sink.write(line)
+        sink.flush()
+
+
+def record_http(timing):
+    """Listener for ``harness.api_client`` timings."""
+    record(
+        "http",
+        timing.method,
+        timing.url,
+        timing.status,
+        timing.total,
+        connect=round(timing.connect, 6),
+        server=round(timing.server, 6),
+        error=timing.error,
+    )
+
+
+def _page_timing(request):
+    timing = request.timing
+    end = timing.get("responseEnd", -1)
+    extra = {}
+    if timing.get("connectEnd", -1) >= 0 and timing.get("connectStart", -1) >= 0:
+        extra["connect"] = round((timing["connectEnd"] - timing["connectStart"]) / 1000, 6)
+    if timing.get("responseStart", -1) >= 0 and timing.get("requestStart", -1) >= 0:
+        extra["server"] = round((timing["responseStart"] - timing["requestStart"]) / 1000, 6)
+    return (end / 1000 if end >= 0 else 0.0), extra
+
+
+def track_page(page):
+    """Record the page's navigations and XHR/fetch calls."""
+
+    async def on_finished(request):
+        if request.resource_type not in BROWSER_RESOURCE_TYPES:
+            return
+        try:
+            response = await request.response()
+        except Exception:
+            # The page or context closed before the response was read
+            response = None
+        duration, extra = _page_timing(request)
+        kind = "navigation" if request.is_navigation_request() else "browser"
+        record(kind, request.method, request.url, response.status if response else 0, duration, **extra)
+
+    def on_failed(request):
+        if request.resource_type in BROWSER_RESOURCE_TYPES:
+            duration, extra = _page_timing(request)
+            kind = "navigation" if request.is_navigation_request() else "browser"
+            record(kind, request.method, request.url, 0, duration, error=request.failure, **extra)
+
+    page.on("requestfinished", on_finished)
+    page.on("requestfailed", on_failed)
+
+
+def track(context):
+    for page in context.pages:
+        track_page(page)
+    context.on("page", track_page)
+
+
+def reset():
+    """Remove the previous run's records (called by the runner before a run)."""
+    for path in glob.glob(os.path.join(METRICS_DIR, "*.ndjson")) + [os.path.join(METRICS_DIR, PROMETHEUS_FILE)]:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+
+
+def load(directory=METRICS_DIR):
+    """Yield every record from the NDJSON files in ``directory``."""
+    for path in sorted(glob.glob(os.path.join(directory, "*.ndjson"))):
+        with open(path, encoding="utf-8") as source:
+            for line in source:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def test_records(test_id, kind=None, directory=METRICS_DIR):
+    """The records of one test, optionally only those of ``kind``."""
+    try:
+        with open(os.path.join(directory, f"{test_id}.ndjson"), encoding="utf-8") as source:
+            entries = [json.loads(line) for line in source if line.strip()]
+    except FileNotFoundError:
+        return []
+    return [entry for entry in entries if kind is None or entry["kind"] == kind]
+
+
+def _escape(value):
+    return str("" if value is None else value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(values):
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in values) + "}"
+
+
+def prometheus(entries):
+    """Render records as a Prometheus text-format histogram snapshot."""
+    series = collections.defaultdict(lambda: {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0})
+    for entry in entries:
+        if entry["kind"] in SAMPLE_KINDS:
+            continue
+        key = (
+            ("test_id", entry["test_id"]),
+            ("kind", entry["kind"]),
+            ("endpoint", entry["endpoint"]),
+            ("method", entry["method"]),
+            ("status", entry["status"]),
+            ("profile", entry.get("profile")),
+        )
+        data = series[key]
+        data["count"] += 1
+        data["sum"] += entry["duration"]
+        for index, bound in enumerate(BUCKETS):
+            if entry["duration"] <= bound:
+                data["buckets"][index] += 1
+
+    name = "testsprite_request_duration_seconds"
+    lines = [
+        f"# HELP {name} Duration of HTTP calls and page requests made by the TC scripts.",
+        f"# TYPE {name} histogram",
+    ]
+    for key in sorted(series, key=lambda labels: [str(value) for _, value in labels]):
+        data = series[key]
+        for bound, count in zip(BUCKETS, data["buckets"]):
+            lines.append(f"{name}_bucket{_labels(key + (('le', bound),))} {count}")
+        lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {data['count']}")
+        lines.append(f"{name}_sum{_labels(key)} {data['sum']:.6f}")
+        lines.append(f"{name}_count{_labels(key)} {data['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(directory=METRICS_DIR):
+    """Write ``metrics.prom`` for the records in ``directory`` and return its path."""
+    path = os.path.join(directory, PROMETHEUS_FILE)
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as out:
+        out.write(prometheus(load(directory)))
+    return path
+
+
+def slowest(entries, top=20):
+    """``(endpoint, method, count, p95, max)`` rows for the slowest endpoints by p95."""
+    durations = collections.defaultdict(list)
+    for entry in entries:
+        if entry["kind"] in SAMPLE_KINDS:
+            continue
+        durations[(entry["endpoint"], entry["method"])].append(entry["duration"])
+    rows = []
+    for (endpoint, method), values in durations.items():
+        values.sort()
+        p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+        rows.append((endpoint, method, len(values), p95, values[-1]))
+    return sorted(rows, key=lambda row: -row[3])[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise the suite's request latency records")
+    parser.add_argument("--dir", default=METRICS_DIR, help="directory with the NDJSON records")
+    parser.add_argument("--top", type=int, default=20, help="number of slow endpoints to list")
+    args = parser.parse_args(argv)
+
+    path = write_prometheus(args.dir)
+    print(f"Prometheus snapshot: {path}")
+    for endpoint, method, count, p95, slowest_ms in slowest(load(args.dir), args.top):
+        print(f"{method:<6} {endpoint:<60} n={count:<5d} p95={p95 * 1000:8.1f}ms max={slowest_ms * 1000:8.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+"""Compile testsprite_frontend_test_plan.json into runnable Playwright flows.
+
+Each plan entry (TC001..TC015) lists natural-language steps. The rules in
+``harness/selector_map.json`` turn each step into harness calls (go to a
+route, log in from the cached storage state, pick a landing profile, check
+the URL, resize...) and the entry becomes a script with the same
+``async def run_test()`` shape as the generated TC scripts, written to
+``tmp/cache/flows/plan_<id>_<title>.py``; the ``plan_`` prefix keeps their
+test IDs apart from the TC scripts'. Steps no rule matches are listed in
+the flow's ``PENDING_STEPS`` and the flow fails listing them, so an
+incomplete map never passes silently; the runner records no durations for
+such flows, since they say nothing about how long the test takes.
+
+A flow is only recompiled when the SHA-256 of its plan entry, the selector
+map and ``COMPILER_VERSION`` changes, so editing one test case rebuilds one
+file::
+
+    python -m harness.plan                 # compile what changed
+    python -m harness.plan TC003 --force   # recompile TC003
+    python -m harness.plan --run -w 4      # compile, then run the flows with harness.runner
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+
+from harness import config
+
+PLAN_PATH = os.path.join(config.TESTS_DIR, "testsprite_frontend_test_plan.json")
+SELECTOR_MAP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "selector_map.json")
+FLOWS_DIR = os.path.join(config.CACHE_DIR, "flows")
+INDEX_FILE = "index.json"
+# Bump when the generated code changes so every cached flow is rebuilt
+COMPILER_VERSION = 5
+FLOW_PREFIX = "plan_"
+
+NAV_TIMEOUT_MS = 10000
+CLICK_TIMEOUT_MS = 5000
+
+INDENT = " " * 8
+
+
+class Rule:
+    def __init__(self, spec):
+        self.pattern = re.compile(spec["pattern"], re.I)
+        self.op = spec["op"]
+        self.args = {key: value for key, value in spec.items() if key not in ("pattern", "op")}
+
+    def match(self, description):
+        match = self.pattern.search(description)
+        if match is None:
+            return None
+        groups = match.groupdict()
+        return {
+            key: value.format(**groups) if isinstance(value, str) else value
+            for key, value in self.args.items()
+        }
+
+
+def load_rules(path=SELECTOR_MAP_PATH):
+    with open(path, encoding="utf-8") as source:
+        data = json.load(source)
+    return data["rules"]
+
+
+def entry_hash(entry, rules):
+    payload = json.dumps({"entry": entry, "rules": rules, "compiler": COMPILER_VERSION}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def flow_name(entry):
+    title = unicodedata.normalize("NFKD", entry["title"]).encode("ascii", "ignore").decode()
+    return f"{FLOW_PREFIX}{entry['id']}_{re.sub(r'[^0-9A-Za-z]+', '_', title).strip('_')}.py"
+
+
+def _profile(name):
+    return unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+
+
+def _fresh_page(context_expr, url_expr):
+    return [
+        "await browser.release_context(context)",
+        f"context = await {context_expr}",
+        "page = await context.new_page()",
+        f'await page.goto({url_expr}, wait_until="domcontentloaded", timeout={NAV_TIMEOUT_MS})',
+        "await waits.settle(page)",
+    ]
+
+
+def _route(path):
+    return f"^{re.escape(path)}$"
+
+
+def _emit(op, args, description):
+    """Python lines (without indentation) for one compiled step."""
+    if op in ("goto", "visit"):
+        lines = [
+            f'await page.goto(config.BASE_URL + {args["path"]!r}, wait_until="domcontentloaded", timeout={NAV_TIMEOUT_MS})',
+            f"budget.expect_route(page, {_route(args['path'])!r})",
+            "await waits.settle(page)",
+        ]
+        # visit also checks the page rendered, for "verify access to ..." steps
+        return lines + (["await budget.check(page)"] if op == "visit" else [])
+    if op == "login":
+        profile = _profile(args["profile"])
+        return _fresh_page(f"auth_state.new_context({profile!r})", f"auth_state.dashboard_url({profile!r})") + [
+            "budget.expect_route(page, auth_state.APP_ROUTE)",
+        ]
+    if op == "login_each":
+        profiles = [_profile(name) for name in args["profiles"].split(",")]
+        return [f"for profile in {profiles!r}:"] + [
+            "    " + line
+            for line in _fresh_page("auth_state.new_context(profile)", "auth_state.dashboard_url(profile)")
+            + ["budget.expect_route(page, auth_state.APP_ROUTE)", "await budget.check(page)"]
+        ]
+    if op == "logout":
+        return _fresh_page("browser.new_context()", "config.BASE_URL")
+    if op == "select_profile":
+        profile = _profile(args["profile"])
+        return [
+            "landing = page.url",
+            f'await waits.click(page.get_by_role("button", name=auth_state.PROFILES[{profile!r}]).first, timeout={CLICK_TIMEOUT_MS})',
+            f"await page.wait_for_url(lambda url: url != landing, timeout={NAV_TIMEOUT_MS})",
+            "budget.expect_route(page, auth_state.APP_ROUTE)",
+            "await waits.settle(page)",
+        ]
+    if op == "expect_url":
+        return [
+            f"await page.wait_for_url(re.compile({args['url']!r}), timeout={NAV_TIMEOUT_MS})",
+            f"budget.expect_route(page, {args['url']!r})",
+        ]
+    if op == "expect_profile_choice":
+        return [
+            "for button in auth_state.PROFILES.values():",
+            f'    await page.get_by_role("button", name=button).first.wait_for(timeout={NAV_TIMEOUT_MS})',
+        ]
+    if op == "expect_button":
+        return [f'await page.get_by_role("button", name=locales.any_of({args["key"]!r})).first.wait_for(timeout={NAV_TIMEOUT_MS})']
+    if op == "reload":
+        return [f'await page.reload(wait_until="domcontentloaded", timeout={NAV_TIMEOUT_MS})', "await waits.settle(page)"]
+    if op == "expect_settled":
+        ms = int(float(args["seconds"]) * 1000)
+        message = f"{description}: the page was still loading after {ms} ms"
+        return [f"assert await waits.settle(page, {ms}), {message!r}"]
+    if op == "theme":
+        has_class = f"document.documentElement.classList.contains({args['class']!r})"
+        message = f"{description}: html has no {args['class']} class"
+        return [
+            f"if not await page.evaluate({has_class!r}):",
+            f'    await waits.click(page.get_by_role("button", name={args["button"]!r}), timeout={CLICK_TIMEOUT_MS})',
+            f"assert await page.evaluate({has_class!r}), {message!r}",
+        ]
+    if op == "switch_language":
+        lines = []
+        for lang in args["lang"].lower().split(","):
+            lines += [
+                f'await waits.click(page.get_by_title(locales.any_of("languages.{lang}")).first, timeout={CLICK_TIMEOUT_MS})',
+                # The menu button's title is translated, so it shows the switch took effect
+                f'await page.get_by_title(locales.translations("navbar.openMenu")[{lang!r}], exact=True).first.wait_for(timeout={NAV_TIMEOUT_MS})',
+            ]
+        return lines
+    if op == "expect_sidebar":
+        if args["state"] == "collapsed":
+            return [
+                'box = await page.locator("aside").first.bounding_box()',
+                'assert box is None or box["x"] + box["width"] <= 0, f"The sidebar still covers {box} of the {page.viewport_size} viewport"',
+                f'await page.get_by_title(locales.any_of("navbar.openMenu")).first.wait_for(timeout={NAV_TIMEOUT_MS})',
+            ]
+        return [f'await page.locator("aside nav a").first.wait_for(timeout={NAV_TIMEOUT_MS})']
+    if op == "expect_no_overflow":
+        return [
+            'overflow = await page.evaluate("document.documentElement.scrollWidth - window.innerWidth")',
+            'assert overflow <= 0, f"The page overflows the viewport by {overflow}px"',
+        ]
+    if op == "resize":
+        return [
+            f'await page.set_viewport_size({{"width": {args["width"]}, "height": {args["height"]}}})',
+            "await waits.settle(page)",
+        ]
+    if op == "expect_page_ok":
+        # Fails on the error boundary, or on /login when the session was lost
+        return ["await waits.settle(page)", "await budget.check(page)"]
+    if op == "skip":
+        return [f"# Skipped: {args.get('reason', 'no action needed')}"]
+    raise ValueError(f"Unknown selector map op {op!r}")
+
+
+def compile_entry(entry, rules, digest=None):
+    """Return the source of the flow for one plan entry."""
+    compiled = [Rule(spec) for spec in rules]
+    digest = digest or entry_hash(entry, rules)
+    body = []
+    pending = []
+    for step in entry["steps"]:
+        description = step["description"]
+        body.append(f"# {description}")
+        for rule in compiled:
+            args = rule.match(description)
+            if args is not None:
+                body.extend(_emit(rule.op, args, description))
+                break
+        else:
+            body.append("# Pending: no selector map rule")
+            pending.append(description)
+        body.append("")
+
+    message = f"{entry['id']}: steps without a selector map rule:\n  "
+    lines = [
+        "# Compiled by harness.plan from testsprite_frontend_test_plan.json; edit the plan",
+        "# or harness/selector_map.json instead of this file.",
+        f"# {entry['id']} {entry['title']} ({entry.get('category')}, {entry.get('priority')}), sha256 {digest[:16]}",
+        "import re",
+        "from harness import auth_state, browser, budget, config, locales, waits",
+        "",
+        # Read by harness.runner, which records no durations for incomplete flows
+        f"PENDING_STEPS = {pending!r}",
+        "",
+        "",
+        "async def run_test():",
+        "    context = None",
+        "",
+        "    try:",
+        "        context = await browser.new_context()",
+        "        page = await context.new_page()",
+        "",
+    ]
+    lines.extend(INDENT + line if line else "" for line in body)
+    lines.extend([
+        "    finally:",
+        "        if context:",
+        "            await browser.release_context(context)",
+        "",
+        f"    assert not PENDING_STEPS, {message!r} + '\\n  '.join(PENDING_STEPS)",
+        "",
+        "",
+        'if __name__ == "__main__":',
+        "    browser.run(run_test)",
+        "",
+    ])
+    return "\n".join(lines)
+
+
+def _load_index():
+    try:
+        with open(os.path.join(FLOWS_DIR, INDEX_FILE), encoding="utf-8") as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return {}
+
+
+def compile_plan(plan_path=PLAN_PATH, ids=None, force=False):
+    """Compile the plan into ``FLOWS_DIR`` and return ``(paths, rebuilt_ids)``."""
+    with open(plan_path, encoding="utf-8") as source:
+        plan = json.load(source)
+    rules = load_rules()
+    index = _load_index()
+    os.makedirs(FLOWS_DIR, exist_ok=True)
+
+    paths = []
+    rebuilt = []
+    for entry in plan:
+        if ids and entry["id"] not in ids:
+            continue
+        digest = entry_hash(entry, rules)
+        path = os.path.join(FLOWS_DIR, flow_name(entry))
+        cached = index.get(entry["id"], {})
+        if force or cached.get("hash") != digest or not os.path.exists(path):
+            if cached.get("file") and cached["file"] != os.path.basename(path):
+                # The title changed: drop the flow compiled under the old name
+                try:
+                    os.remove(os.path.join(FLOWS_DIR, cached["file"]))
+                except FileNotFoundError:
+                    pass
+            with open(path, "w", encoding="utf-8") as out:
+                out.write(compile_entry(entry, rules, digest))
+            pending = sum(not any(Rule(spec).match(step["description"]) is not None for spec in rules) for step in entry["steps"])
+            index[entry["id"]] = {"hash": digest, "file": os.path.basename(path), "pending": pending}
+            rebuilt.append(entry["id"])
+        paths.append(path)
+
+    if rebuilt:
+        tmp_path = os.path.join(FLOWS_DIR, INDEX_FILE + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            json.dump(index, out, indent=2, sort_keys=True)
+        os.replace(tmp_path, os.path.join(FLOWS_DIR, INDEX_FILE))
+    return paths, rebuilt
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the frontend test plan into runnable flows")
+    parser.add_argument("ids", nargs="*", help="plan entries to compile (default: all)")
+    parser.add_argument("--plan", default=PLAN_PATH, help="frontend test plan JSON")
+    parser.add_argument("--force", action="store_true", help="recompile even if the cached flow is current")
+    parser.add_argument("--run", action="store_true", help="run the compiled flows with harness.runner")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="parallel processes for --run")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    paths, rebuilt = compile_plan(args.plan, set(args.ids), args.force)
+    elapsed = time.perf_counter() - started
+    print(f"{len(paths)} flows in {os.path.relpath(FLOWS_DIR, config.TESTS_DIR)}, "
+          f"{len(rebuilt)} recompiled ({', '.join(rebuilt) or 'none'}) in {elapsed * 1000:.1f}ms")
+    incomplete = sorted(entry_id for entry_id, cached in _load_index().items() if cached.get("pending") and (not args.ids or entry_id in args.ids))
+    if incomplete:
+        print(f"{len(incomplete)} flows have steps without a selector map rule and are skipped by the runner: {', '.join(incomplete)}")
+
+    if args.run:
+        from harness import runner
+
+        runner_args = paths + (["--workers", str(args.workers)] if args.workers else [])
+        return runner.main(runner_args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""Wait until a condition holds, with backoff, jitter and an overall deadline.
+
+Replaces fixed ``time.sleep`` polling loops in the API scripts. ``until``
+calls a probe until it returns something other than ``None``; the delay
+between attempts grows exponentially (``INITIAL_DELAY`` x ``FACTOR`` per
+attempt, capped at ``MAX_DELAY``) with random jitter so parallel tests do not
+poll in lockstep, and the last attempt is made right at the deadline::
+
+    def finished():
+        state = job_state()
+        return state if state in ("completed", "failed") else None
+
+    done = poll.until(finished, deadline=60, name="job")
+    print(f"job {done.value} after {done.elapsed:.2f}s")
+
+``http`` does the same for a status endpoint and can use what the server
+offers instead of polling blind:
+
+* ``long_poll=N`` sends ``Prefer: wait=N`` (RFC 7240); when the server holds
+  the request, the next one is sent immediately instead of backing off;
+* ``sse=True`` asks for ``text/event-stream`` and evaluates every event's
+  JSON ``data``; a server answering with plain JSON falls back to polling.
+
+Every wait is recorded by ``harness.metrics`` (kind ``wait``, status
+``completed`` or ``timeout``) with its time to completion and attempt count.
+A probe or check raising aborts the wait with that exception.
+"""
+
+import dataclasses
+import json
+import random
+import time
+
+import requests
+
+from harness import api_client, metrics
+
+DEFAULT_DEADLINE = 60.0
+INITIAL_DELAY = 0.1
+FACTOR = 2.0
+MAX_DELAY = 5.0
+# Each delay is drawn from [delay * (1 - JITTER), delay]
+JITTER = 0.5
+# Extra read timeout on top of the long-poll wait asked from the server
+LONG_POLL_GRACE = 5.0
+
+
+@dataclasses.dataclass
+class Completion:
+    value: object
+    attempts: int
+    elapsed: float
+    mode: str = "poll"
+
+
+class WaitTimeout(AssertionError):
+    """The condition did not hold before the deadline."""
+
+    def __init__(self, name, attempts, elapsed, last):
+        self.attempts = attempts
+        self.elapsed = elapsed
+        self.last = last
+        super().__init__(f"{name} not done after {elapsed:.1f}s ({attempts} attempts), last seen: {last!r}")
+
+
+class Backoff:
+    """Exponential delays with jitter, never sleeping past ``deadline_at``."""
+
+    def __init__(self, deadline_at, initial=INITIAL_DELAY, factor=FACTOR, max_delay=MAX_DELAY, jitter=JITTER):
+        self.deadline_at = deadline_at
+        self.initial = initial
+        self.factor = factor
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.delay = initial
+
+    def reset(self):
+        self.delay = self.initial
+
+    def sleep(self):
+        """Sleep for the next delay; False once the deadline has passed."""
+        remaining = self.deadline_at - time.monotonic()
+        if remaining <= 0:
+            return False
+        pause = self.delay * (1 - self.jitter * random.random())
+        self.delay = min(self.max_delay, self.delay * self.factor)
+        time.sleep(min(pause, remaining))
+        return True
+
+
+def _finish(name, mode, started, attempts, status, value=None):
+    elapsed = time.monotonic() - started
+    metrics.record("wait", mode.upper(), name, status, elapsed, attempts=attempts)
+    return Completion(value, attempts, elapsed, mode)
+
+
+def until(probe, deadline=DEFAULT_DEADLINE, name="condition", **backoff):
+    """Call ``probe()`` until it returns a value other than ``None`` and
+    return it as a ``Completion``. Raises ``WaitTimeout`` after ``deadline``
+    seconds; ``backoff`` overrides the ``Backoff`` parameters.
+    """
+    started = time.monotonic()
+    delays = Backoff(started + deadline, **backoff)
+    attempts = 0
+    value = None
+    while True:
+        attempts += 1
+        value = probe()
+        if value is not None:
+            return _finish(name, "poll", started, attempts, "completed", value)
+        if not delays.sleep():
+            _finish(name, "poll", started, attempts, "timeout")
+            raise WaitTimeout(name, attempts, time.monotonic() - started, value)
+
+
+def _json(response):
+    try:
+        return response.json()
+    except ValueError:
+        return None
+
+
+def _events(response):
+    """Yield the JSON ``data`` of each server-sent event in ``response``."""
+    data = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line.startswith("data:"):
+            data.append(line[5:].lstrip())
+        elif not line and data:
+            try:
+                yield json.loads("\n".join(data))
+            except ValueError:
+                pass
+            data = []
+
+
+def http(url, check, deadline=DEFAULT_DEADLINE, client=None, headers=None, name=None, long_poll=0, sse=False, **backoff):
+    """GET ``url`` until ``check(body)`` returns a value other than ``None``.
+
+    ``body`` is the decoded JSON of a 200 response (other statuses count as
+    "not yet"). See the module docstring for ``long_poll`` and ``sse``.
+    """
+    client = client or api_client.shared()
+    name = name or metrics.endpoint_template(url)
+    started = time.monotonic()
+    deadline_at = started + deadline
+    delays = Backoff(deadline_at, **backoff)
+    attempts = 0
+    last = None
+    mode = "poll"
+
+    while True:
+        remaining = max(0.001, deadline_at - time.monotonic())
+        request_headers = dict(headers or {})
+        if sse:
+            request_headers["Accept"] = "text/event-stream, application/json"
+        wait = min(long_poll, remaining) if long_poll else 0
+        if wait:
+            request_headers["Prefer"] = f"wait={int(wait) or 1}"
+        attempts += 1
+        sent = time.monotonic()
+        try:
+            response = client.get(
+                url,
+                headers=request_headers,
+                timeout=(min(10.0, remaining), remaining + wait + LONG_POLL_GRACE),
+                stream=sse,
+            )
+            if sse and response.ok and response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                mode = "sse"
+                with response:
+                    for body in _events(response):
+                        last = body
+                        value = check(body)
+                        if value is not None:
+                            return _finish(name, mode, started, attempts, "completed", value)
+                        if time.monotonic() >= deadline_at:
+                            break
+                # Stream ended or went past the deadline: reconnect with backoff below
+            else:
+                with response:
+                    last = _json(response) if response.status_code == 200 else response.status_code
+                if response.status_code == 200 and last is not None:
+                    value = check(last)
+                    if value is not None:
+                        return _finish(name, mode, started, attempts, "completed", value)
+                if wait and time.monotonic() - sent >= wait / 2:
+                    # The server held the request until something changed (or its
+                    # own timeout): ask again straight away
+                    mode = "long-poll"
+                    delays.reset()
+                    if time.monotonic() < deadline_at:
+                        continue
+        except requests.Timeout as exc:
+            # A held request or an idle stream outlived the deadline
+            last = type(exc).__name__
+
+        if not delays.sleep():
+            _finish(name, mode, started, attempts, "timeout")
+            raise WaitTimeout(name, attempts, time.monotonic() - started, last)
@@ -0,0 +1,325 @@
+"""Rate-limit probe for the telemedicine and e-SUS APS configuration endpoints.
+
+TC005 and TC008 send a handful of sequential GETs and accept "429 or 200",
+which never gets near a token bucket. This probe measures the limit:
+
+1. a sequential baseline gives the unthrottled latency;
+2. an open-loop ramp doubles the request rate (constant arrivals, as in
+   ``harness.load``) until 429s appear, then bisects between the last clean
+   and the first throttled rate down to ``--precision``; that rate is the
+   429 onset;
+3. a concurrent burst (all requests released at once) measures how many are
+   admitted before the first 429, the bucket's burst capacity;
+4. every 429 is checked for a parseable ``Retry-After``, and the probe waits
+   exactly that long once and checks that the next request is admitted.
+
+The admitted rate of the fastest throttled step beyond the burst estimates
+the sustained limit (the bucket's refill rate); the onset is higher the
+more of a step the burst absorbs. Latency of the requests that were admitted
+while others were throttled is
+compared with the baseline (the latency penalty of limiting). The bucket
+refills between steps: the probe waits the longest ``Retry-After`` seen, or
+``--cooldown``::
+
+    python -m harness.ratelimit                       # both targets
+    python -m harness.ratelimit esus-config --max-rate 400 --step-seconds 3 --json tmp/ratelimit.json
+    python -m harness.standin --rate-limit "/api/esus-aps/*=20:10"   # a limited stand-in to probe
+
+Requests authenticate as a leased ``harness.userpool`` user. The telemedicine
+target creates one session first and registers it with ``harness.cleanup``.
+"""
+
+import argparse
+import concurrent.futures
+import dataclasses
+import email.utils
+import json
+import sys
+import threading
+import time
+import uuid
+
+import requests
+
+from harness import api_client, cleanup, config, load, userpool
+
+REQUEST_TIMEOUT = 10
+BASELINE_REQUESTS = 10
+DEFAULT_START_RATE = 2.0
+DEFAULT_MAX_RATE = 200.0
+DEFAULT_STEP_SECONDS = 3.0
+DEFAULT_COOLDOWN = 2.0
+# Bisection stops when the throttled and clean rates are within this share of each other
+DEFAULT_PRECISION = 0.1
+MAX_THREADS = 64
+
+TARGETS = {
+    "esus-config": "/api/esus-aps/configuration/general_settings",
+    "telemedicine-session": "/api/telemedicine/sessions/{session_id}",
+}
+
+
+@dataclasses.dataclass
+class Reply:
+    offset: float  # seconds since the step started
+    status: int  # 0: no response
+    latency: float
+    retry_after: str = None
+
+
+@dataclasses.dataclass
+class Step:
+    rate: float  # arrivals per second; 0 for a burst
+    replies: list
+
+    @property
+    def throttled(self):
+        return [reply for reply in self.replies if reply.status == 429]
+
+    @property
+    def admitted(self):
+        return [reply for reply in self.replies if 200 <= reply.status < 300]
+
+    def summary(self):
+        first = min((reply.offset for reply in self.throttled), default=None)
+        return {
+            "rate": self.rate,
+            "sent": len(self.replies),
+            "admitted": len(self.admitted),
+            "throttled": len(self.throttled),
+            "errors": len(self.replies) - len(self.admitted) - len(self.throttled),
+            "first_429_after": first,
+        }
+
+
+def _histogram(replies):
+    hist = load.Histogram()
+    for reply in replies:
+        hist.record(reply.latency)
+    return hist.summary()
+
+
+def _retry_after(reply):
+    """``Retry-After`` in seconds (delta or HTTP date), or ``None`` when missing or invalid."""
+    if reply.retry_after is None:
+        return None
+    try:
+        return max(0.0, float(reply.retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(reply.retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Probe:
+    def __init__(self, url, headers, step_seconds=DEFAULT_STEP_SECONDS, cooldown=DEFAULT_COOLDOWN):
+        self.url = url
+        self.headers = headers
+        self.step_seconds = step_seconds
+        self.cooldown = cooldown
+        self.steps = []
+        self._local = threading.local()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=MAX_THREADS, thread_name_prefix="probe")
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def _client(self):
+        if not hasattr(self._local, "client"):
+            self._local.client = api_client.Client(pool_size=1, headers=self.headers)
+            # Thousands of probe requests would flood the test's metrics file
+            self._local.client.timing_listeners.clear()
+        return self._local.client
+
+    def _send(self, started, intended=None):
+        begin = time.perf_counter()
+        try:
+            response = self._client().get(self.url, timeout=REQUEST_TIMEOUT)
+            status, retry_after = response.status_code, response.headers.get("Retry-After")
+        except requests.RequestException:
+            status, retry_after = 0, None
+        end = time.perf_counter()
+        # Open-loop latency counts from the intended start, so queueing is not hidden
+        since = started + intended if intended is not None else begin
+        return Reply(round(begin - started, 4), status, end - since, retry_after)
+
+    def settle(self):
+        """Wait until the bucket has refilled after the previous step."""
+        waits = [_retry_after(reply) for step in self.steps[-1:] for reply in step.throttled]
+        time.sleep(max([self.cooldown] + [wait for wait in waits if wait is not None]))
+
+    def baseline(self, count=BASELINE_REQUESTS):
+        started = time.perf_counter()
+        step = Step(0.0, [self._send(started) for _ in range(count)])
+        self.steps.append(step)
+        return step
+
+    def ramp_step(self, rate):
+        self.settle()
+        started = time.perf_counter()
+        futures = []
+        for intended in load.arrivals([load.Stage(self.step_seconds, rate)]):
+            delay = started + intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(self._executor.submit(self._send, started, intended))
+        step = Step(rate, [future.result() for future in futures])
+        self.steps.append(step)
+        return step
+
+    def burst(self, size):
+        """``size`` requests released together from one barrier."""
+        self.settle()
+        size = min(size, MAX_THREADS)
+        barrier = threading.Barrier(size)
+        started = time.perf_counter()
+
+        def fire():
+            barrier.wait()
+            return self._send(started)
+
+        step = Step(0.0, list(self._executor.map(lambda _: fire(), range(size))))
+        self.steps.append(step)
+        return step
+
+    def retry_after_honoured(self):
+        """Trigger a 429 with a full burst, wait its ``Retry-After`` once, and check the next request is admitted."""
+        throttled = self.burst(MAX_THREADS).throttled
+        if not throttled:
+            return {"valid": None, "honoured": None}
+        wait = max(_retry_after(reply) or 0.0 for reply in throttled)
+        if all(_retry_after(reply) is None for reply in throttled):
+            return {"valid": False, "honoured": None}
+        time.sleep(wait)
+        after = self._send(time.perf_counter())
+        return {"valid": True, "waited": wait, "honoured": 200 <= after.status < 300}
+
+
+def probe(url, headers, start_rate=DEFAULT_START_RATE, max_rate=DEFAULT_MAX_RATE, precision=DEFAULT_PRECISION, **kwargs):
+    """Measure the 429 onset, burst capacity, Retry-After and latency penalty of ``url``."""
+    runner = Probe(url, headers, **kwargs)
+    try:
+        baseline = runner.baseline()
+        clean, throttled = 0.0, None
+        rate = start_rate
+        while rate <= max_rate:
+            if runner.ramp_step(rate).throttled:
+                throttled = rate
+                break
+            clean, rate = rate, rate * 2
+        while throttled is not None and throttled - clean > precision * throttled:
+            middle = (clean + throttled) / 2
+            if runner.ramp_step(middle).throttled:
+                throttled = middle
+            else:
+                clean = middle
+
+        result = {
+            "url": url,
+            "baseline": _histogram(baseline.admitted),
+            "onset_rate": throttled,
+            "highest_clean_rate": clean,
+            "steps": [step.summary() for step in runner.steps[1:]],
+        }
+        if throttled is None:
+            result["note"] = f"no 429 up to {max_rate:g} requests/s"
+            return result
+
+        throttled_steps = [step for step in runner.steps[1:] if step.throttled]
+        all_429 = [reply for step in throttled_steps for reply in step.throttled]
+        admitted = [reply for step in throttled_steps for reply in step.admitted]
+        penalty = _histogram(admitted)
+        result["latency_under_limit"] = penalty
+        result["latency_penalty"] = {
+            key: penalty[key] - result["baseline"][key] for key in ("p50", "p95", "p99")
+        }
+        # Admitted within one burst before the first 429: the bucket's capacity
+        burst = runner.burst(max(8, int(throttled * 2)))
+        result["burst"] = dict(burst.summary(), capacity=len(burst.admitted))
+        # The onset depends on how long a step takes to drain the burst; the
+        # admitted rate of the fastest step beyond the burst is the refill rate
+        fastest = max(throttled_steps, key=lambda step: step.rate)
+        result["sustained_limit"] = max(0, len(fastest.admitted) - len(burst.admitted)) / runner.step_seconds
+        result["retry_after"] = {
+            "present": sum(reply.retry_after is not None for reply in all_429) / len(all_429),
+            "values": sorted({reply.retry_after for reply in all_429 if reply.retry_after is not None}),
+            **runner.retry_after_honoured(),
+        }
+        return result
+    finally:
+        runner.close()
+
+
+def _session(headers):
+    """Create the telemedicine session the probe reads; deleted by harness.cleanup."""
+    payload = {
+        "patientId": str(uuid.uuid4()),
+        "doctorId": str(uuid.uuid4()),
+        "scheduledTime": int(time.time()) + 3600,
+        "durationMinutes": 30,
+        "reason": "Rate-limit probe",
+    }
+    response = api_client.post(f"{config.BASE_URL}/api/telemedicine/sessions", json=payload, headers=headers, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    session_id = response.json()["id"]
+    cleanup.register(f"{config.BASE_URL}/api/telemedicine/sessions/{session_id}", headers=headers, label="rate-limit probe session")
+    return session_id
+
+
+def _print_result(name, result):
+    print(f"{name}: {result['url']}")
+    base = result["baseline"]
+    print(f"  baseline            p50={base['p50'] * 1000:.1f}ms p95={base['p95'] * 1000:.1f}ms")
+    for step in result["steps"]:
+        first = f", first 429 after {step['first_429_after']:.2f}s" if step["first_429_after"] is not None else ""
+        label = f"{step['rate']:g}/s" if step["rate"] else "burst"
+        print(f"  {label:<18}  {step['admitted']}/{step['sent']} admitted, {step['throttled']} throttled, {step['errors']} errors{first}")
+    if result["onset_rate"] is None:
+        print(f"  {result['note']}")
+        return
+    print(f"  429 onset           {result['onset_rate']:.1f}/s (clean at {result['highest_clean_rate']:.1f}/s)")
+    print(f"  burst capacity      {result['burst']['capacity']} of {result['burst']['sent']}")
+    print(f"  sustained limit     {result['sustained_limit']:.1f}/s")
+    penalty = result["latency_penalty"]
+    print(f"  latency penalty     p50 {penalty['p50'] * 1000:+.1f}ms p95 {penalty['p95'] * 1000:+.1f}ms p99 {penalty['p99'] * 1000:+.1f}ms")
+    retry = result["retry_after"]
+    print(
+        f"  Retry-After         on {retry['present']:.0%} of 429s {retry['values'][:5]}, "
+        f"valid={retry['valid']} honoured={retry['honoured']}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find where the API starts answering 429 and how it behaves then")
+    parser.add_argument("targets", nargs="*", default=list(TARGETS), help=f"any of {', '.join(TARGETS)}")
+    parser.add_argument("--start-rate", type=float, default=DEFAULT_START_RATE, help="first ramp rate (requests/s)")
+    parser.add_argument("--max-rate", type=float, default=DEFAULT_MAX_RATE, help="give up above this rate")
+    parser.add_argument("--step-seconds", type=float, default=DEFAULT_STEP_SECONDS, help="duration of each ramp step")
+    parser.add_argument("--cooldown", type=float, default=DEFAULT_COOLDOWN, help="minimum wait between steps")
+    parser.add_argument("--precision", type=float, default=DEFAULT_PRECISION, help="relative precision of the onset rate")
+    parser.add_argument("--json", dest="json_path", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    results = {}
+    with userpool.lease("gestor") as user:
+        headers = {"Authorization": f"Bearer {userpool.login(user)}"}
+        for name in args.targets:
+            path = TARGETS[name]
+            if "{session_id}" in path:
+                path = path.format(session_id=_session(headers))
+            results[name] = probe(
+                config.BASE_URL + path, headers,
+                start_rate=args.start_rate, max_rate=args.max_rate, precision=args.precision,
+                step_seconds=args.step_seconds, cooldown=args.cooldown,
+            )
+            _print_result(name, results[name])
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out:
+            json.dump(results, out, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,399 @@
+"""Deterministic Markdown and HTML test reports.
+
+Replaces the ``tmp/report_prompt.json`` round trip to an LLM: the report is
+rendered locally from ``tmp/test_results.json`` with fixed templates, so the
+same inputs always give the same files and no network is needed::
+
+    python -m harness.report                      # testsprite-mcp-test-report.md/.html
+    python -m harness.report --results other.json --out-dir /tmp/report
+
+Results are read one array element at a time and reduced to a small row as
+they arrive (test code is never kept), so runs of thousands of results
+render in a fraction of a second. Each test is filed under the requirement
+(``tmp/code_summary.json`` feature) that ``harness.impact.FEATURE_TESTS``
+maps its script to. When present, the report also uses:
+
+* the per-test analysis in ``tmp/report_prompt.json`` (failure reason,
+  component, recommendation, severity, visualization link), only for results
+  it was written for: same testId, status and error. A test that has since
+  passed or fails differently shows no stale findings;
+* the request records of ``harness.metrics`` for a latency summary.
+
+The HTML file is self-contained (inline CSS, no scripts).
+"""
+
+import argparse
+import ast
+import collections
+import dataclasses
+import datetime
+import html
+import json
+import os
+import re
+import sys
+import time
+import unicodedata
+
+from harness import config, impact, metrics
+
+RESULTS_PATH = os.path.join(config.TMP_DIR, "test_results.json")
+ANALYSIS_PATH = os.path.join(config.TMP_DIR, "report_prompt.json")
+REPORT_NAME = "testsprite-mcp-test-report"
+OTHER_REQUIREMENT = "Other"
+PREPARED_BY = "TestSprite AI Team"
+SLOWEST_TESTS = 5
+SLOWEST_ENDPOINTS = 10
+READ_CHUNK = 1 << 16
+
+STATUS_LABELS = {
+    "PASSED": "✅ Passed",
+    "FAILED": "❌ Failed",
+}
+
+HTML_STYLE = """
+body { font-family: sans-serif; padding: 40px; line-height: 1.6; background: #fdfdfd; color: #333; }
+pre { background: #f4f4f4; padding: 10px; border-radius: 5px; overflow-x: auto; }
+code { font-family: monospace; background: #eee; padding: 2px 4px; }
+table { border-collapse: collapse; width: 100%; margin-top: 20px; }
+th, td { border: 1px solid #ccc; padding: 8px 12px; text-align: left; }
+th { background-color: #f2f2f2; font-weight: bold; }
+.passed { color: #1a7f37; }
+.failed { color: #cf222e; }
+"""
+
+
+@dataclasses.dataclass
+class Row:
+    test_id: str
+    script: str
+    name: str
+    status: str
+    test_type: str
+    error: str
+    duration: float
+    analysis: dict
+
+
+def iter_json_array(path, chunk_size=READ_CHUNK):
+    """Yield the elements of the top-level JSON array in ``path`` one by one."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as source:
+        buffer = source.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} is not a JSON array")
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().lstrip(",").lstrip()
+            if buffer.startswith("]"):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                more = source.read(chunk_size)
+                eof = not more
+                buffer += more
+                continue
+            yield item
+            buffer = buffer[end:]
+
+
+def script_name(title):
+    """``TC001-multi profile ...`` -> ``TC001_multi_profile_...`` (the TC script name)."""
+    ascii_title = unicodedata.normalize("NFKD", title).encode("ascii", "ignore").decode()
+    return re.sub(r"[^0-9A-Za-z]+", "_", ascii_title).strip("_")
+
+
+def _timestamp(value):
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() if value else None
+
+
+def load_analysis(path=ANALYSIS_PATH):
+    """Per-test analysis from a TestSprite report prompt, keyed by testId."""
+    try:
+        with open(path, encoding="utf-8") as source:
+            prompt = json.load(source)
+    except (OSError, ValueError):
+        return {}
+    analysis = {}
+    for action in prompt.get("next_action", []):
+        cases = action.get("input", {}).get("testResult", [])
+        if isinstance(cases, str):
+            # The MCP tool stores it as a Python literal
+            try:
+                cases = ast.literal_eval(cases)
+            except (ValueError, SyntaxError):
+                continue
+        for case in cases:
+            # The testId is the last segment of the dashboard link
+            link = case.get("testVisualizationAndResult") or ""
+            test_id = link.rstrip("/").rsplit("/", 1)[-1]
+            if test_id:
+                analysis[test_id] = case
+    return analysis
+
+
+def _analysis_for(result, analysis):
+    """The analysis of ``result`` if it was written for this very outcome, else ``{}``."""
+    case = analysis.get(result.get("testId"), {})
+    if not case or case.get("testStatus") != result.get("testStatus"):
+        return {}
+    if (case.get("testError") or "").strip() != (result.get("testError") or "").strip():
+        return {}
+    return case
+
+
+def requirement_index():
+    """Script name -> requirement (first feature in ``FEATURE_TESTS`` covering it)."""
+    index = {}
+    for feature, scripts in impact.FEATURE_TESTS.items():
+        for script in scripts:
+            index.setdefault(script.lower(), feature)
+    return index
+
+
+def _error_summary(error):
+    lines = [line.strip() for line in (error or "").strip().splitlines() if line.strip()]
+    return lines[-1] if lines else ""
+
+
+def collect(results_path, analysis, requirements):
+    """Stream ``results_path`` into ``Row``s grouped by requirement, plus run metadata."""
+    groups = collections.defaultdict(list)
+    last_modified = None
+    for result in iter_json_array(results_path):
+        script = script_name(result.get("title", result.get("testId", "")))
+        created = _timestamp(result.get("created"))
+        modified = _timestamp(result.get("modified"))
+        if modified:
+            last_modified = max(last_modified or modified, modified)
+        match = re.match(r"(TC\d+)[-_ ]*(.*)", result.get("title", ""))
+        row = Row(
+            test_id=match.group(1) if match else result.get("testId", "N/A"),
+            script=script,
+            name=(match.group(2) if match else result.get("title", "")) or "N/A",
+            status=result.get("testStatus", "UNKNOWN"),
+            test_type=result.get("testType", "N/A"),
+            error=result.get("testError") or "",
+            duration=modified - created if created and modified else None,
+            analysis=_analysis_for(result, analysis),
+        )
+        groups[requirements.get(script.lower(), OTHER_REQUIREMENT)].append(row)
+    return groups, last_modified
+
+
+def _descriptions():
+    """Requirement descriptions from ``tmp/code_summary.json``."""
+    try:
+        with open(impact.CODE_SUMMARY_PATH, encoding="utf-8") as source:
+            return {feature["name"]: feature.get("description", "") for feature in json.load(source)["features"]}
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def _project_name():
+    """Project name TestSprite was run with (``tmp/config.json``), else the repo directory."""
+    try:
+        with open(os.path.join(config.TMP_DIR, "config.json"), encoding="utf-8") as source:
+            execution_args = json.load(source).get("executionArgs") or {}
+    except (OSError, ValueError):
+        execution_args = {}
+    if isinstance(execution_args, dict) and execution_args.get("projectName"):
+        return execution_args["projectName"]
+    return os.path.basename(impact.REPO_DIR)
+
+
+def _version():
+    try:
+        with open(os.path.join(impact.REPO_DIR, "package.json"), encoding="utf-8") as source:
+            return json.load(source).get("version", "N/A")
+    except (OSError, ValueError):
+        return "N/A"
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+def summarize(groups, metrics_dir=None):
+    rows = [row for group in groups.values() for row in group]
+    counts = collections.Counter(row.status for row in rows)
+    durations = [row.duration for row in rows if row.duration is not None]
+    summary = {
+        "total": len(rows),
+        "passed": counts["PASSED"],
+        "failed": counts["FAILED"],
+        "other": len(rows) - counts["PASSED"] - counts["FAILED"],
+        "pass_rate": 100.0 * counts["PASSED"] / len(rows) if rows else 0.0,
+        "duration_total": sum(durations),
+        "duration_p50": _percentile(durations, 0.5),
+        "duration_p95": _percentile(durations, 0.95),
+        "duration_max": max(durations, default=None),
+        "slowest": sorted((row for row in rows if row.duration is not None), key=lambda row: (-row.duration, row.test_id))[:SLOWEST_TESTS],
+        "requirements": [
+            (name, len(group), sum(row.status == "PASSED" for row in group), sum(row.status == "FAILED" for row in group))
+            for name, group in _ordered(groups)
+        ],
+        "latency": [],
+    }
+    if metrics_dir and os.path.isdir(metrics_dir):
+        summary["latency"] = metrics.slowest(metrics.load(metrics_dir), SLOWEST_ENDPOINTS)
+    return summary
+
+
+def _ordered(groups):
+    """Requirements in ``FEATURE_TESTS`` order, ``Other`` last; rows by test ID."""
+    order = {name: index for index, name in enumerate(impact.FEATURE_TESTS)}
+    for name in sorted(groups, key=lambda name: (order.get(name, len(order)), name)):
+        yield name, sorted(groups[name], key=lambda row: (row.test_id, row.script))
+
+
+def _cell(value):
+    return str(value).replace("|", "\\|").replace("\n", " ")
+
+
+def _seconds(value):
+    return "N/A" if value is None else f"{value:.1f}s"
+
+
+def render_markdown(groups, summary, meta):
+    out = []
+    write = out.append
+    write("# TestSprite AI Testing Report (MCP)\n\n---\n\n## 1️⃣ Document Metadata\n")
+    write(f"- **Project Name:** {meta['project']}\n- **Version:** {meta['version']}\n")
+    write(f"- **Date:** {meta['date']}\n- **Prepared by:** {PREPARED_BY}\n\n---\n\n")
+    write("## 2️⃣ Requirement Validation Summary\n\n")
+    for name, rows in _ordered(groups):
+        write(f"### Requirement: {name}\n")
+        if name in meta["descriptions"]:
+            write(f"- **Description:** {meta['descriptions'][name]}\n")
+        write("\n")
+        for number, row in enumerate(rows, 1):
+            analysis = row.analysis
+            write(f"#### Test {number}\n")
+            write(f"- **Test ID:** {row.test_id}\n")
+            write(f"- **Test Name:** {row.name}\n")
+            write(f"- **Test Code:** [{row.script}.py](./{row.script}.py)\n")
+            write(f"- **Test Error:** {_error_summary(row.error) if row.status != 'PASSED' else 'N/A'}\n")
+            write(f"- **Test Visualization and Result:** {analysis.get('testVisualizationAndResult', 'N/A')}\n")
+            write(f"- **Status:** {STATUS_LABELS.get(row.status, '⚠️ ' + row.status.title())}\n")
+            write(f"- **Duration:** {_seconds(row.duration)}\n")
+            write(f"- **Severity:** {analysis.get('severity', 'N/A').upper()}\n")
+            findings = " ".join(filter(None, (analysis.get("failureReason"), analysis.get("recommendation"))))
+            write(f"- **Analysis / Findings:** {findings or 'N/A'}\n\n---\n\n")
+
+    write("## 3️⃣ Coverage & Matching Metrics\n\n")
+    write(f"- **{summary['pass_rate']:.1f}%** of tests passed ({summary['passed']} of {summary['total']})\n")
+    write(f"- **Duration:** total {_seconds(summary['duration_total'])}, p50 {_seconds(summary['duration_p50'])}, "
+          f"p95 {_seconds(summary['duration_p95'])}, max {_seconds(summary['duration_max'])}\n\n")
+    write("| Requirement | Total Tests | ✅ Passed | ⚠️ Partial | ❌ Failed |\n")
+    write("|-------------|-------------|-----------|-------------|------------|\n")
+    for name, total, passed, failed in summary["requirements"]:
+        write(f"| {_cell(name)} | {total} | {passed} | {total - passed - failed} | {failed} |\n")
+    write("\n---\n\n## 4️⃣ Performance\n\n### Slowest tests\n\n| Test | Status | Duration |\n|------|--------|----------|\n")
+    for row in summary["slowest"]:
+        write(f"| {_cell(row.test_id)} {_cell(row.name)} | {row.status} | {_seconds(row.duration)} |\n")
+    if summary["latency"]:
+        write("\n### Slowest endpoints (p95)\n\n| Method | Endpoint | Requests | p95 | Max |\n|--------|----------|----------|-----|-----|\n")
+        for endpoint, method, count, p95, slowest in summary["latency"]:
+            write(f"| {method} | `{endpoint}` | {count} | {p95 * 1000:.0f} ms | {slowest * 1000:.0f} ms |\n")
+    return "".join(out)
+
+
+def render_html(groups, summary, meta):
+    e = html.escape
+    out = []
+    write = out.append
+    write('<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8" />\n')
+    write('<meta name="viewport" content="width=device-width, initial-scale=1.0" />\n')
+    write(f"<title>TestSprite AI Testing Report - {e(meta['project'])}</title>\n<style>{HTML_STYLE}</style>\n</head>\n<body>\n")
+    write("<h1>TestSprite AI Testing Report (MCP)</h1>\n<h2>1️⃣ Document Metadata</h2>\n<ul>\n")
+    for label, value in (("Project Name", meta["project"]), ("Version", meta["version"]), ("Date", meta["date"]), ("Prepared by", PREPARED_BY)):
+        write(f"<li><strong>{label}:</strong> {e(value)}</li>\n")
+    write("</ul>\n<h2>2️⃣ Requirement Validation Summary</h2>\n")
+    for name, rows in _ordered(groups):
+        write(f"<h3>Requirement: {e(name)}</h3>\n")
+        if name in meta["descriptions"]:
+            write(f"<p>{e(meta['descriptions'][name])}</p>\n")
+        write("<table>\n<tr><th>Test ID</th><th>Test Name</th><th>Status</th><th>Duration</th><th>Severity</th><th>Error / Findings</th></tr>\n")
+        for row in rows:
+            analysis = row.analysis
+            css = "passed" if row.status == "PASSED" else "failed"
+            details = ""
+            if row.status != "PASSED":
+                details = f"<details><summary>{e(_error_summary(row.error))}</summary><pre>{e(row.error)}</pre></details>"
+            findings = " ".join(filter(None, (analysis.get("failureReason"), analysis.get("recommendation"))))
+            link = analysis.get("testVisualizationAndResult")
+            name_cell = f'<a href="{e(link)}">{e(row.name)}</a>' if link else e(row.name)
+            write(
+                f"<tr><td>{e(row.test_id)}</td><td>{name_cell}</td>"
+                f'<td class="{css}">{e(STATUS_LABELS.get(row.status, row.status))}</td>'
+                f"<td>{_seconds(row.duration)}</td><td>{e(analysis.get('severity', 'N/A').upper())}</td>"
+                f"<td>{details}{e(findings)}</td></tr>\n"
+            )
+        write("</table>\n")
+
+    write("<h2>3️⃣ Coverage &amp; Matching Metrics</h2>\n<ul>\n")
+    write(f"<li><strong>{summary['pass_rate']:.1f}%</strong> of tests passed ({summary['passed']} of {summary['total']})</li>\n")
+    write(f"<li><strong>Duration:</strong> total {_seconds(summary['duration_total'])}, p50 {_seconds(summary['duration_p50'])}, "
+          f"p95 {_seconds(summary['duration_p95'])}, max {_seconds(summary['duration_max'])}</li>\n</ul>\n")
+    write("<table>\n<tr><th>Requirement</th><th>Total Tests</th><th>✅ Passed</th><th>⚠️ Partial</th><th>❌ Failed</th></tr>\n")
+    for name, total, passed, failed in summary["requirements"]:
+        write(f"<tr><td>{e(name)}</td><td>{total}</td><td>{passed}</td><td>{total - passed - failed}</td><td>{failed}</td></tr>\n")
+    write("</table>\n<h2>4️⃣ Performance</h2>\n<h3>Slowest tests</h3>\n<table>\n<tr><th>Test</th><th>Status</th><th>Duration</th></tr>\n")
+    for row in summary["slowest"]:
+        write(f"<tr><td>{e(row.test_id)} {e(row.name)}</td><td>{e(row.status)}</td><td>{_seconds(row.duration)}</td></tr>\n")
+    write("</table>\n")
+    if summary["latency"]:
+        write("<h3>Slowest endpoints (p95)</h3>\n<table>\n<tr><th>Method</th><th>Endpoint</th><th>Requests</th><th>p95</th><th>Max</th></tr>\n")
+        for endpoint, method, count, p95, slowest in summary["latency"]:
+            write(f"<tr><td>{e(method)}</td><td><code>{e(endpoint)}</code></td><td>{count}</td>"
+                  f"<td>{p95 * 1000:.0f} ms</td><td>{slowest * 1000:.0f} ms</td></tr>\n")
+        write("</table>\n")
+    write("</body>\n</html>\n")
+    return "".join(out)
+
+
+def generate(results_path=RESULTS_PATH, out_dir=config.TESTS_DIR, name=REPORT_NAME, analysis_path=ANALYSIS_PATH,
+             metrics_dir=metrics.METRICS_DIR):
+    """Write ``<name>.md`` and ``<name>.html`` to ``out_dir`` and return their paths."""
+    groups, last_modified = collect(results_path, load_analysis(analysis_path), requirement_index())
+    meta = {
+        "project": _project_name(),
+        "version": _version(),
+        # The run's own date keeps the output identical for identical inputs
+        "date": datetime.datetime.fromtimestamp(last_modified, datetime.timezone.utc).strftime("%Y-%m-%d") if last_modified else "N/A",
+        "descriptions": _descriptions(),
+    }
+    summary = summarize(groups, metrics_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for extension, render in (("md", render_markdown), ("html", render_html)):
+        path = os.path.join(out_dir, f"{name}.{extension}")
+        with open(path, "w", encoding="utf-8") as out:
+            out.write(render(groups, summary, meta))
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the Markdown and HTML test reports")
+    parser.add_argument("--results", default=RESULTS_PATH, help="TestSprite test_results.json")
+    parser.add_argument("--analysis", default=ANALYSIS_PATH, help="report_prompt.json with per-test analysis")
+    parser.add_argument("--metrics", default=metrics.METRICS_DIR, help="harness.metrics records for the latency summary")
+    parser.add_argument("--out-dir", default=config.TESTS_DIR, help="directory for the report files")
+    parser.add_argument("--name", default=REPORT_NAME, help="report file name without extension")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    paths = generate(args.results, args.out_dir, args.name, args.analysis, args.metrics)
+    print(f"Wrote {', '.join(paths)} in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
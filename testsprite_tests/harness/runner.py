@@ -0,0 +1,383 @@
+"""Parallel runner for the TC scripts.
+
+Every script is importable without side effects and exposes one entry point:
+``async def run_test()`` for the Playwright scripts or a top-level
+``def test_*()`` for the requests-based API scripts. Collection reads those
+names with ``ast``, so nothing is imported until a test actually runs.
+
+Each test runs in its own Python process (and therefore its own event loop),
+at most ``--workers`` at a time, and is killed when it exceeds ``--timeout``::
+
+    cd testsprite_tests
+    python -m harness.runner --workers 8 --timeout 180 --browsers 2
+    python -m harness.runner -k TC00 --json tmp/runner_results.json
+    python -m harness.runner --changed origin/main   # only tests affected by the diff
+    python -m harness.runner --standin -k _          # API scripts against harness.standin
+    python -m harness.runner --standin --user-pool 1 -k _
+    python -m harness.runner --shard 2/4             # one CI matrix job, see harness.shard
+
+Each child gets its test ID in ``TESTSPRITE_TEST_ID`` so ``harness.metrics``
+can tag its request records, and its worker slot in ``TESTSPRITE_WORKER``;
+the run ends with a Prometheus snapshot of the records. Resources a test
+registered with ``harness.cleanup`` are deleted in the background once it
+finishes, and the rest at the end of the run. ``--user-pool N``
+provisions N demo users per profile and worker (``harness.userpool``) before
+the run; pool users, including those tests created on demand or tracked,
+are deleted after every run.
+The Web Vitals samples of browser tests (``harness.vitals``) are attached to
+each result in the ``--json`` output, and the time saved by browser tests
+that ``harness.budget`` aborted early is summed up; children get the
+``--timeout`` in ``TESTSPRITE_TIMEOUT`` so their budget ends first. Failed
+browser tests are run once more with tracing on and leave a trace of their
+last steps in ``tmp/artifacts/traces`` (``harness.trace``, see ``--trace``);
+the retry never changes a result. Test durations are
+recorded for ``harness.shard`` (except with ``--standin``, whose timings are
+not the app's). ``harness.plan`` flows with pending steps, which would fail
+by design, are reported as skipped instead of run.
+"""
+
+import argparse
+import ast
+import collections
+import concurrent.futures
+import dataclasses
+import glob
+import importlib.util
+import inspect
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+from harness import config, metrics
+
+PASSED = "PASSED"
+FAILED = "FAILED"
+TIMEOUT = "TIMEOUT"
+SKIPPED = "SKIPPED"
+
+DEFAULT_TIMEOUT = 300
+POLL_INTERVAL = 0.05
+
+
+@dataclasses.dataclass
+class TestCase:
+    id: str
+    path: str
+    entry: str
+    kind: str  # "browser" or "api"
+    # Steps a harness.plan flow could not compile; its durations are not recorded
+    pending: int = 0
+
+
+@dataclasses.dataclass
+class TestResult:
+    id: str
+    status: str
+    duration: float
+    returncode: int = None
+    output: str = ""
+    # harness.vitals samples recorded by the test
+    vitals: list = dataclasses.field(default_factory=list)
+
+
+def _entry_point(path):
+    with open(path, encoding="utf-8") as source:
+        tree = ast.parse(source.read(), filename=path)
+    pending = 0
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, "id", None) == "PENDING_STEPS" for target in node.targets):
+            pending = len(ast.literal_eval(node.value))
+    for node in tree.body:
+        if isinstance(node, ast.AsyncFunctionDef) and node.name == "run_test":
+            return node.name, "browser", pending
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name.startswith("test_"):
+            return node.name, "api", pending
+    return None, None, pending
+
+
+def collect(paths=None, keyword=None):
+    """Return the ``TestCase`` entries for ``paths`` (default: every TC script)."""
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(config.TESTS_DIR, "TC*.py")))
+    cases = []
+    for path in paths:
+        test_id = os.path.splitext(os.path.basename(path))[0]
+        if keyword and keyword.lower() not in test_id.lower():
+            continue
+        entry, kind, pending = _entry_point(path)
+        if entry is None:
+            continue
+        cases.append(TestCase(test_id, os.path.abspath(path), entry, kind, pending))
+    return cases
+
+
+def load_entry(case):
+    """Import a TC script and return its entry point function."""
+    spec = importlib.util.spec_from_file_location(case.id, case.path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, case.entry)
+
+
+def execute(case):
+    """Run one test in the current process."""
+    entry = load_entry(case)
+    if inspect.iscoroutinefunction(entry):
+        from harness import browser
+
+        browser.run(entry)
+    else:
+        entry()
+
+
+class _Running:
+    def __init__(self, case, env, slot, timeout):
+        self.case = case
+        self.slot = slot
+        self.log = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        self.started = time.monotonic()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "harness.runner", "--exec", case.path, "--entry", case.entry, "--kind", case.kind],
+            cwd=config.TESTS_DIR,
+            env=dict(env, **{metrics.TEST_ID_ENV: case.id, config.WORKER_ENV: str(slot), config.TIMEOUT_ENV: str(timeout)}),
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+        )
+
+    def finish(self, status):
+        duration = time.monotonic() - self.started
+        self.log.seek(0)
+        output = self.log.read()
+        self.log.close()
+        samples = metrics.test_records(self.case.id, kind="vitals")
+        return TestResult(self.case.id, status, duration, self.process.returncode, output, samples)
+
+
+def run(cases, workers=None, timeout=DEFAULT_TIMEOUT, env=None, on_result=None, before_start=None):
+    """Run ``cases`` in isolated processes, ``workers`` at a time, and return their results."""
+    workers = workers or os.cpu_count() or 1
+    env = dict(os.environ if env is None else env)
+    pending = collections.deque(cases)
+    running = []
+    results = []
+
+    while pending or running:
+        while pending and len(running) < workers:
+            if before_start is not None:
+                before_start()
+            # Lowest free worker slot, so per-worker resources (harness.userpool) are never shared
+            slot = min(set(range(workers)) - {item.slot for item in running})
+            running.append(_Running(pending.popleft(), env, slot, timeout))
+
+        time.sleep(POLL_INTERVAL)
+        for item in list(running):
+            if item.process.poll() is not None:
+                result = item.finish(PASSED if item.process.returncode == 0 else FAILED)
+            elif time.monotonic() - item.started > timeout:
+                item.process.kill()
+                item.process.wait()
+                result = item.finish(TIMEOUT)
+            else:
+                continue
+            running.remove(item)
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return results
+
+
+def _print_result(result):
+    print(f"{result.status:<8} {result.duration:7.2f}s  {result.id}", flush=True)
+    if result.status != PASSED and result.output.strip():
+        tail = result.output.strip().splitlines()[-15:]
+        print("\n".join("    " + line for line in tail), flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the TC scripts in parallel")
+    parser.add_argument("paths", nargs="*", help="TC scripts to run (default: all)")
+    parser.add_argument("-k", dest="keyword", help="only run tests whose id contains KEYWORD")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="parallel processes (default: CPU count)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="per-test timeout in seconds")
+    parser.add_argument("--browsers", type=int, default=0, help="share a pool of N browser servers between workers")
+    parser.add_argument("--json", dest="json_path", help="write results to this JSON file")
+    parser.add_argument(
+        "--standin", action="store_true",
+        help="serve the API contracts from harness.standin on the BASE_URL port during the run",
+    )
+    parser.add_argument(
+        "--user-pool", type=int, default=0, metavar="N",
+        help="lease demo users from a pool of N per profile and worker, deleted after the run",
+    )
+    parser.add_argument(
+        "--trace", choices=["retry", "on", "off"], default="retry",
+        help="trace the last steps of failing browser tests by re-running them traced (default), "
+             "by tracing every test, or not at all; see harness.trace",
+    )
+    parser.add_argument(
+        "--changed", nargs="?", const="HEAD", metavar="REF",
+        help="only run tests affected by changes since REF (default: uncommitted changes), see harness.impact",
+    )
+    parser.add_argument(
+        "--shard", metavar="I/N",
+        help="only run shard I of N, balanced by recorded test durations (see harness.shard)",
+    )
+    parser.add_argument("--exec", dest="exec_path", help=argparse.SUPPRESS)
+    parser.add_argument("--entry", help=argparse.SUPPRESS)
+    parser.add_argument("--kind", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.exec_path:
+        case_id = os.path.splitext(os.path.basename(args.exec_path))[0]
+        execute(TestCase(case_id, args.exec_path, args.entry, args.kind))
+        return 0
+
+    cases = collect(args.paths, args.keyword)
+    if not cases:
+        print("No tests collected")
+        return 1
+    if args.changed:
+        from harness import impact
+
+        selection = impact.select(impact.changed_files(args.changed))
+        if not selection.run_all:
+            cases = [case for case in cases if case.id in selection.tests]
+        print(f"Change-aware selection since {args.changed}: {'all' if selection.run_all else len(cases)} tests")
+    if args.shard:
+        from harness import shard
+
+        cases = shard.select(cases, args.shard)
+        print(f"Shard {args.shard}: {len(cases)} tests")
+    if not cases:
+        # An empty --changed or --shard selection is not a failure
+        print("Nothing to run in this selection")
+        return 0
+
+    pool = None
+    standin_server = None
+    env = dict(os.environ)
+    if args.standin:
+        from harness import standin
+
+        base = urllib.parse.urlsplit(config.BASE_URL)
+        standin_server = standin.StandinServer(base.port or 80, base.hostname).start()
+    if args.browsers and any(case.kind == "browser" for case in cases):
+        from harness.browser import BrowserPool
+
+        pool = BrowserPool(args.browsers).start()
+        env.update(pool.environ())
+
+    # Imported here so collect() (used by harness.shard in bare CI jobs) needs no third-party packages
+    from harness import cleanup
+
+    metrics.reset()
+    cleanup.reset_leaks()
+    if any(case.kind == "browser" for case in cases):
+        from harness import trace
+
+        trace.reset()
+        # With retry, passing tests run untraced; only failures are run again with a trace
+        env[trace.MODE_ENV] = trace.ON if args.trace == trace.ON else trace.OFF
+    # Deletes a finished test's resources off the critical path of the next tests
+    cleaner = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="cleanup")
+    cleanups = []
+
+    def on_result(result):
+        _print_result(result)
+        cleanups.append(cleaner.submit(cleanup.collect, result.id))
+
+    def on_retry(result):
+        # The first attempt's result stands; the retry only leaves its trace
+        print(f"{'traced':<8} {result.duration:7.2f}s  {result.id} ({result.status} on retry)", flush=True)
+        cleanups.append(cleaner.submit(cleanup.collect, result.id))
+
+    skipped = [
+        TestResult(case.id, SKIPPED, 0.0, output=f"{case.pending} plan steps have no harness/selector_map.json rule")
+        for case in cases if case.pending
+    ]
+    for result in skipped:
+        _print_result(result)
+
+    started = time.monotonic()
+    try:
+        if args.user_pool:
+            from harness import userpool
+
+            workers = min(args.workers or os.cpu_count() or 1, len(cases))
+            created = userpool.provision(args.user_pool, workers)
+            print(f"User pool: {created} demo users created in {time.monotonic() - started:.2f}s")
+        results = skipped + run(
+            [case for case in cases if not case.pending],
+            workers=args.workers,
+            timeout=args.timeout,
+            env=env,
+            on_result=on_result,
+            before_start=pool.ensure_running if pool else None,
+        )
+        failed_ids = {result.id for result in results if result.status in (FAILED, TIMEOUT)}
+        retry = [case for case in cases if case.kind == "browser" and case.id in failed_ids]
+        if retry and args.trace == trace.RETRY:
+            print(f"Tracing: re-running {len(retry)} failed browser tests with {trace.MODE_ENV}={trace.ON}", flush=True)
+            run(
+                retry,
+                workers=args.workers,
+                timeout=args.timeout,
+                env=dict(env, **{trace.MODE_ENV: trace.ON}),
+                on_result=on_retry,
+                before_start=pool.ensure_running if pool else None,
+            )
+    finally:
+        cleaner.shutdown(wait=True)
+        swept = [future.result() for future in cleanups] + [cleanup.collect()]
+        deleted = sum(result.deleted for result in swept)
+        leaked = [resource for result in swept for resource in result.leaked]
+        if deleted or leaked:
+            print(f"Cleanup: {deleted} resources deleted" + (f", {len(leaked)} leaked ({cleanup.LEAKS_PATH})" if leaked else ""))
+        from harness import userpool
+
+        # Also users created on demand or tracked by tests in runs without --user-pool
+        if userpool.size():
+            deleted, failed = userpool.delete_all()
+            print(f"User pool: {deleted} demo users deleted" + (f", {failed} failed" if failed else ""))
+        if pool is not None:
+            pool.stop()
+        if standin_server is not None:
+            standin_server.stop()
+    wall = time.monotonic() - started
+
+    counts = collections.Counter(result.status for result in results)
+    serial = sum(result.duration for result in results)
+    skipped_note = f", {counts[SKIPPED]} skipped" if counts[SKIPPED] else ""
+    print(
+        f"\n{len(results)} tests: {counts[PASSED]} passed, {counts[FAILED]} failed, {counts[TIMEOUT]} timed out{skipped_note} "
+        f"in {wall:.2f}s (serial time {serial:.2f}s)"
+    )
+    print(f"Request metrics: {metrics.write_prometheus()}")
+    if any(case.kind == "browser" for case in cases):
+        from harness import budget
+
+        # The first budget record of a test, not that of its traced retry
+        first = {}
+        for entry in metrics.load():
+            if entry["kind"] == budget.KIND:
+                first.setdefault(entry["test_id"], entry)
+        aborted = [entry for entry in first.values() if entry["aborted"]]
+        if aborted:
+            print(f"Fail-fast: {len(aborted)} browser tests aborted early, saving ~{sum(entry['saved'] for entry in aborted):.0f}s")
+    if not args.standin:
+        from harness import shard
+
+        shard.record(result for result in results if result.status != SKIPPED)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out:
+            json.dump([dataclasses.asdict(result) for result in results], out, indent=2)
+    return 0 if counts[PASSED] + counts[SKIPPED] == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
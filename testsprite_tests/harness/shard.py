@@ -0,0 +1,204 @@
+"""Duration-aware static sharding of the TC scripts for CI matrix jobs.
+
+Splitting the scripts round-robin leaves one CI job with TC007's browser
+flows while the others finish in seconds. This module estimates every test's
+duration from recorded results and packs the tests into N shards with the
+longest-processing-time-first rule: tests in decreasing estimated duration,
+each into the shard with the least estimated work so far. The longest shard
+is then at most 4/3 of the optimum.
+
+Estimates are the median of a test's last ``KEEP`` durations, taken from:
+
+* ``tmp/cache/durations.json``, which the runner updates after every run
+  (``record`` merges runner ``--json`` files, e.g. those of CI shards);
+* the ``harness.history`` database, for tests never run with the runner
+  (TestSprite titles such as ``TC007-navigation sidebar responsiveness``
+  are matched to script IDs);
+* the median of all known estimates, or ``DEFAULT_DURATION``, for new tests.
+
+Manifests depend only on the collected tests and the durations: ties are
+broken by test ID and every estimate is rounded to 0.1s, so every matrix job
+derives the same shards from the same history. Each manifest carries the
+SHA-256 of the estimates it was built from::
+
+    python -m harness.shard -n 4                          # show the shards
+    python -m harness.shard -n 4 --json tmp/shards.json   # write the manifests
+    python -m harness.shard -n 4 --kind browser --github-output matrix   # matrix for a CI job
+    python -m harness.shard record tmp/artifacts/shard-*.json
+    python -m harness.runner --shard 2/4
+"""
+
+import argparse
+import contextlib
+import hashlib
+import heapq
+import json
+import os
+import re
+import sqlite3
+import statistics
+import sys
+
+from harness import config
+
+DURATIONS_PATH = os.path.join(config.CACHE_DIR, "durations.json")
+KEEP = 20
+DEFAULT_DURATION = 60.0
+
+
+def normalize(name):
+    """``TC007-navigation sidebar responsiveness`` -> ``tc007_navigation_sidebar_responsiveness``."""
+    return re.sub(r"[^0-9a-z]+", "_", name.lower()).strip("_")
+
+
+def load_durations(path=DURATIONS_PATH):
+    """``{test_id: [seconds, ...]}``, oldest first."""
+    try:
+        with open(path, encoding="utf-8") as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return {}
+
+
+def record(results, path=DURATIONS_PATH):
+    """Add runner results (``TestResult`` or their ``--json`` dicts) to the recorded durations."""
+    durations = load_durations(path)
+    for result in results:
+        if not isinstance(result, dict):
+            result = {"id": result.id, "duration": result.duration}
+        samples = durations.setdefault(result["id"], [])
+        samples.append(round(result["duration"], 2))
+        del samples[:-KEEP]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        json.dump(durations, out, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+    return durations
+
+
+def _history_durations(db_path):
+    """``{normalized title: [seconds, ...]}`` from the ``harness.history`` database."""
+    if not os.path.exists(db_path):
+        return {}
+    found = {}
+    with contextlib.closing(sqlite3.connect(db_path)) as db:
+        try:
+            rows = db.execute(
+                "SELECT title, duration FROM results WHERE duration IS NOT NULL AND title IS NOT NULL ORDER BY created_ts"
+            ).fetchall()
+        except sqlite3.Error:
+            return {}
+    for title, duration in rows:
+        found.setdefault(normalize(title), []).append(duration)
+    return found
+
+
+def estimates(cases, durations=None, db_path=None):
+    """``{test_id: seconds}`` for every case, see the module docstring for the sources."""
+    from harness import history
+
+    durations = load_durations() if durations is None else durations
+    from_history = _history_durations(db_path or history.DB_PATH)
+    known = {}
+    for case in cases:
+        samples = durations.get(case.id) or from_history.get(normalize(case.id))
+        if samples:
+            known[case.id] = round(statistics.median(samples[-KEEP:]), 1)
+    fallback = round(statistics.median(known.values()), 1) if known else DEFAULT_DURATION
+    return {case.id: known.get(case.id, fallback) for case in cases}
+
+
+def lpt(weights, shards):
+    """Longest-processing-time-first: ``[[test_id, ...], ...]`` with ``shards`` lists."""
+    heap = [(0.0, index) for index in range(shards)]
+    assigned = [[] for _ in range(shards)]
+    for test_id in sorted(weights, key=lambda test_id: (-weights[test_id], test_id)):
+        load, index = heapq.heappop(heap)
+        assigned[index].append(test_id)
+        heapq.heappush(heap, (round(load + weights[test_id], 1), index))
+    return assigned
+
+
+def manifests(cases, shards, durations=None, db_path=None):
+    """One manifest dict per shard: its tests (script paths relative to the tests dir) and expected seconds."""
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+    weights = estimates(cases, durations, db_path)
+    digest = hashlib.sha256(json.dumps(weights, sort_keys=True).encode("utf-8")).hexdigest()
+    paths = {case.id: os.path.relpath(case.path, config.TESTS_DIR) for case in cases}
+    return [
+        {
+            "shard": index + 1,
+            "shards": shards,
+            "tests": [paths[test_id] for test_id in sorted(test_ids)],
+            "expected": round(sum(weights[test_id] for test_id in test_ids), 1),
+            "estimates": digest,
+        }
+        for index, test_ids in enumerate(lpt(weights, shards))
+    ]
+
+
+def select(cases, spec, durations=None):
+    """The cases of shard ``spec`` (``"I/N"``, 1-based)."""
+    try:
+        index, shards = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Expected a shard like 2/4, got {spec!r}") from None
+    if not 1 <= index <= shards:
+        raise ValueError(f"Shard {index} is not between 1 and {shards}")
+    wanted = set(manifests(cases, shards, durations)[index - 1]["tests"])
+    return [case for case in cases if os.path.relpath(case.path, config.TESTS_DIR) in wanted]
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if argv[:1] == ["record"]:
+        parser = argparse.ArgumentParser(prog="harness.shard record", description="Add runner --json results to the recorded durations")
+        parser.add_argument("paths", nargs="+", help="runner --json result files")
+        args = parser.parse_args(argv[1:])
+        results = []
+        for path in args.paths:
+            with open(path, encoding="utf-8") as source:
+                results += json.load(source)
+        record(results)
+        print(f"Recorded {len(results)} durations in {os.path.relpath(DURATIONS_PATH, config.TESTS_DIR)}")
+        return 0
+
+    parser = argparse.ArgumentParser(description="Split the TC scripts into duration-balanced shards")
+    parser.add_argument("paths", nargs="*", help="TC scripts to shard (default: all)")
+    parser.add_argument("-k", dest="keyword", help="only shard tests whose id contains KEYWORD")
+    parser.add_argument("-n", "--shards", type=int, required=True, help="number of shards")
+    parser.add_argument("--kind", choices=["browser", "api"], help="only shard tests of this kind")
+    parser.add_argument("--json", dest="json_path", help="write the manifests to this JSON file")
+    parser.add_argument(
+        "--github-output", metavar="NAME",
+        help="append the manifests as output NAME to $GITHUB_OUTPUT, for a matrix include",
+    )
+    args = parser.parse_args(argv)
+
+    from harness import runner
+
+    cases = [case for case in runner.collect(args.paths, args.keyword) if args.kind in (None, case.kind)]
+    shards = manifests(cases, args.shards)
+    for manifest in shards:
+        print(f"shard {manifest['shard']}/{manifest['shards']}  {manifest['expected']:8.1f}s  {len(manifest['tests'])} tests")
+        for path in manifest["tests"]:
+            print(f"    {path}")
+    expected = [manifest["expected"] for manifest in shards]
+    if expected and max(expected):
+        print(f"Longest shard {max(expected):.1f}s, imbalance {max(expected) / (sum(expected) / len(expected)):.2f}x the mean")
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as out:
+            json.dump(shards, out, indent=2)
+    if args.github_output:
+        # Space separated paths, so a matrix job can pass them straight to the runner
+        # Shards without tests are left out: a runner given no paths would run the whole suite
+        matrix = [dict(manifest, tests=" ".join(manifest["tests"])) for manifest in shards if manifest["tests"]]
+        with open(os.environ["GITHUB_OUTPUT"], "a", encoding="utf-8") as out:
+            out.write(f"{args.github_output}={json.dumps(matrix)}\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
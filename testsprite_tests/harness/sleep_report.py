@@ -0,0 +1,107 @@
+"""Static report of the fixed sleeps left in the TC scripts.
+
+Counts ``page.wait_for_timeout(ms)``, ``asyncio.sleep(s)`` and
+``time.sleep(s)`` calls with constant arguments, so the idle time removed by
+``harness.waits`` can be tracked as the scripts are migrated::
+
+    python -m harness.sleep_report
+    python -m harness.sleep_report --json
+
+Sleeps inside ``for``/``while`` loops are flagged, since their real cost is
+multiplied by the iteration count.
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import sys
+
+from harness import config
+
+# call name -> multiplier converting the argument to seconds
+SLEEP_CALLS = {
+    "wait_for_timeout": 0.001,
+    "asyncio.sleep": 1,
+    "time.sleep": 1,
+}
+
+
+def _call_name(func):
+    if isinstance(func, ast.Attribute):
+        if func.attr == "wait_for_timeout":
+            return func.attr
+        if isinstance(func.value, ast.Name):
+            return f"{func.value.id}.{func.attr}"
+    return None
+
+
+def _scan(node, in_loop, found):
+    for child in ast.iter_child_nodes(node):
+        looping = in_loop or isinstance(child, (ast.For, ast.AsyncFor, ast.While))
+        if isinstance(child, ast.Call):
+            name = _call_name(child.func)
+            if name in SLEEP_CALLS and child.args and isinstance(child.args[0], ast.Constant):
+                found.append(
+                    {
+                        "call": name,
+                        "line": child.lineno,
+                        "seconds": child.args[0].value * SLEEP_CALLS[name],
+                        "in_loop": in_loop,
+                    }
+                )
+        _scan(child, looping, found)
+
+
+def scan_file(path):
+    """Return the constant sleeps in ``path`` as dicts with call, line, seconds and in_loop."""
+    with open(path, encoding="utf-8") as source:
+        tree = ast.parse(source.read(), filename=path)
+    found = []
+    _scan(tree, False, found)
+    return sorted(found, key=lambda sleep: sleep["line"])
+
+
+def report(paths=None):
+    """Per-file totals of fixed sleep time, largest first."""
+    if not paths:
+        paths = sorted(glob.glob(os.path.join(config.TESTS_DIR, "TC*.py")))
+    rows = []
+    for path in paths:
+        sleeps = scan_file(path)
+        rows.append(
+            {
+                "file": os.path.basename(path),
+                "count": len(sleeps),
+                "seconds": round(sum(sleep["seconds"] for sleep in sleeps), 3),
+                "in_loop": sum(sleep["in_loop"] for sleep in sleeps),
+                "sleeps": sleeps,
+            }
+        )
+    return sorted(rows, key=lambda row: (-row["seconds"], row["file"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report fixed sleep time per TC script")
+    parser.add_argument("paths", nargs="*", help="scripts to scan (default: all TC scripts)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    rows = report(args.paths)
+    if args.json:
+        json.dump(rows, sys.stdout, indent=2)
+        print()
+        return 0
+
+    width = max((len(row["file"]) for row in rows), default=4)
+    print(f"{'file':<{width}}  sleeps  seconds  in loops")
+    for row in rows:
+        print(f"{row['file']:<{width}}  {row['count']:6d}  {row['seconds']:7.1f}  {row['in_loop']:8d}")
+    total = sum(row["seconds"] for row in rows)
+    print(f"{'total':<{width}}  {sum(row['count'] for row in rows):6d}  {total:7.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,893 @@
+"""Local stand-in for the backend contracts the API tests target.
+
+The API scripts call endpoints the dev server does not have
+(``/api/erp/philips-tasy/status``, ``/api/esus-aps/configuration/{section}``,
+``/api/mcp-server/orchestrate/esus-aps``, ``/api/telemedicine/sessions``...),
+so against ``npm run dev`` they all fail with 404. This module serves those
+contracts from memory on a plain asyncio HTTP/1.1 server (keep-alive, no
+dependencies) so the scripts can be exercised and benchmarked offline::
+
+    python -m harness.standin --port 8080                  # instead of the dev server
+    python -m harness.standin --latency "/api/erp/*=300:80" --errors "/api/datasus/*=0.05"
+    python -m harness.runner --standin -k TC00             # the runner starts and stops it
+
+Every route has a latency distribution (normal, median and standard deviation
+in ms, ``DEFAULT_FAULTS``) and an error rate; ``--latency``, ``--errors`` and
+``--rate-limit`` override them per path glob. Draws come from one seeded
+``random.Random`` (``--seed``), so a run's faults are reproducible.
+
+Contract notes:
+
+* ``/api/auth/login`` (also ``/auth/login`` and ``/login``) accepts any
+  non-empty credentials and issues an HS256 JWT with every demo profile.
+  Protected routes answer 401 without a bearer token or with a JWT this
+  server did not sign; opaque (non-JWT) tokens are accepted as API keys.
+* MCP orchestrations go ``queued`` -> ``running`` -> ``completed`` over
+  ``--orchestration-seconds``; the status route honours ``Prefer: wait=N``
+  (see ``harness.poll``). ``/api/esus-aps/synchronize`` moves the LEDI and
+  DW PEC ``last_sync`` after ``SYNC_SECONDS``.
+* GET paths outside ``/api/`` serve the repo's ``public/`` directory (the
+  locale files) and otherwise an HTML shell, like Vite's SPA fallback, so
+  ``harness.load`` flows can run against the stand-in alone.
+* Messages and dashboard titles follow ``Accept-Language`` (pt, en, es, fr;
+  Portuguese by default).
+* ``GET /__standin/stats`` returns per-route request, error and latency
+  counters.
+"""
+
+import argparse
+import asyncio
+import base64
+import collections
+import dataclasses
+import datetime
+import fnmatch
+import hashlib
+import hmac
+import json
+import mimetypes
+import os
+import random
+import re
+import secrets
+import socket
+import subprocess
+import sys
+import time
+import urllib.parse
+import uuid
+
+from harness import config
+
+PUBLIC_DIR = os.path.realpath(os.path.join(os.path.dirname(config.TESTS_DIR), "public"))
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+ORCHESTRATION_SECONDS = 3.0
+SYNC_SECONDS = 1.0
+TOKEN_TTL = 3600
+MAX_LONG_POLL = 30
+SERVER_START_TIMEOUT = 10
+PROFILES = ["Gestor", "Hospital", "Médico", "Paciente"]
+PROFILE_PATHS = {"Gestor": "gestor", "Hospital": "hospital", "Médico": "medico", "Paciente": "paciente"}
+
+SECURITY_HEADERS = {
+    "Content-Security-Policy": "default-src 'self'",
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Strict-Transport-Security": "max-age=31536000",
+}
+REASONS = {
+    200: "OK", 201: "Created", 202: "Accepted", 204: "No Content", 400: "Bad Request", 401: "Unauthorized",
+    404: "Not Found", 405: "Method Not Allowed", 429: "Too Many Requests", 500: "Internal Server Error",
+    502: "Bad Gateway", 503: "Service Unavailable",
+}
+SPA_SHELL = (
+    '<!doctype html><html lang="pt-BR"><head><meta charset="utf-8"><title>Vida Segura</title></head>'
+    '<body><div id="root"></div></body></html>'
+)
+
+# Localised texts for Accept-Language (the app's languages)
+MESSAGES = {
+    "pt": {
+        "created": "Usuário de demonstração criado", "required": "Email e senha são obrigatórios",
+        "invalid": "Email ou senha inválidos", "dashboard": "Dashboard",
+        "profiles": {"gestor": "gestor", "hospital": "hospital", "medico": "médico", "paciente": "paciente"},
+    },
+    "en": {
+        "created": "Demo user created", "required": "Email and password are required",
+        "invalid": "Invalid email or password", "dashboard": "Dashboard",
+        "profiles": {"gestor": "manager", "hospital": "hospital", "medico": "doctor", "paciente": "patient"},
+    },
+    "es": {
+        "created": "Usuario de demostración creado", "required": "Correo y contraseña son obligatorios",
+        "invalid": "Correo o contraseña inválidos", "dashboard": "Tablero",
+        "profiles": {"gestor": "gestor", "hospital": "hospital", "medico": "médico", "paciente": "paciente"},
+    },
+    "fr": {
+        "created": "Utilisateur de démonstration créé", "required": "Email et mot de passe obligatoires",
+        "invalid": "Email ou mot de passe invalide", "dashboard": "Tableau de bord",
+        "profiles": {"gestor": "gestionnaire", "hospital": "hôpital", "medico": "médecin", "paciente": "patient"},
+    },
+}
+
+ESUS_SECTIONS = {
+    "general_settings": {"enabled": True, "municipality_ibge": "3550308", "parameters": {"sync_interval_minutes": 30, "retry_attempts": 5}},
+    "patient_data": {"enabled": True, "source": "LEDI", "fields": ["cns", "cpf", "nome", "data_nascimento", "sexo"]},
+    "clinical_data": {"enabled": True, "source": "DW PEC", "record_types": ["atendimento_individual", "procedimentos", "vacinacao"]},
+    "health_team": {"enabled": True, "ine_codes": ["0001234567", "0001234568"], "sync_professionals": True},
+    "appointments": {"enabled": True, "window_days": 30, "include_home_visits": True},
+    "procedures": {"enabled": True, "sigtap_table": "2025-01", "batch_size": 500},
+    "medications": {"enabled": True, "source": "Hórus", "controlled_substances": True},
+    "reports": {"enabled": True, "formats": ["pdf", "csv"], "schedule": "0 6 * * *"},
+}
+ERP_SYSTEMS = {"philips-tasy": "Philips Tasy", "soul-mv": "SOUL MV"}
+DATASUS_SERVICES = {
+    "rnds": "Rede Nacional de Dados em Saúde",
+    "cnes": "Cadastro Nacional de Estabelecimentos de Saúde",
+    "sigtap": "Tabela de Procedimentos do SUS",
+    "esus-aps-ledi": "e-SUS APS LEDI",
+}
+
+
+@dataclasses.dataclass
+class Fault:
+    latency_ms: float = 0.0  # median
+    jitter_ms: float = 0.0  # standard deviation
+    error_rate: float = 0.0
+    error_status: int = 503
+    rate_limit: float = 0.0  # requests per second per client, 0 = unlimited
+    burst: int = 0
+
+
+# Path glob -> fault; the last matching entry wins, so overrides go at the end
+DEFAULT_FAULTS = [
+    ("*", Fault(latency_ms=8, jitter_ms=3)),
+    ("/api/erp/*", Fault(latency_ms=45, jitter_ms=15)),
+    ("/api/datasus/*", Fault(latency_ms=60, jitter_ms=20)),
+    ("/api/esus-aps/*", Fault(latency_ms=25, jitter_ms=8)),
+    ("/api/mcp-server/*", Fault(latency_ms=20, jitter_ms=5)),
+    ("/analytics/ai/*", Fault(latency_ms=120, jitter_ms=30)),
+]
+
+
+@dataclasses.dataclass
+class Request:
+    method: str
+    path: str
+    query: dict
+    headers: dict  # lower-case names
+    body: bytes
+    client: str
+
+    def json(self):
+        try:
+            return json.loads(self.body) if self.body else {}
+        except ValueError:
+            return None
+
+    @property
+    def token(self):
+        value = self.headers.get("authorization", "")
+        return value[7:].strip() if value.lower().startswith("bearer ") else None
+
+
+@dataclasses.dataclass
+class Response:
+    status: int
+    body: object = None
+    headers: dict = dataclasses.field(default_factory=dict)
+
+    def encode(self, keep_alive):
+        if isinstance(self.body, str):
+            payload, content_type = self.body.encode("utf-8"), "text/html; charset=utf-8"
+        elif isinstance(self.body, bytes):
+            payload, content_type = self.body, "application/octet-stream"
+        elif self.body is None:
+            payload, content_type = b"", None
+        else:
+            payload, content_type = json.dumps(self.body, ensure_ascii=False).encode("utf-8"), "application/json"
+        headers = dict(SECURITY_HEADERS)
+        if content_type:
+            headers["Content-Type"] = content_type
+        headers.update(self.headers)
+        headers["Content-Length"] = str(len(payload))
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        head = f"HTTP/1.1 {self.status} {REASONS.get(self.status, 'Unknown')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        return head.encode("latin-1") + b"\r\n" + payload
+
+
+def error(status, message, **extra):
+    return Response(status, {"error": message, **extra})
+
+
+ROUTES = []
+
+
+def route(method, pattern, auth=False):
+    """Register a handler ``(backend, request, **groups)`` for ``method`` and a path regex."""
+
+    def register(handler):
+        ROUTES.append((method, re.compile(f"^{pattern}$"), auth, handler))
+        return handler
+
+    return register
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def _b64(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+class Backend:
+    """In-memory state behind the routes, plus fault injection and counters."""
+
+    def __init__(self, faults=None, seed=None, orchestration_seconds=ORCHESTRATION_SECONDS):
+        self.faults = list(DEFAULT_FAULTS if faults is None else faults)
+        self.random = random.Random(seed)
+        self.orchestration_seconds = orchestration_seconds
+        self.secret = secrets.token_bytes(32)
+        self.users = {}
+        self.sessions = {}
+        self.health_data = {}
+        self.configuration = json.loads(json.dumps(ESUS_SECTIONS))
+        self.orchestrations = {}
+        self.audit_logs = []
+        self.last_sync = {"ledi": _now(), "dwpec": _now()}
+        self.buckets = {}
+        self.stats = collections.defaultdict(lambda: {"requests": 0, "errors": 0, "limited": 0, "latency_ms": 0.0})
+
+    # Auth
+
+    def issue_token(self, user):
+        now = int(time.time())
+        header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+        payload = _b64(json.dumps({
+            "sub": user["id"], "email": user["email"], "role": "gestor",
+            "roles": [PROFILE_PATHS[profile] for profile in PROFILES], "iat": now, "exp": now + TOKEN_TTL,
+        }).encode())
+        signature = _b64(hmac.new(self.secret, f"{header}.{payload}".encode(), hashlib.sha256).digest())
+        return f"{header}.{payload}.{signature}"
+
+    def authorized(self, token):
+        if not token:
+            return False
+        if token.count(".") != 2:
+            return True  # opaque API key
+        header, payload, signature = token.split(".")
+        expected = _b64(hmac.new(self.secret, f"{header}.{payload}".encode(), hashlib.sha256).digest())
+        if not hmac.compare_digest(signature, expected):
+            return False
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        return claims.get("exp", 0) > time.time()
+
+    # Faults
+
+    def fault(self, path):
+        found = Fault()
+        for pattern, fault in self.faults:
+            if fnmatch.fnmatchcase(path, pattern):
+                found = fault
+        return found
+
+    def limited(self, fault, key):
+        """Token bucket per route pattern and client; returns the Retry-After seconds or 0."""
+        if not fault.rate_limit:
+            return 0
+        capacity = fault.burst or max(1, int(fault.rate_limit))
+        now = time.monotonic()
+        tokens, last = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last) * fault.rate_limit)
+        if tokens < 1:
+            self.buckets[key] = (tokens, now)
+            return max(1, int((1 - tokens) / fault.rate_limit + 0.999))
+        self.buckets[key] = (tokens - 1, now)
+        return 0
+
+    async def dispatch(self, request):
+        started = time.monotonic()
+        if request.path == "/__standin/stats":
+            return Response(200, dict(self.stats))
+        allowed = set()
+        for method, pattern, auth, handler in ROUTES:
+            match = pattern.match(request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed.add(method)
+                continue
+            name = f"{method} {pattern.pattern[1:-1]}"
+            stats = self.stats[name]
+            stats["requests"] += 1
+            fault = self.fault(request.path)
+            retry_after = self.limited(fault, (pattern.pattern, request.token or request.client))
+            if fault.latency_ms or fault.jitter_ms:
+                await asyncio.sleep(max(0.0, self.random.gauss(fault.latency_ms, fault.jitter_ms)) / 1000)
+            if retry_after:
+                stats["limited"] += 1
+                response = error(429, "rate limit exceeded", retry_after=retry_after)
+                response.headers["Retry-After"] = str(retry_after)
+            elif fault.error_rate and self.random.random() < fault.error_rate:
+                stats["errors"] += 1
+                response = error(fault.error_status, "injected failure")
+            elif auth and not self.authorized(request.token):
+                response = error(401, "missing or invalid bearer token")
+            else:
+                response = await handler(self, request, **match.groupdict())
+            stats["latency_ms"] += (time.monotonic() - started) * 1000
+            return response
+        if allowed:
+            return error(405, f"{request.method} not allowed", allowed=sorted(allowed))
+        if request.method == "GET" and not request.path.startswith("/api/"):
+            return _static(request.path)
+        return error(404, f"no route for {request.path}")
+
+    # Background state changes
+
+    async def _run_orchestration(self, orchestration):
+        for state, share in (("running", 0.2), ("completed", 0.8)):
+            await asyncio.sleep(self.orchestration_seconds * share)
+            orchestration["state"] = state
+            orchestration["progress"] = 100 if state == "completed" else 10
+            orchestration["updated_at"] = _now()
+            changed, orchestration["_changed"] = orchestration["_changed"], asyncio.Event()
+            changed.set()
+
+    async def _run_sync(self):
+        await asyncio.sleep(SYNC_SECONDS)
+        self.last_sync = {"ledi": _now(), "dwpec": _now()}
+
+
+def _static(path):
+    """A file from ``public/`` as Vite serves it, else the SPA shell."""
+    target = os.path.realpath(os.path.join(PUBLIC_DIR, urllib.parse.unquote(path).lstrip("/")))
+    if target.startswith(PUBLIC_DIR + os.sep) and os.path.isfile(target):
+        with open(target, "rb") as source:
+            content_type = mimetypes.guess_type(target)[0] or "application/octet-stream"
+            return Response(200, source.read(), {"Content-Type": content_type})
+    return Response(200, SPA_SHELL)
+
+
+def language(request):
+    """First supported language of ``Accept-Language``, Portuguese by default."""
+    for tag in request.headers.get("accept-language", "").split(","):
+        code = tag.split(";")[0].strip().lower()[:2]
+        if code in MESSAGES:
+            return code
+    return "pt"
+
+
+# Auth and users
+
+
+def _demo_user(backend, lang):
+    user_id = str(uuid.uuid4())
+    user = {
+        "id": user_id,
+        "user_id": user_id,
+        "email": f"demo-{user_id[:8]}@saudepublica.br",
+        "username": f"demo-{user_id[:8]}",
+        "password": secrets.token_urlsafe(12),
+        "profiles": PROFILES,
+        "message": MESSAGES[lang]["created"],
+    }
+    backend.users[user_id] = user
+    return user
+
+
+@route("POST", r"/edge-functions/create-demo-user")
+@route("POST", r"/api/supabase/create-demo-user")
+@route("POST", r"/functions/v1/create-demo-user")
+async def create_demo_user(backend, request):
+    return Response(200, _demo_user(backend, language(request)))
+
+
+@route("POST", r"/api/auth/login")
+@route("POST", r"/auth/login")
+@route("POST", r"/login")
+async def login(backend, request):
+    data = request.json()
+    if not isinstance(data, dict):
+        return error(400, "invalid JSON body")
+    identity = data.get("email") or data.get("username")
+    if not identity or not data.get("password"):
+        return error(400, MESSAGES[language(request)]["required"])
+    user = next(
+        (user for user in backend.users.values() if identity in (user["email"], user["username"])),
+        None,
+    )
+    if user is not None and user["password"] != data["password"]:
+        return error(401, MESSAGES[language(request)]["invalid"])
+    user = user or {"id": str(uuid.uuid5(uuid.NAMESPACE_URL, identity)), "email": identity}
+    token = backend.issue_token(user)
+    return Response(200, {
+        "access_token": token,
+        "token": token,
+        "token_type": "bearer",
+        "expires_in": TOKEN_TTL,
+        "refresh_token": secrets.token_urlsafe(24),
+        "profiles": PROFILES,
+        "user": {"id": user["id"], "email": user["email"]},
+    })
+
+
+@route("POST", r"/api/auth/switch-profile", auth=True)
+async def switch_profile(backend, request):
+    profile = (request.json() or {}).get("profile")
+    if profile not in PROFILE_PATHS:
+        return error(400, f"unknown profile {profile!r}", profiles=PROFILES)
+    host = request.headers.get("host", f"{DEFAULT_HOST}:{DEFAULT_PORT}")
+    return Response(200, {"profile": profile, "redirect_url": f"http://{host}/dashboard/{PROFILE_PATHS[profile]}"})
+
+
+@route("POST", r"/api/auth/logout", auth=True)
+@route("POST", r"/auth/logout", auth=True)
+async def logout(backend, request):
+    return Response(204)
+
+
+@route("DELETE", r"/api/users/(?P<user_id>[^/]+)", auth=True)
+async def delete_user(backend, request, user_id):
+    if backend.users.pop(user_id, None) is None:
+        return error(404, f"user {user_id} not found")
+    return Response(204)
+
+
+# Dashboards
+
+
+def _title(request, profile):
+    texts = MESSAGES[language(request)]
+    return f"{texts['dashboard']} {texts['profiles'][profile]} - KPI"
+
+
+@route("GET", r"/dashboard/municipal", auth=True)
+async def municipal_dashboard(backend, request):
+    return Response(200, {
+        "title": _title(request, "gestor"),
+        "kpis": {
+            "indicators_sus": {
+                "coverage_rate": 87.4,
+                "immunization_index": 92.1,
+                "hospital_admissions": 1284,
+                "primary_care_score": 8.2,
+                "health_service_access": 76.9,
+            },
+            "population": 1_245_300,
+        },
+        "updatedAt": _now(),
+        "ui_config": {"theme": "dark", "glassmorphism": True},
+    })
+
+
+@route("GET", r"/dashboard/medical", auth=True)
+async def medical_dashboard(backend, request):
+    return Response(200, {"title": _title(request, "medico"), "appointments_today": 18, "pending_transcriptions": 3, "updatedAt": _now()})
+
+
+@route("GET", r"/dashboard/patient", auth=True)
+async def patient_dashboard(backend, request):
+    return Response(200, {"title": _title(request, "paciente"), "next_appointment": _now(), "prescriptions": 2, "updatedAt": _now()})
+
+
+@route("GET", r"/dashboard/hospital", auth=True)
+@route("GET", r"/api/dashboard/hospital/operational-indicators", auth=True)
+async def hospital_indicators(backend, request):
+    return Response(200, {
+        "title": _title(request, "hospital"),
+        "bedManagement": {"totalBeds": 320, "occupiedBeds": 271, "icuBeds": 40, "icuOccupied": 35},
+        "billingInfo": {"totalBilled": 4_820_350.75, "pendingPayments": 612_400.10, "currency": "BRL"},
+        "analysisReports": [
+            {"reportId": "rep-2025-001", "title": "Taxa de ocupação mensal", "generatedAt": _now()},
+            {"reportId": "rep-2025-002", "title": "Faturamento SUS x convênios", "generatedAt": _now()},
+        ],
+        "operationalMetrics": {"averageLengthOfStay": 4.6, "bedTurnoverRate": 5.2, "readmissionRate": 0.07},
+    })
+
+
+@route("GET", r"/api/health")
+async def health(backend, request):
+    return Response(200, {"database": "ok", "supabaseAuth": "ok", "datasusApis": "ok", "erpIntegration": "ok"})
+
+
+# ERP and DATASUS
+
+
+@route("GET", r"/api/erp/(?P<system>philips-tasy|soul-mv)/status")
+async def erp_status(backend, request, system):
+    return Response(200, {
+        "system": ERP_SYSTEMS[system],
+        "status": "connected",
+        "connection_status": "connected",
+        "last_sync": backend.last_sync["ledi"],
+        "pending_messages": 0,
+        "hl7_version": "2.5",
+    })
+
+
+@route("GET", r"/api/datasus/(?P<service>rnds|cnes|sigtap|esus-aps-ledi)/status")
+async def datasus_status(backend, request, service):
+    return Response(200, {"service": DATASUS_SERVICES[service], "status": "ok", "last_check": _now()})
+
+
+@route("GET", r"/datasus/rnds")
+async def datasus_rnds(backend, request):
+    return Response(200, {"patients": 128_430, "last_update": backend.last_sync["ledi"], "bundle_format": "FHIR R4"})
+
+
+@route("GET", r"/datasus/cnes")
+async def datasus_cnes(backend, request):
+    return Response(200, {
+        "region": "São Paulo - SP",
+        "facilities": [
+            {"cnes": "2077485", "name": "Hospital Municipal Dr. Carmino Caricchio", "type": "hospital"},
+            {"cnes": "2789132", "name": "UBS Jardim Helena", "type": "ubs"},
+        ],
+    })
+
+
+@route("GET", r"/datasus/sigtap")
+async def datasus_sigtap(backend, request):
+    return Response(200, {
+        "procedures": [{"code": "0301010072", "name": "Consulta médica em atenção especializada"}],
+        "codes": ["0301010072"],
+        "competence": "2025-01",
+    })
+
+
+@route("GET", r"/datasus/esus-aps/ledi")
+async def datasus_ledi(backend, request):
+    return Response(200, {"status": "ok", "configurations": sorted(backend.configuration)})
+
+
+# e-SUS APS and MCP orchestration
+
+
+@route("GET", r"/api/esus-aps/configuration/(?P<section>[^/]+)", auth=True)
+async def get_configuration(backend, request, section):
+    if section not in backend.configuration:
+        return error(404, f"unknown configuration section {section!r}", sections=sorted(backend.configuration))
+    return Response(200, backend.configuration[section])
+
+
+@route("PUT", r"/api/esus-aps/configuration/(?P<section>[^/]+)", auth=True)
+async def put_configuration(backend, request, section):
+    if section not in backend.configuration:
+        return error(404, f"unknown configuration section {section!r}", sections=sorted(backend.configuration))
+    data = request.json()
+    if not isinstance(data, dict):
+        return error(400, "configuration must be a JSON object")
+    backend.configuration[section].update(data)
+    return Response(200, backend.configuration[section])
+
+
+@route("GET", r"/api/esus-aps/(?P<source>ledi|dwpec)/status", auth=True)
+async def esus_status(backend, request, source):
+    return Response(200, {"source": source.upper(), "connected": True, "last_sync": backend.last_sync[source]})
+
+
+@route("POST", r"/api/esus-aps/synchronize", auth=True)
+async def synchronize(backend, request):
+    asyncio.ensure_future(backend._run_sync())
+    return Response(202, {"status": "accepted", "sync_id": str(uuid.uuid4())})
+
+
+@route("POST", r"/api/mcp-server/orchestrate/(?P<target>[^/]+)", auth=True)
+async def orchestrate(backend, request, target):
+    orchestration_id = str(uuid.uuid4())
+    orchestration = {
+        "orchestration_id": orchestration_id,
+        "target": target,
+        "state": "queued",
+        "progress": 0,
+        "created_at": _now(),
+        "updated_at": _now(),
+        "_changed": asyncio.Event(),
+    }
+    backend.orchestrations[orchestration_id] = orchestration
+    backend.audit_logs.append({
+        "id": str(uuid.uuid4()),
+        "operation": "mcp-orchestration",
+        "orchestration_id": orchestration_id,
+        "target": target,
+        "timestamp": _now(),
+    })
+    asyncio.ensure_future(backend._run_orchestration(orchestration))
+    return Response(202, {"status": "queued", "orchestration_id": orchestration_id})
+
+
+@route("GET", r"/api/mcp-server/orchestrate/status/(?P<orchestration_id>[^/]+)", auth=True)
+async def orchestration_status(backend, request, orchestration_id):
+    orchestration = backend.orchestrations.get(orchestration_id)
+    if orchestration is None:
+        return error(404, f"orchestration {orchestration_id} not found")
+    headers = {}
+    match = re.search(r"\bwait=(\d+)", request.headers.get("prefer", ""))
+    if match and orchestration["state"] != "completed":
+        wait = min(int(match.group(1)), MAX_LONG_POLL)
+        try:
+            await asyncio.wait_for(orchestration["_changed"].wait(), wait)
+        except asyncio.TimeoutError:
+            pass
+        headers["Preference-Applied"] = f"wait={wait}"
+    body = {key: value for key, value in orchestration.items() if not key.startswith("_")}
+    return Response(200, body, headers)
+
+
+@route("GET", r"/api/audit-logs", auth=True)
+async def audit_logs(backend, request):
+    return Response(200, [
+        log for log in backend.audit_logs
+        if all(str(log.get(key)) == value for key, value in request.query.items())
+    ])
+
+
+# Telemedicine
+
+
+@route("POST", r"/api/telemedicine/sessions", auth=True)
+async def create_session(backend, request):
+    data = request.json()
+    required = ("patientId", "doctorId", "scheduledTime")
+    if not isinstance(data, dict) or any(key not in data for key in required):
+        return error(400, f"{', '.join(required)} are required")
+    session = dict(data, id=str(uuid.uuid4()), status="scheduled", createdAt=_now())
+    backend.sessions[session["id"]] = session
+    return Response(201, session)
+
+
+@route("GET", r"/api/telemedicine/sessions/(?P<session_id>[^/]+)", auth=True)
+async def get_session(backend, request, session_id):
+    session = backend.sessions.get(session_id)
+    return Response(200, session) if session else error(404, f"session {session_id} not found")
+
+
+@route("PUT", r"/api/telemedicine/sessions/(?P<session_id>[^/]+)", auth=True)
+async def update_session(backend, request, session_id):
+    session = backend.sessions.get(session_id)
+    if session is None:
+        return error(404, f"session {session_id} not found")
+    data = request.json()
+    if not isinstance(data, dict):
+        return error(400, "session update must be a JSON object")
+    session.update({key: value for key, value in data.items() if key != "id"})
+    return Response(200, session)
+
+
+@route("DELETE", r"/api/telemedicine/sessions/(?P<session_id>[^/]+)", auth=True)
+async def delete_session(backend, request, session_id):
+    if backend.sessions.pop(session_id, None) is None:
+        return error(404, f"session {session_id} not found")
+    return Response(204)
+
+
+@route("GET", r"/api/telemedicine/sessions/(?P<session_id>[^/]+)/modal", auth=True)
+async def session_modal(backend, request, session_id):
+    session = backend.sessions.get(session_id)
+    if session is None:
+        return error(404, f"session {session_id} not found")
+    return Response(200, {
+        "sessionId": session_id,
+        "patientInfo": {"id": session["patientId"], "name": "Paciente Demonstração"},
+        "doctorInfo": {"id": session["doctorId"], "name": "Dra. Demonstração", "crm": "123456-SP"},
+        "scheduledTime": int(session["scheduledTime"]),
+        "status": session["status"],
+        "videoCallUrl": f"https://meet.saudepublica.local/{session_id}",
+    })
+
+
+# Epidemic alerts and AI analytics
+
+
+@route("GET", r"/api/epidemic/alerts", auth=True)
+async def epidemic_alerts(backend, request):
+    return Response(200, {
+        "notifications": [
+            {"id": "alert-001", "message": "Aumento de casos de dengue em Itaquera", "date": _now(), "severity": "high"},
+            {"id": "alert-002", "message": "Surto de influenza em São Mateus", "date": _now(), "severity": "medium"},
+        ],
+        "risk_maps": {
+            "itaquera": {"disease": "dengue", "risk": "high", "incidence_per_100k": 412.5},
+            "sao-mateus": {"disease": "influenza", "risk": "medium", "incidence_per_100k": 188.0},
+        },
+        "neighborhood_indicators": [
+            {"neighborhood": "Itaquera", "cases_last_7_days": 154, "trend": "up"},
+            {"neighborhood": "São Mateus", "cases_last_7_days": 61, "trend": "stable"},
+        ],
+    })
+
+
+@route("POST", r"/health-data", auth=True)
+async def create_health_data(backend, request):
+    data = request.json()
+    if not isinstance(data, dict) or not data.get("patientId") or not isinstance(data.get("metrics"), dict):
+        return error(400, "patientId and metrics are required")
+    record = dict(data, id=str(uuid.uuid4()))
+    backend.health_data[record["id"]] = record
+    return Response(201, record)
+
+
+@route("DELETE", r"/health-data/(?P<resource_id>[^/]+)", auth=True)
+async def delete_health_data(backend, request, resource_id):
+    if backend.health_data.pop(resource_id, None) is None:
+        return error(404, f"health data {resource_id} not found")
+    return Response(204)
+
+
+@route("GET", r"/analytics/ai/predictive-insights", auth=True)
+async def predictive_insights(backend, request):
+    patient_id = request.query.get("patientId")
+    records = [record for record in backend.health_data.values() if record["patientId"] == patient_id]
+    if not records:
+        return error(404, f"no health data for patient {patient_id!r}")
+    latest = max(records, key=lambda record: record.get("timestamp", 0))["metrics"]
+    heart_rate = latest.get("heartRate", 70)
+    risk = min(1.0, max(0.0, abs(heart_rate - 70) / 60 + (0.2 if latest.get("glucoseLevel", 90) > 126 else 0.0)))
+    return Response(200, {
+        "predictiveAnalysis": {
+            "riskScore": round(risk, 3),
+            "trend": "stable" if risk < 0.3 else "rising",
+            "recommendations": ["Manter acompanhamento na UBS de referência", "Reavaliar sinais vitais em 30 dias"],
+        },
+        "advancedInsights": {
+            "summary": f"{len(records)} registros analisados para {patient_id}",
+            "detailedMetrics": latest,
+        },
+    })
+
+
+# HTTP server
+
+
+async def _read_request(reader, client):
+    line = await reader.readline()
+    if not line:
+        return None
+    method, target, _version = line.decode("latin-1").split()
+    headers = {}
+    while True:
+        header = await reader.readline()
+        if header in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = header.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length") or 0)
+    body = await reader.readexactly(length) if length else b""
+    parsed = urllib.parse.urlsplit(target)
+    query = dict(urllib.parse.parse_qsl(parsed.query, keep_blank_values=True))
+    return Request(method.upper(), parsed.path, query, headers, body, client)
+
+
+async def serve(backend, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Start serving ``backend``; returns the ``asyncio.Server``."""
+
+    async def handle(reader, writer):
+        peer = writer.get_extra_info("peername")
+        client = peer[0] if peer else "unknown"
+        try:
+            while True:
+                request = await _read_request(reader, client)
+                if request is None:
+                    break
+                try:
+                    response = await backend.dispatch(request)
+                except Exception as exc:
+                    response = error(500, f"{type(exc).__name__}: {exc}")
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                writer.write(response.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port, backlog=1024, reuse_address=True)
+
+
+class StandinServer:
+    """``python -m harness.standin`` in a child process, e.g. for the runner's ``--standin``."""
+
+    def __init__(self, port=DEFAULT_PORT, host=DEFAULT_HOST, args=()):
+        self.host = host
+        self.port = port
+        self.args = list(args)
+        self.process = None
+
+    def _responds(self):
+        try:
+            with socket.create_connection((self.host, self.port), timeout=0.5):
+                return True
+        except OSError:
+            return False
+
+    def start(self):
+        if self._responds():
+            raise RuntimeError(f"{self.host}:{self.port} is already in use; stop the dev server or pick another port")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "harness.standin", "--host", self.host, "--port", str(self.port), *self.args],
+            cwd=config.TESTS_DIR,
+            stdout=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + SERVER_START_TIMEOUT
+        while not self._responds():
+            if self.process.poll() is not None or time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"Stand-in backend did not start on port {self.port}")
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.process = None
+
+
+def _values(value, names, types):
+    """``"0.05:502"`` -> ``{"error_rate": 0.05, "error_status": 502}``; trailing values are optional."""
+    return {name: kind(part) for name, kind, part in zip(names, types, value.split(":"))}
+
+
+def build_faults(latency=(), errors=(), rate_limits=()):
+    """``DEFAULT_FAULTS`` with ``GLOB=VALUE`` overrides from the command line appended."""
+    faults = list(DEFAULT_FAULTS)
+    overrides = (
+        (latency, ("latency_ms", "jitter_ms"), (float, float)),
+        (errors, ("error_rate", "error_status"), (float, int)),
+        (rate_limits, ("rate_limit", "burst"), (float, int)),
+    )
+    for specs, names, types in overrides:
+        for spec in specs:
+            pattern, _, value = spec.partition("=")
+            if not value:
+                raise ValueError(f"expected GLOB=VALUE, got {spec!r}")
+            # Start from what the glob currently gets, so overrides combine
+            base = Fault()
+            for known, fault in faults:
+                if fnmatch.fnmatchcase(pattern, known):
+                    base = fault
+            faults.append((pattern, dataclasses.replace(base, **_values(value, names, types))))
+    return faults
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the API test contracts from memory")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", action="append", default=[], metavar="GLOB=MS[:JITTER]", help="latency per path glob")
+    parser.add_argument("--errors", action="append", default=[], metavar="GLOB=RATE[:STATUS]", help="error rate per path glob")
+    parser.add_argument("--rate-limit", action="append", default=[], metavar="GLOB=RPS[:BURST]", help="429 above this rate per client")
+    parser.add_argument("--seed", type=int, default=None, help="seed for latency and error draws")
+    parser.add_argument("--orchestration-seconds", type=float, default=ORCHESTRATION_SECONDS)
+    args = parser.parse_args(argv)
+
+    backend = Backend(
+        build_faults(args.latency, args.errors, args.rate_limit),
+        seed=args.seed,
+        orchestration_seconds=args.orchestration_seconds,
+    )
+
+    async def run():
+        server = await serve(backend, args.host, args.port)
+        print(f"Stand-in backend on http://{args.host}:{args.port} ({len(ROUTES)} routes)", flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+"""Failure-only Playwright traces from a bounded ring buffer of recent steps.
+
+The reports describe failures such as "Municipal Dashboard Timeout (TC003)"
+with nothing to debug them from, and recording a full trace of every run
+costs too much disk and CPU. Instead every context from ``harness.browser``
+is traced (DOM snapshots and network, no screenshots) in chunks: each
+``harness.budget`` step that succeeds closes the current chunk and opens the
+next, and the closed chunk goes into an in-memory ring of at most ``TESTSPRITE_TRACE_STEPS``
+chunks (default 10) and ``TESTSPRITE_TRACE_MB`` MB (default 64) per
+process. The oldest chunks are dropped first; the newest one is always kept.
+
+When the test fails, or runs out of its ``harness.budget``, ``browser.run``
+writes the ring to ``tmp/artifacts/traces/<test_id>.zip``: one Playwright
+trace per step, oldest first, and an ``index.json`` with the steps and the
+failure. A passing test drops the ring and writes nothing::
+
+    unzip -d tmp/trace tmp/artifacts/traces/TC003_....zip
+    python -m playwright show-trace tmp/trace/09-click....trace.zip
+    python -m harness.trace                 # list the traces of the last run
+
+Tracing is on for a script run on its own. The runner keeps passing runs
+free of it and still leaves a trace for every failure: by default
+(``--trace retry``) tests run untraced and each failed browser test is run
+once more with ``TESTSPRITE_TRACE=on``; its result stays that of the first
+attempt. ``--trace on`` traces the first attempt instead (for failures that
+do not reproduce) and ``--trace off``, like ``TESTSPRITE_TRACE=off``,
+disables tracing. Each traced test records its rotation overhead
+(``kind: "trace"``)::
+
+    python -m harness.runner --trace on -k TC003
+"""
+
+import argparse
+import collections
+import contextlib
+import glob
+import itertools
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import zipfile
+
+from playwright import async_api
+
+from harness import config, metrics
+
+MODE_ENV = "TESTSPRITE_TRACE"
+# Runner --trace modes; ON and OFF are also the values of MODE_ENV
+RETRY = "retry"
+STEPS_ENV = "TESTSPRITE_TRACE_STEPS"
+SIZE_ENV = "TESTSPRITE_TRACE_MB"
+TRACE_DIR = os.path.join(config.ARTIFACTS_DIR, "traces")
+ON = "on"
+OFF = "off"
+DEFAULT_STEPS = 10
+DEFAULT_MB = 64
+
+# Closed chunks of every context of this process, oldest first: (context label, step, trace bytes)
+_ring = collections.deque()
+_ring_bytes = 0
+_traced = {}
+_labels = itertools.count(1)
+# Seconds spent rotating chunks, the overhead a passing test pays
+_overhead = 0.0
+
+
+def enabled():
+    return os.environ.get(MODE_ENV, "").strip().lower() != OFF
+
+
+def _limits():
+    return int(os.environ.get(STEPS_ENV) or DEFAULT_STEPS), float(os.environ.get(SIZE_ENV) or DEFAULT_MB) * 1024 * 1024
+
+
+def _push(label, step, data):
+    global _ring_bytes
+    _ring.append((label, step, data))
+    _ring_bytes += len(data)
+    max_steps, max_bytes = _limits()
+    while len(_ring) > 1 and (len(_ring) > max_steps or _ring_bytes > max_bytes):
+        _ring_bytes -= len(_ring.popleft()[2])
+
+
+async def attach(context):
+    """Start tracing ``context`` into the ring (called by ``browser.new_context``)."""
+    if not enabled():
+        return
+    try:
+        # DOM snapshots already show each step; screenshots would cost every action a capture
+        await context.tracing.start(screenshots=False, snapshots=True)
+        await context.tracing.start_chunk()
+    except async_api.Error:
+        return  # tracing is a debugging aid, never a reason to fail the test
+    _traced[context] = f"context{next(_labels)}"
+
+
+async def _close_chunk(context, step):
+    global _overhead
+    started = time.monotonic()
+    handle, path = tempfile.mkstemp(suffix=".trace.zip")
+    os.close(handle)
+    try:
+        await context.tracing.stop_chunk(path=path)
+        with open(path, "rb") as source:
+            _push(_traced[context], step, source.read())
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
+        _overhead += time.monotonic() - started
+
+
+async def checkpoint(context, step):
+    """Close the chunk that ends with ``step`` and start the next one."""
+    if context not in _traced:
+        return
+    try:
+        await _close_chunk(context, step)
+        await context.tracing.start_chunk()
+    except async_api.Error:
+        _traced.pop(context, None)
+
+
+async def detach(context):
+    """Keep the last chunk of ``context`` and stop tracing it (called before it is closed)."""
+    if context not in _traced:
+        return
+    try:
+        await _close_chunk(context, "release")
+        await context.tracing.stop()
+    except async_api.Error:
+        pass  # a crashed context has nothing left to trace
+    finally:
+        _traced.pop(context, None)
+
+
+def reset():
+    """Remove the traces of the previous run (called by the runner)."""
+    for path in glob.glob(os.path.join(TRACE_DIR, "*.zip")):
+        os.remove(path)
+
+
+def _slug(text):
+    return re.sub(r"[^0-9A-Za-z]+", "-", text).strip("-")[:60]
+
+
+def finish(failed, error=None):
+    """Write the ring if the test failed and empty it; returns the trace path or None."""
+    global _ring_bytes, _overhead
+    chunks, overhead = list(_ring), _overhead
+    _ring.clear()
+    _ring_bytes, _overhead = 0, 0.0
+    if chunks:
+        metrics.record("trace", "RUN", metrics.test_id(), None, overhead, chunks=len(chunks), flushed=failed)
+    if not failed or not chunks:
+        return None
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    path = os.path.join(TRACE_DIR, f"{metrics.test_id()}.zip")
+    index = {"test_id": metrics.test_id(), "error": error, "steps": []}
+    tmp_path = path + ".tmp"
+    with zipfile.ZipFile(tmp_path, "w") as archive:
+        for number, (label, step, data) in enumerate(chunks, 1):
+            name = f"{number:02d}-{_slug(step)}.trace.zip"
+            # Trace chunks are zips already; storing them again costs no CPU
+            archive.writestr(name, data, compress_type=zipfile.ZIP_STORED)
+            index["steps"].append({"file": name, "context": label, "step": step, "bytes": len(data)})
+        archive.writestr("index.json", json.dumps(index, indent=2, ensure_ascii=False), compress_type=zipfile.ZIP_DEFLATED)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List the failure traces of the last run")
+    parser.add_argument("--dir", default=TRACE_DIR, help="directory with the trace archives")
+    args = parser.parse_args(argv)
+
+    paths = sorted(glob.glob(os.path.join(args.dir, "*.zip")))
+    if not paths:
+        print("No failure traces")
+        return 0
+    for path in paths:
+        with zipfile.ZipFile(path) as archive:
+            index = json.loads(archive.read("index.json"))
+        print(f"{os.path.relpath(path, config.TESTS_DIR)} ({os.path.getsize(path) / 1024:.0f} KB, {len(index['steps'])} steps)")
+        if index["error"]:
+            print(f"    {index['error'].splitlines()[0][:200]}")
+        for step in index["steps"]:
+            print(f"    {step['file']}  {step['context']}  {step['bytes'] / 1024:.0f} KB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,367 @@
+"""Pool of pre-provisioned demo users for the API tests.
+
+TC001 and TC006 used to call the ``create-demo-user`` edge function and
+delete the user again in every run, the slowest part of their setup and a
+source of collisions between parallel runs. The pool creates N users per
+profile and runner worker up front and leases them out::
+
+    with userpool.lease("gestor") as user:
+        token = authenticate_user(user["email"], user["password"])
+
+Users are partitioned by worker slot (``config.worker()``), so parallel
+tests never share one. A released user is reset before it is leased again:
+it logs in, switches back to its pool profile and logs out, which drops the
+sessions and profile switches of the previous test. A user whose reset fails
+is retired and left for the bulk delete. Leases of processes that died (a
+test killed on timeout) are reclaimed. When the partition has no free user
+for the profile, one is created on demand and joins the pool, so scripts also
+work when run on their own.
+
+The pool state lives in ``tmp/cache/userpool/<host>_<port>.json`` behind a
+file lock. Users that tests create themselves (TC010 checks the edge
+function's own response) are handed to ``track()`` and deleted with the
+pool. The runner deletes the pool after every run that left users in it,
+with or without ``--user-pool``; a script run on its own deletes the users
+it created or tracked when it exits::
+
+    python -m harness.userpool provision -n 2 --workers 8
+    python -m harness.userpool status
+    python -m harness.userpool delete
+    python -m harness.runner --user-pool 2     # provision before, delete after
+"""
+
+import argparse
+import atexit
+import concurrent.futures
+import contextlib
+import fcntl
+import json
+import os
+import sys
+import time
+import unicodedata
+import urllib.parse
+
+import requests
+
+from harness import api_client, config, metrics
+
+POOL_DIR = os.path.join(config.CACHE_DIR, "userpool")
+CREATE_PATH = "/edge-functions/create-demo-user"
+LOGIN_PATH = "/api/auth/login"
+SWITCH_PATH = "/api/auth/switch-profile"
+LOGOUT_PATH = "/api/auth/logout"
+DELETE_PATH = "/api/users/{user_id}"
+REQUEST_TIMEOUT = 30
+MAX_CONCURRENCY = 8
+# Login statuses that mean the user no longer exists
+GONE_STATUSES = (400, 401, 404)
+
+# Pool profile -> profile name of the auth API
+PROFILES = {"gestor": "Gestor", "hospital": "Hospital", "medico": "Médico", "paciente": "Paciente"}
+
+
+class PoolError(RuntimeError):
+    """The pool could not lease, reset or delete a user."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        # HTTP status of the failed request, if any
+        self.status = status
+
+
+def profile_key(profile):
+    """Normalise "Médico", "medico" or "MEDICO" to a ``PROFILES`` key."""
+    key = unicodedata.normalize("NFKD", profile).encode("ascii", "ignore").decode().lower()
+    if key not in PROFILES:
+        raise ValueError(f"Unknown profile {profile!r}, expected one of {', '.join(PROFILES)}")
+    return key
+
+
+def pool_path(base_url=None):
+    parts = urllib.parse.urlsplit(base_url or config.BASE_URL)
+    return os.path.join(POOL_DIR, f"{parts.hostname}_{parts.port or 80}.json")
+
+
+@contextlib.contextmanager
+def _locked(path):
+    """Read-modify-write the pool state under an exclusive file lock."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            try:
+                with open(path, encoding="utf-8") as source:
+                    state = json.load(source)
+            except (OSError, ValueError):
+                state = {"base_url": config.BASE_URL, "users": [], "tracked": []}
+            yield state
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as out:
+                json.dump(state, out, indent=1, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _user_id(user):
+    return user.get("user_id") or user.get("id")
+
+
+def _check(response, action):
+    if response.status_code >= 400:
+        raise PoolError(f"{action} failed: HTTP {response.status_code} {response.text[:200]}", response.status_code)
+    return response
+
+
+def create_user(profile, client=None):
+    """Create one demo user through the edge function; returns its response."""
+    client = client or api_client.shared()
+    url = config.BASE_URL + CREATE_PATH
+    data = _check(client.post(url, json={"profile": PROFILES[profile]}, timeout=REQUEST_TIMEOUT), "create-demo-user").json()
+    if not (_user_id(data) and data.get("password") and (data.get("email") or data.get("username"))):
+        raise PoolError(f"create-demo-user returned no credentials: {sorted(data)}")
+    return data
+
+
+def login(user, client=None):
+    """Log in as a pool user; returns the access token."""
+    client = client or api_client.shared()
+    payload = {"email": user.get("email") or user.get("username"), "password": user["password"]}
+    data = _check(client.post(config.BASE_URL + LOGIN_PATH, json=payload, timeout=REQUEST_TIMEOUT), "login").json()
+    token = data.get("access_token") or data.get("token")
+    if not token:
+        raise PoolError("login returned no access token")
+    return token
+
+
+def reset(entry, client=None):
+    """Bring a user back to its pool profile with no open session."""
+    client = client or api_client.shared()
+    headers = {"Authorization": f"Bearer {login(entry['user'], client)}"}
+    _check(
+        client.post(config.BASE_URL + SWITCH_PATH, json={"profile": PROFILES[entry["profile"]]}, headers=headers, timeout=REQUEST_TIMEOUT),
+        "switch-profile",
+    )
+    _check(client.post(config.BASE_URL + LOGOUT_PATH, headers=headers, timeout=REQUEST_TIMEOUT), "logout")
+
+
+def delete_user(user, client=None):
+    """Delete a user with its own token; a user that is already gone counts as deleted."""
+    client = client or api_client.shared()
+    try:
+        token = login(user, client)
+    except PoolError as exc:
+        if exc.status in GONE_STATUSES:
+            return  # the credentials no longer work: the user was deleted elsewhere
+        raise  # e.g. a 5xx or 429: keep the user in the pool for the next teardown
+    response = client.delete(
+        config.BASE_URL + DELETE_PATH.format(user_id=_user_id(user)),
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=REQUEST_TIMEOUT,
+    )
+    if response.status_code != 404:
+        _check(response, "delete")
+
+
+def _concurrently(function, items, workers=MAX_CONCURRENCY):
+    """``function(item)`` for every item on a thread pool; returns ``[(item, error)]`` of the failures."""
+    if not items:
+        return []
+    if workers == 1:
+        # No new threads at interpreter exit
+        failures = []
+        for item in items:
+            try:
+                function(item)
+            except Exception as error:
+                failures.append((item, error))
+        return failures
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        futures = {executor.submit(function, item): index for index, item in enumerate(items)}
+        failures = []
+        for future in concurrent.futures.as_completed(futures):
+            if future.exception() is not None:
+                failures.append((items[futures[future]], future.exception()))
+    return failures
+
+
+def provision(per_profile, workers=1, profiles=None, path=None):
+    """Top the pool up to ``per_profile`` users per profile and worker; returns how many were created."""
+    path = path or pool_path()
+    profiles = [profile_key(profile) for profile in (profiles or PROFILES)]
+    with _locked(path) as state:
+        have = {}
+        for entry in state["users"]:
+            if not entry.get("retired"):
+                key = (entry["profile"], entry["worker"])
+                have[key] = have.get(key, 0) + 1
+    wanted = [
+        (profile, worker)
+        for profile in profiles
+        for worker in range(workers)
+        for _ in range(per_profile - have.get((profile, worker), 0))
+    ]
+    created = []
+
+    def create(slot):
+        profile, worker = slot
+        created.append({"user": create_user(profile), "profile": profile, "worker": worker, "lease": None, "created_at": time.time()})
+
+    failures = _concurrently(create, wanted)
+    with _locked(path) as state:
+        state["users"].extend(created)
+    if failures:
+        raise PoolError(f"{len(failures)} of {len(wanted)} demo users could not be created: {failures[0][1]}")
+    return len(created)
+
+
+# Users this process created or tracked outside the runner, deleted at exit
+_own = []
+
+
+def _delete_own(path):
+    users, _own[:] = list(_own), []
+    _delete(users, path, workers=1)
+
+
+def _adopt(user, path):
+    """Delete ``user`` when this process exits, unless the runner deletes the pool after the run."""
+    if os.environ.get(metrics.TEST_ID_ENV):
+        return
+    if not _own:
+        atexit.register(_delete_own, path)
+    _own.append(user)
+
+
+def _acquire(state, profile, worker):
+    for entry in state["users"]:
+        if entry["profile"] != profile or entry["worker"] != worker or entry.get("retired"):
+            continue
+        lease = entry["lease"]
+        if lease is None or not _alive(lease["pid"]):
+            entry["lease"] = {"pid": os.getpid(), "test": metrics.test_id(), "since": time.time()}
+            return entry
+    return None
+
+
+@contextlib.contextmanager
+def lease(profile, path=None):
+    """Lease a user of ``profile`` from this worker's partition for the ``with`` block."""
+    path = path or pool_path()
+    profile = profile_key(profile)
+    worker = config.worker()
+    with _locked(path) as state:
+        entry = _acquire(state, profile, worker)
+    if entry is None:
+        entry = {
+            "user": create_user(profile), "profile": profile, "worker": worker, "created_at": time.time(),
+            "lease": {"pid": os.getpid(), "test": metrics.test_id(), "since": time.time()},
+        }
+        with _locked(path) as state:
+            state["users"].append(entry)
+        _adopt(entry["user"], path)
+    try:
+        yield dict(entry["user"])
+    finally:
+        try:
+            reset(entry)
+            retired = False
+        except (PoolError, requests.RequestException):
+            retired = True
+        user_id = _user_id(entry["user"])
+        with _locked(path) as state:
+            for stored in state["users"]:
+                if _user_id(stored["user"]) == user_id:
+                    stored["lease"] = None
+                    stored["retired"] = retired
+
+
+def track(user, path=None):
+    """Delete ``user`` (a create-demo-user response) along with the pool."""
+    path = path or pool_path()
+    with _locked(path) as state:
+        state["tracked"].append(user)
+    _adopt(user, path)
+
+
+def _delete(users, path, workers=MAX_CONCURRENCY):
+    failures = _concurrently(delete_user, users, workers)
+    deleted_ids = {_user_id(user) for user in users} - {_user_id(user) for user, _ in failures}
+    with _locked(path) as state:
+        state["users"] = [entry for entry in state["users"] if _user_id(entry["user"]) not in deleted_ids]
+        state["tracked"] = [user for user in state["tracked"] if _user_id(user) not in deleted_ids]
+    return len(users) - len(failures), len(failures)
+
+
+def delete_all(path=None):
+    """Bulk-delete every pool and tracked user; returns ``(deleted, failed)``."""
+    path = path or pool_path()
+    with _locked(path) as state:
+        users = [entry["user"] for entry in state["users"]] + state["tracked"]
+    return _delete(users, path)
+
+
+def size(path=None):
+    """Number of pool and tracked users left on the server, without creating the state file."""
+    path = path or pool_path()
+    if not os.path.exists(path):
+        return 0
+    with _locked(path) as state:
+        return len(state["users"]) + len(state["tracked"])
+
+
+def status(path=None):
+    """``{(profile, worker): {"free": n, "leased": n, "retired": n}}``."""
+    with _locked(path or pool_path()) as state:
+        counts = {}
+        for entry in state["users"]:
+            row = counts.setdefault((entry["profile"], entry["worker"]), {"free": 0, "leased": 0, "retired": 0})
+            if entry.get("retired"):
+                row["retired"] += 1
+            elif entry["lease"] and _alive(entry["lease"]["pid"]):
+                row["leased"] += 1
+            else:
+                row["free"] += 1
+        return counts, len(state["tracked"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the pool of demo users leased to the API tests")
+    commands = parser.add_subparsers(dest="command", required=True)
+    provision_parser = commands.add_parser("provision", help="create users up to N per profile and worker")
+    provision_parser.add_argument("-n", "--per-profile", type=int, default=1)
+    provision_parser.add_argument("--workers", type=int, default=1)
+    provision_parser.add_argument("--profiles", default=",".join(PROFILES))
+    commands.add_parser("status", help="show free, leased and retired users")
+    commands.add_parser("delete", help="delete every pool and tracked user")
+    args = parser.parse_args(argv)
+
+    if args.command == "provision":
+        started = time.perf_counter()
+        created = provision(args.per_profile, args.workers, args.profiles.split(","))
+        print(f"Created {created} demo users in {time.perf_counter() - started:.2f}s")
+    elif args.command == "status":
+        counts, tracked = status()
+        for (profile, worker), row in sorted(counts.items()):
+            print(f"{profile:<9} worker {worker:<3} free {row['free']:<3} leased {row['leased']:<3} retired {row['retired']}")
+        print(f"{tracked} tracked users")
+    else:
+        deleted, failed = delete_all()
+        print(f"Deleted {deleted} demo users" + (f", {failed} failed (kept for the next delete)" if failed else ""))
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""Navigation Timing and Web Vitals for every route a browser test visits.
+
+Every context from ``harness.browser`` gets an init script that observes
+largest-contentful-paint and layout-shift entries and notices SPA route
+changes (``history.pushState``/``replaceState``/``popstate`` that change the
+path). Whenever a page's main frame lands on a new route, by ``page.goto``
+or by a click, the page is settled with ``waits.settle`` and one sample is
+recorded in the test's metrics file (``kind: "vitals"``):
+
+* ``ttfb``, ``dom_content_loaded``, ``load`` from Navigation Timing (full
+  page loads only);
+* ``lcp`` and ``cls`` since the navigation started (Chromium stops reporting
+  LCP after the first click, so SPA navigations usually have none);
+* ``settled``: time from the navigation start until the page settled, the
+  render time of SPA navigations;
+* ``js_bytes``/``css_bytes``: encoded size of the scripts and stylesheets
+  loaded for the route (lazy route chunks for SPA navigations).
+
+Times are in seconds. The runner attaches the samples to each test result.
+
+Budgets per route live in ``harness/vitals_budgets.json`` (or the file named
+by ``TESTSPRITE_VITALS_BUDGETS``; set it to an empty string to disable them).
+A sample over budget fails the test once it has otherwise passed. A summary
+of the last run per route::
+
+    python -m harness.vitals
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import urllib.parse
+
+from harness import metrics, waits
+
+KIND = "vitals"
+BUDGETS_ENV = "TESTSPRITE_VITALS_BUDGETS"
+BUDGETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vitals_budgets.json")
+FLUSH_TIMEOUT = 5
+FIELDS = ["ttfb", "dom_content_loaded", "load", "lcp", "cls", "settled", "js_bytes", "css_bytes"]
+
+INIT_JS = """(() => {
+    if (window.__testspriteVitals) return;
+    const state = window.__testspriteVitals = {start: 0, soft: false, lcp: null, cls: 0, resources: 0};
+    const reset = () => {
+        state.start = performance.now();
+        state.soft = true;
+        state.lcp = null;
+        state.cls = 0;
+        state.resources = performance.getEntriesByType('resource').length;
+    };
+    try {
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                if (entry.startTime >= state.start) state.lcp = entry.startTime - state.start;
+            }
+        }).observe({type: 'largest-contentful-paint', buffered: true});
+        new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) {
+                if (!entry.hadRecentInput && entry.startTime >= state.start) state.cls += entry.value;
+            }
+        }).observe({type: 'layout-shift', buffered: true});
+    } catch (error) {
+        // Entry types this browser does not support are reported as null
+    }
+    let path = location.pathname;
+    for (const method of ['pushState', 'replaceState']) {
+        const original = history[method];
+        history[method] = function (...args) {
+            const result = original.apply(this, args);
+            if (location.pathname !== path) reset();
+            path = location.pathname;
+            return result;
+        };
+    }
+    addEventListener('popstate', () => {
+        if (location.pathname !== path) reset();
+        path = location.pathname;
+    });
+})();"""
+
+SNAPSHOT_JS = """() => {
+    const state = window.__testspriteVitals;
+    if (!state) return null;
+    const seconds = ms => ms > 0 ? ms / 1000 : null;
+    const sample = {
+        path: location.pathname,
+        soft: state.soft,
+        lcp: state.lcp === null ? null : state.lcp / 1000,
+        cls: state.cls,
+        settled: (performance.now() - state.start) / 1000,
+        js_bytes: 0,
+        css_bytes: 0,
+    };
+    if (!state.soft) {
+        const nav = performance.getEntriesByType('navigation')[0];
+        if (nav) {
+            sample.ttfb = seconds(nav.responseStart);
+            sample.dom_content_loaded = seconds(nav.domContentLoadedEventEnd);
+            sample.load = seconds(nav.loadEventEnd);
+        }
+    }
+    for (const entry of performance.getEntriesByType('resource').slice(state.soft ? state.resources : 0)) {
+        const url = entry.name.split(/[?#]/)[0];
+        if (entry.initiatorType === 'script' || /\\.(m?js|jsx?|tsx?)$/.test(url)) {
+            sample.js_bytes += entry.encodedBodySize;
+        } else if (entry.initiatorType === 'css' || /\\.css$/.test(url)) {
+            sample.css_bytes += entry.encodedBodySize;
+        }
+    }
+    return sample;
+}"""
+
+# Samples over budget in this process, reported by check()
+_violations = []
+# context -> pending sample tasks
+_pending = collections.defaultdict(set)
+
+
+class BudgetExceeded(AssertionError):
+    """A route's Web Vitals went over its budget."""
+
+
+def route(url):
+    return urllib.parse.urlsplit(url).path or "/"
+
+
+def load_budgets(path=None):
+    """``{route: {field: limit}}``; empty when budgets are disabled."""
+    path = os.environ.get(BUDGETS_ENV, BUDGETS_PATH) if path is None else path
+    if not path:
+        return {}
+    with open(path, encoding="utf-8") as source:
+        data = json.load(source)
+    return {key: value for key, value in data.items() if not key.startswith("_")}
+
+
+def over_budget(sample, budgets):
+    """``[(field, value, limit)]`` for every budget ``sample`` exceeds."""
+    limits = budgets.get(sample["route"], {})
+    return [
+        (field, sample[field], limit)
+        for field, limit in sorted(limits.items())
+        if sample.get(field) is not None and sample[field] > limit
+    ]
+
+
+async def _sample(page, path):
+    try:
+        await waits.settle(page)
+        sample = await page.evaluate(SNAPSHOT_JS)
+    except Exception:
+        # The page closed or navigated away before the sample was taken
+        return
+    if sample is None or sample["path"] != path:
+        # A later navigation took over; its own sample covers it
+        return
+    values = {field: sample.get(field) for field in FIELDS if field != "settled"}
+    metrics.record(KIND, "GET", page.url, None, sample["settled"], route=path, soft=sample["soft"], **values)
+    for field, value, limit in over_budget(dict(values, route=path, settled=sample["settled"]), load_budgets()):
+        _violations.append(f"{path}: {field} {value:g} exceeds budget {limit:g}")
+
+
+def track_page(page, context):
+    last = {"route": None}
+
+    def on_navigated(frame):
+        if frame is not page.main_frame or frame.url in ("", "about:blank"):
+            return
+        path = route(frame.url)
+        if path == last["route"]:
+            return
+        last["route"] = path
+        task = asyncio.ensure_future(_sample(page, path))
+        _pending[context].add(task)
+        task.add_done_callback(_pending[context].discard)
+
+    page.on("framenavigated", on_navigated)
+
+
+async def track(context):
+    await context.add_init_script(INIT_JS)
+    for page in context.pages:
+        track_page(page, context)
+    context.on("page", lambda page: track_page(page, context))
+
+
+async def flush(context):
+    """Wait for ``context``'s pending samples (called before it is closed)."""
+    tasks = _pending.pop(context, set())
+    if tasks:
+        await asyncio.wait(tasks, timeout=FLUSH_TIMEOUT)
+
+
+def check():
+    """Raise ``BudgetExceeded`` for the samples over budget so far."""
+    violations = list(_violations)
+    _violations.clear()
+    if violations:
+        raise BudgetExceeded("Web Vitals over budget:\n  " + "\n  ".join(violations))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarise the Web Vitals samples of the last run")
+    parser.add_argument("--dir", default=metrics.METRICS_DIR, help="directory with the NDJSON records")
+    args = parser.parse_args(argv)
+
+    budgets = load_budgets()
+    samples = collections.defaultdict(list)
+    for entry in metrics.load(args.dir):
+        if entry["kind"] == KIND:
+            samples[entry["route"]].append(entry)
+    if not samples:
+        print("No Web Vitals samples")
+        return 1
+
+    def worst(entries, field):
+        values = [entry[field] for entry in entries if entry.get(field) is not None]
+        return max(values) if values else None
+
+    def cell(value, scale=1, spec=".2f"):
+        return "-" if value is None else format(value / scale, spec)
+
+    print(f"{'route':<36} {'n':>3} {'ttfb':>7} {'lcp':>7} {'cls':>6} {'settled':>8} {'js KiB':>8} {'css KiB':>8}")
+    failing = 0
+    for path, entries in sorted(samples.items()):
+        row = {field: worst(entries, field) for field in ("ttfb", "lcp", "cls", "js_bytes", "css_bytes")}
+        row["settled"] = worst(entries, "duration")
+        over = over_budget(dict(row, route=path), budgets)
+        failing += bool(over)
+        print(
+            f"{path:<36} {len(entries):>3} {cell(row['ttfb']):>7} {cell(row['lcp']):>7} {cell(row['cls'], spec='.3f'):>6} "
+            f"{cell(row['settled']):>8} {cell(row['js_bytes'], 1024, '.0f'):>8} {cell(row['css_bytes'], 1024, '.0f'):>8}"
+            + ("  OVER " + ", ".join(field for field, _, _ in over) if over else "")
+        )
+    return 1 if failing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
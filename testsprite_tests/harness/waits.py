@@ -0,0 +1,122 @@
+"""Condition-based waiting for the Playwright TC scripts.
+
+The generated scripts used to sleep a fixed 3 s before every click. ``click()``
+replaces that with the readiness signals that actually matter:
+
+* the page has no requests in flight for ``IDLE_MS`` (long-lived websocket and
+  EventSource connections, e.g. Supabase realtime, are ignored);
+* no React suspense fallback is showing (an empty ``#root`` from the
+  ``<Suspense fallback={null}>`` in App.tsx, the "Carregando..." screen from
+  Index.tsx, or ``aria-busy`` regions);
+* the element itself is actionable, which Playwright's ``click`` already
+  checks (attached, visible, stable, enabled, receiving events).
+
+Settling is best effort and capped at ``SETTLE_TIMEOUT_MS``, so a page that
+never goes quiet is no slower than the old fixed sleep. Each click is a
+``harness.budget`` step: it fails fast on a page that crashed or left its
+route, and its waits are capped by the test's time budget.
+"""
+
+import asyncio
+import time
+
+from playwright import async_api
+
+from harness import budget
+
+IDLE_MS = 300
+SETTLE_TIMEOUT_MS = 3000
+POLL_INTERVAL = 0.05
+
+# Connections that stay open for the life of the page
+LONG_LIVED_RESOURCES = {"websocket", "eventsource"}
+
+PENDING_UI_JS = """() => {
+    if (document.readyState === 'loading') return true;
+    const root = document.getElementById('root');
+    if (root && root.childElementCount === 0) return true;
+    if (document.querySelector('[aria-busy="true"]')) return true;
+    for (const el of document.querySelectorAll('.min-h-screen')) {
+        if (el.textContent.trim() === 'Carregando...') return true;
+    }
+    return false;
+}"""
+
+READY_JS = f"() => !({PENDING_UI_JS})()"
+
+
+class NetworkTracker:
+    """Counts a page's in-flight requests and when the count last changed."""
+
+    def __init__(self, page):
+        self.pending = set()
+        self.last_change = time.monotonic()
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_done)
+
+    def _on_request(self, request):
+        if request.resource_type not in LONG_LIVED_RESOURCES:
+            self.pending.add(request)
+            self.last_change = time.monotonic()
+
+    def _on_done(self, request):
+        if request in self.pending:
+            self.pending.discard(request)
+            self.last_change = time.monotonic()
+
+    def is_idle(self, idle_ms=IDLE_MS):
+        return not self.pending and (time.monotonic() - self.last_change) * 1000 >= idle_ms
+
+    async def wait_idle(self, idle_ms=IDLE_MS, timeout_ms=SETTLE_TIMEOUT_MS):
+        """Wait until no request has been in flight for ``idle_ms``. Returns False on timeout."""
+        deadline = time.monotonic() + timeout_ms / 1000
+        while not self.is_idle(idle_ms):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(POLL_INTERVAL)
+        return True
+
+
+_trackers = {}
+
+
+def tracker(page):
+    """Return the page's ``NetworkTracker``, attaching one on first use."""
+    if page not in _trackers:
+        _trackers[page] = NetworkTracker(page)
+        page.on("close", lambda closed: _trackers.pop(closed, None))
+    return _trackers[page]
+
+
+def track(context):
+    """Attach trackers to every current and future page of ``context``.
+
+    Pages tracked from creation also see the requests of their first
+    navigation; otherwise tracking starts at the first ``settle()``.
+    """
+    for page in context.pages:
+        tracker(page)
+    context.on("page", tracker)
+
+
+async def settle(page, timeout_ms=SETTLE_TIMEOUT_MS, idle_ms=IDLE_MS):
+    """Wait for network idle and no pending suspense, up to ``timeout_ms``. Returns False on timeout."""
+    started = time.monotonic()
+    if not await tracker(page).wait_idle(idle_ms, timeout_ms):
+        return False
+    remaining = timeout_ms - (time.monotonic() - started) * 1000
+    try:
+        await page.wait_for_function(READY_JS, timeout=max(remaining, 1), polling=POLL_INTERVAL * 1000)
+    except async_api.Error:
+        # Timed out, or the page navigated mid-check; the click's own
+        # actionability checks still apply
+        return False
+    return True
+
+
+async def click(locator, timeout=5000, settle_timeout=SETTLE_TIMEOUT_MS):
+    """Click ``locator`` once its page has settled, as one ``harness.budget`` step."""
+    async with budget.step(locator.page, f"click {locator}", timeout):
+        await settle(locator.page, budget.timeout_ms(settle_timeout))
+        await locator.click(timeout=budget.timeout_ms(timeout))